@@ -372,12 +372,50 @@ def classer_couleur_hsv(bgr_pixel: np.ndarray) -> str:
     return "INCONNU"
 
 
+# Centre et demi-largeur de la plage de teinte de chaque couleur (H OpenCV, 0-179),
+# mêmes plages que classer_couleur_hsv : la couleur la plus probable est celle qu'il choisit
+TEINTES_REFERENCE = {"ROUGE": (0, 15), "JAUNE": (28, 12), "VERT": (68, 27), "BLEU": (120, 25)}
+
+
+def probabilites_couleur_hsv(bgr_pixel: np.ndarray) -> Dict[str, float]:
+    """
+    Version « souple » de classer_couleur_hsv : probabilité de chaque couleur pour ce pixel,
+    au lieu d'une seule étiquette. Le correcteur au maximum de vraisemblance
+    (corrector.most_likely_states) s'en sert pour corriger un sticker mal lu sans rescanner.
+    """
+    hsv = cv2.cvtColor(np.uint8([[bgr_pixel]]), cv2.COLOR_BGR2HSV)[0][0]
+    h, s, v = int(hsv[0]), int(hsv[1]), int(hsv[2])
+
+    # Vraisemblance de la teinte (distance circulaire, le rouge boucle autour de 0/180)
+    scores = {}
+    for nom, (teinte, ecart) in TEINTES_REFERENCE.items():
+        d = min(abs(h - teinte), 180 - abs(h - teinte))
+        scores[nom] = float(np.exp(-0.5 * (d / ecart) ** 2)) + 1e-6
+    total = sum(scores.values())
+
+    # La teinte n'est fiable que si le pixel est assez saturé et lumineux (sinon : ombre, plastique)
+    confiance = min(1.0, max(0.0, (s - 30) / 60)) * min(1.0, max(0.0, (v - 40) / 60))
+    probas = {nom: confiance * score / total + (1 - confiance) / 4 for nom, score in scores.items()}
+
+    # Jaune surexposé : peu saturé mais très lumineux (même règle que classer_couleur_hsv)
+    if s < 60 and v > 140:
+        poids = min(1.0, (v - 140) / 60)
+        probas = {nom: (1 - poids) * p + poids * (0.85 if nom == "JAUNE" else 0.05) for nom, p in probas.items()}
+
+    return {nom: round(p, 4) for nom, p in probas.items()}
+
+
 # =========================================
 # ANALYSE DES 9 POINTS
 # =========================================
 
-def analyser_couleurs_normalisee(img_normalisee: np.ndarray) -> Tuple[Dict[int, str], np.ndarray]:
-    
+def analyser_couleurs_normalisee(img_normalisee: np.ndarray,
+                                 probabilites: Optional[Dict[int, Dict[str, float]]] = None) -> Tuple[Dict[int, str], np.ndarray]:
+    """
+    Couleur des 9 points d'échantillonnage ; si `probabilites` (dict) est fourni, il reçoit
+    aussi la probabilité de chaque couleur par point (probabilites_couleur_hsv).
+    """
+
     # --- Correction Gamma pour rehausser les couleurs fades ---
     # Cela rend le jaune pâle un peu plus "jaune" avant l'analyse
     gamma = 1.2
@@ -414,6 +452,8 @@ def analyser_couleurs_normalisee(img_normalisee: np.ndarray) -> Tuple[Dict[int,
         roi = img_normalisee[y0:y1, x0:x1]
         if roi.size == 0:
             couleurs_detectees[i + 1] = "HORS_CADRE"
+            if probabilites is not None:
+                probabilites[i + 1] = {nom: 0.25 for nom in TEINTES_REFERENCE}
             continue
 
         # On prend la médiane (beaucoup plus robuste que la moyenne face aux reflets)
@@ -421,6 +461,8 @@ def analyser_couleurs_normalisee(img_normalisee: np.ndarray) -> Tuple[Dict[int,
 
         couleur = classer_couleur_hsv(median_bgr)
         couleurs_detectees[i + 1] = couleur
+        if probabilites is not None:
+            probabilites[i + 1] = probabilites_couleur_hsv(median_bgr)
 
         # Point de debug
         cv2.circle(img_normalisee, (x, y), 10, (0, 0, 255), -1)
@@ -1090,7 +1132,8 @@ def dessiner_patron_complet_avec_gap(patron_data: Dict[str, List[str]]):
 
 # Intégrer cette fonction dans le fichier contenant les autres
 
-def process_single_scan_and_draw(img_bgr: np.ndarray, face_nom: str, current_patron_data: Dict[str, List[str]]):
+def process_single_scan_and_draw(img_bgr: np.ndarray, face_nom: str, current_patron_data: Dict[str, List[str]],
+                                 current_probabilites: Optional[Dict[str, List[Dict[str, float]]]] = None):
     """
     Traite une seule image de face, met à jour le patron complet et génère
     l'image du patron 2D mis à jour (avec espacement).
@@ -1098,6 +1141,7 @@ def process_single_scan_and_draw(img_bgr: np.ndarray, face_nom: str, current_pat
     :param img_bgr: Image OpenCV (BGR) de la face scannée.
     :param face_nom: Nom de la face scannée (e.g., "FRONT").
     :param current_patron_data: L'état actuel du patron complet (peut contenir des faces "MANQUANT").
+    :param current_probabilites: Si fourni, reçoit les probabilités des couleurs des 9 stickers de la face.
     :return: Tuple[List[str], np.ndarray] -> (liste_couleurs_de_la_face, image_patron_mis_a_jour)
     """
     
@@ -1109,10 +1153,13 @@ def process_single_scan_and_draw(img_bgr: np.ndarray, face_nom: str, current_pat
         raise ValueError(f"Impossible de détecter le triangle sur la face {face_nom}")
         
     # 2. Extraction des couleurs (retourne un dict {1: 'R', 2: 'V'...})
-    couleurs_dict, _ = analyser_couleurs_normalisee(face_normalisee)
+    probabilites_dict = {}
+    couleurs_dict, _ = analyser_couleurs_normalisee(face_normalisee, probabilites_dict)
     
     # 3. Conversion en liste ordonnée [1, 2, ..., 9]
     liste_couleurs = [couleurs_dict.get(i, "INCONNU") for i in range(1, 10)]
+    if current_probabilites is not None:
+        current_probabilites[face_nom] = [probabilites_dict.get(i, {}) for i in range(1, 10)]
     
     # 4. Mise à jour du patron complet
     # Assurez-vous d'avoir initialisé toutes les faces comme 'MANQUANT' dans la session
@@ -0,0 +1,316 @@
+"""
+Résolution par lots, vectorisée avec NumPy.
+
+Rejoue les scans enregistrés et les audits du robot (des milliers d'états) sans
+passer par solve() état par état : toutes les étapes de solve_with_c sont faites
+sur un tableau (N, 36) de codes couleur, une opération NumPy pour tout le lot.
+- auto-orientation du constructeur Pyraminx et alignement des tips ;
+- orientation (couleur de chaque face) et validité, par les mêmes invariants que invariants.py ;
+- remontée de la table : rangs (.rank), searchsorted sur les clés triées (.bin) ou
+  blocs décompressés (.cbin),
+  un coup par itération pour tous les états encore en cours.
+
+Les séquences produites sont celles de la table, comme solve() sans cache. Quand solve()
+sert un état tourné ou recoloré depuis son cache (cache.py), sa séquence peut différer
+tout en restant optimale : même longueur, même état final.
+"""
+import os
+
+import numpy as np
+
+from .pyraminx import (MOVE_PERMUTATIONS, INVERSE_MOVES, ROTATION_PERMUTATION,
+                       AXIAL_CENTERS, TIPS, OPPOSITE_FACE, EDGES, SOLVED_COLOURS,
+                       N_EDGE_FLIPS, N_CENTER_TWISTS)
+from .engine import (RankTable, CompressedTable, MOVE_NAMES, START_CODE, RANK_START_CODE,
+                     RANK_EMPTY_CODE, STATE_SIZE, MAX_PATH_LENGTH, default_engine)
+
+# Taille des lots traités d'un bloc (et donc granularité du streaming)
+BATCH_CHUNK_SIZE = 16384
+
+# Couleur -> code = indice dans SOLVED_COLOURS ; 255 = caractère inconnu
+UNKNOWN_CODE = 255
+_COLOUR_CODES = np.full(256, UNKNOWN_CODE, dtype=np.uint8)
+for _code, _colour in enumerate(SOLVED_COLOURS):
+    _COLOUR_CODES[ord(_colour)] = _code
+_CODE_COLOURS = np.frombuffer(SOLVED_COLOURS.encode("ascii"), dtype=np.uint8)
+
+# Réorganisation de la face du bas faite par solve() (motif "032198765")
+SCAN_TO_SOLVER = np.array(list(range(27)) + [27, 30, 29, 28, 35, 34, 33, 32, 31])
+
+_MOVE_PERMS = np.array([MOVE_PERMUTATIONS[m] for m in MOVE_NAMES], dtype=np.intp)
+_INVERSE_CODES = np.array([MOVE_NAMES.index(INVERSE_MOVES[m]) for m in MOVE_NAMES], dtype=np.uint8)
+_ROTATE_ONCE = np.array(ROTATION_PERMUTATION, dtype=np.intp)
+_ROTATE_TWICE = _ROTATE_ONCE[_ROTATE_ONCE]
+
+# Noms affichés (format final de solve()) : tips u, u', r, ... puis coups de face,
+# le coup à jouer étant l'inverse du coup stocké. Jeton 0 = aucun coup.
+_TIP_NAMES = [letter + suffix for letter in "urlb" for suffix in ("", "'")]
+_OUTPUT_NAMES = [INVERSE_MOVES[m].replace("`", "'") for m in MOVE_NAMES]
+_TOKEN_BYTES = np.array(
+    [[0, 0, 0]] + [list(name.encode("ascii").ljust(2, b"\0") + b" ")
+                   for name in _TIP_NAMES + _OUTPUT_NAMES],
+    dtype=np.uint8)
+
+# Couleur canonique -> chiffre en base 4 du .bin (r=0, g=1, b=2, y=3, cf. engine.pack_state)
+_BASE4_OF_CODE = np.array(["rgby".index(c) for c in SOLVED_COLOURS], dtype=np.uint8)
+
+_FACTORIALS = [120, 24, 6, 2, 1, 1]
+
+
+def encode_states(states):
+    """Tableau (N, 36) de codes couleur, et masque des chaînes de bonne longueur."""
+    ok = np.array([len(s) == 36 for s in states], dtype=bool)
+    joined = "".join(s if len(s) == 36 else "?" * 36 for s in states)
+    raw = np.frombuffer(joined.encode("ascii", "replace"), dtype=np.uint8)
+    stickers = _COLOUR_CODES[raw].reshape(len(states), 36)
+    ok &= (stickers != UNKNOWN_CODE).all(axis=1)
+    return stickers, ok
+
+
+def decode_states(stickers):
+    """Opération inverse de encode_states (liste de chaînes de 36 chars)."""
+    raw = _CODE_COLOURS[stickers].tobytes().decode("ascii")
+    return [raw[i:i + 36] for i in range(0, len(raw), 36)]
+
+
+def orient_stickers(stickers):
+    """Auto-orientation du constructeur Pyraminx (rouge sur le centre avant ou bas)."""
+    red = SOLVED_COLOURS.index("r")
+    twice = (stickers[:, [7, 14, 34]] != red).all(axis=1)
+    once = ~twice & (stickers[:, [5, 25, 32]] != red).all(axis=1)
+    stickers[twice] = stickers[twice][:, _ROTATE_TWICE]
+    stickers[once] = stickers[once][:, _ROTATE_ONCE]
+    return stickers
+
+
+def _twists(stickers, positions, expected):
+    """Torsion (0, 1, 2) de chaque pièce, -1 si ses couleurs ne correspondent à aucune."""
+    got = stickers[:, positions]
+    twist = np.full(len(stickers), -1, dtype=np.int8)
+    for t in (2, 1, 0):
+        rotated = expected[:, [(i + t) % 3 for i in range(3)]]
+        twist[(got == rotated).all(axis=1)] = t
+    return twist
+
+
+def align_tips(stickers):
+    """
+    Aligne les tips sur leur centre (apply_tip_fixes, pour tout le lot).
+    Retourne les décalages (N, 4) dans l'ordre U, R, L, B : 2 = 'x', 1 = 'x`', 0 = rien,
+    -1 = tip impossible.
+    """
+    shifts = np.empty((len(stickers), len(TIPS)), dtype=np.int8)
+    for v, vertex in enumerate(TIPS):
+        centers = stickers[:, AXIAL_CENTERS[vertex]]
+        shifts[:, v] = _twists(stickers, TIPS[vertex], centers)
+        stickers[:, TIPS[vertex]] = centers
+    return shifts
+
+
+def canonicalise(stickers):
+    """
+    Renomme les couleurs de chaque état vers SOLVED_COLOURS (identify_orientation + to_canonical).
+    Retourne (stickers canoniques, masque des états dont l'orientation est valide).
+    """
+    n = len(stickers)
+    scheme = np.zeros((n, 4), dtype=np.int64)
+    ok = np.ones(n, dtype=bool)
+    for vertex, positions in AXIAL_CENTERS.items():
+        c = stickers[:, positions].astype(np.int64)
+        ok &= (c[:, 0] != c[:, 1]) & (c[:, 1] != c[:, 2]) & (c[:, 0] != c[:, 2]) & (c < 4).all(axis=1)
+        # Le centre touche 3 faces : la couleur absente (0+1+2+3 - somme) est celle d'en face
+        scheme[:, OPPOSITE_FACE[vertex]] = 6 - c.sum(axis=1)
+
+    ok &= (np.sort(scheme, axis=1) == np.arange(4)).all(axis=1)
+    # Seules les permutations paires des couleurs sont des orientations réelles (pas de miroir)
+    inversions = sum((scheme[:, i] > scheme[:, j]) for i in range(4) for j in range(i + 1, 4))
+    ok &= inversions % 2 == 0
+    scheme[~ok] = np.arange(4)
+
+    rows = np.arange(n)[:, None]
+    relabel = np.empty((n, 4), dtype=np.uint8)
+    relabel[rows, scheme] = np.arange(4, dtype=np.uint8)
+    return relabel[rows, np.minimum(stickers, 3)], ok
+
+
+def rank_stickers(canon):
+    """Rang parfait (rank_state) d'un lot d'états canoniques ; -1 pour les états invalides."""
+    n = len(canon)
+    ok = np.ones(n, dtype=bool)
+
+    # Arêtes : case (couleur a, couleur b) -> arête d'origine et retournement
+    slots = list(EDGES.values())
+    home_of = np.full(16, -1, dtype=np.int64)
+    flip_of = np.zeros(16, dtype=np.int64)
+    for home, (a, b) in enumerate(slots):
+        home_of[(a // 9) * 4 + b // 9], flip_of[(a // 9) * 4 + b // 9] = home, 0
+        home_of[(b // 9) * 4 + a // 9], flip_of[(b // 9) * 4 + a // 9] = home, 1
+
+    pairs = canon[:, [a for a, _ in slots]].astype(np.int64) * 4 + canon[:, [b for _, b in slots]]
+    perm = home_of[pairs]
+    flips = flip_of[pairs]
+    ok &= (np.sort(perm, axis=1) == np.arange(6)).all(axis=1)
+
+    # Rang lexicographique : chiffre i = nombre d'éléments plus petits à sa droite ;
+    # leur somme est le nombre d'inversions, donc donne aussi la parité
+    lex = np.zeros(n, dtype=np.int64)
+    inversions = np.zeros(n, dtype=np.int64)
+    for i in range(6):
+        digit = (perm[:, i + 1:] < perm[:, i:i + 1]).sum(axis=1)
+        lex += digit * _FACTORIALS[i]
+        inversions += digit
+    ok &= (inversions % 2 == 0) & (flips.sum(axis=1) % 2 == 0)
+
+    flip_coord = (flips[:, :5] << np.arange(5)).sum(axis=1)
+
+    center_coord = np.zeros(n, dtype=np.int64)
+    for positions in AXIAL_CENTERS.values():
+        expected = np.array([[p // 9 for p in positions]], dtype=np.uint8)
+        twist = _twists(canon, positions, expected).astype(np.int64)
+        ok &= twist >= 0
+        center_coord = center_coord * 3 + twist
+
+    ranks = ((lex >> 1) * N_EDGE_FLIPS + flip_coord) * N_CENTER_TWISTS + center_coord
+    ranks[~ok] = -1
+    return ranks
+
+
+def pack_stickers(canon):
+    """Clés de 9 octets du .bin (engine.pack_state) pour un lot d'états canoniques, (N, 9)."""
+    digits = _BASE4_OF_CODE[canon].reshape(len(canon), STATE_SIZE, 4)
+    return (digits[:, :, 0] << 6) | (digits[:, :, 1] << 4) | (digits[:, :, 2] << 2) | digits[:, :, 3]
+
+
+def table_codes(table, canon):
+    """Code de 4 bits (convention .rank : 0..7, START = 8, absent = 15) de chaque état."""
+    if isinstance(table, RankTable):
+        ranks = rank_stickers(canon)
+        valid = ranks >= 0
+        safe = np.where(valid, ranks, 0)
+        byte = np.asarray(table.codes[safe >> 1])
+        codes = np.where(safe & 1, byte >> 4, byte & 0x0F).astype(np.uint8)
+        codes[~valid] = RANK_EMPTY_CODE
+        return codes
+
+    packed = np.ascontiguousarray(pack_stickers(canon))
+    if isinstance(table, CompressedTable):
+        # .cbin : un bloc décompressé (ou lu dans le cache) par bloc touché par le lot
+        moves = table.find_many(packed)
+        codes = np.where(moves == START_CODE, RANK_START_CODE, moves).astype(np.uint8)
+        codes[codes > RANK_START_CODE] = RANK_EMPTY_CODE
+        return codes
+
+    # .bin : recherche dichotomique de tout le lot d'un coup
+    idx = np.searchsorted(table.keys, packed.view(f"S{STATE_SIZE}").ravel())
+    idx = np.minimum(idx, len(table) - 1)
+    # Comparaison sur les octets bruts (les valeurs 'S9' perdent leurs octets nuls de fin)
+    found_keys = table.entries.view(np.uint8).reshape(-1, STATE_SIZE + 1)[idx, :STATE_SIZE]
+    found = (found_keys == packed).all(axis=1)
+
+    moves = np.asarray(table.moves[idx])
+    codes = np.where(moves == START_CODE, RANK_START_CODE, moves).astype(np.uint8)
+    codes[~found | ((codes > RANK_START_CODE))] = RANK_EMPTY_CODE
+    return codes
+
+
+def walk_many(table, canon, active, max_depth=MAX_PATH_LENGTH):
+    """
+    Remonte la table pour tout le lot à la fois (RankTable/BFSTable.walk vectorisé).
+    Retourne (coups stockés (N, profondeur max), profondeur, masque des états résolus).
+    """
+    n = len(canon)
+    active = active.copy()
+    found = np.zeros(n, dtype=bool)
+    depth = np.zeros(n, dtype=np.int64)
+    steps = []
+
+    current = canon.copy()
+    for step in range(max_depth + 1):
+        rows = np.flatnonzero(active)
+        if len(rows) == 0:
+            break
+        codes = table_codes(table, current[rows])
+
+        done = codes == RANK_START_CODE
+        found[rows[done]] = True
+        depth[rows[done]] = step
+        active[rows[codes >= RANK_START_CODE]] = False
+
+        moving = rows[codes < RANK_START_CODE]
+        codes = codes[codes < RANK_START_CODE]
+        column = np.full(n, RANK_EMPTY_CODE, dtype=np.uint8)
+        column[moving] = codes
+        steps.append(column)
+        # Le coup stocké mène du parent à l'état : on applique son inverse
+        current[moving] = current[moving[:, None], _MOVE_PERMS[_INVERSE_CODES[codes]]]
+
+    moves = np.stack(steps, axis=1) if steps else np.zeros((n, 0), dtype=np.uint8)
+    return moves, depth, found
+
+
+def _sequences(shifts, moves, depth):
+    """
+    Séquences texte de tout le lot, sans boucle Python par coup : chaque coup devient
+    3 octets (nom complété par des octets nuls + espace), retirés en une seule passe.
+    """
+    n = len(shifts)
+    # Décalage 2 -> 'x' (jeton 2v + 1), décalage 1 -> "x'" (jeton 2v + 2)
+    tip_tokens = np.where(shifts > 0, 2 * np.arange(len(TIPS)) + 3 - shifts, 0)
+    played = np.arange(moves.shape[1]) < depth[:, None]
+    move_tokens = np.where(played, moves.astype(np.int64) + 1 + len(_TIP_NAMES), 0)
+
+    tokens = np.concatenate([tip_tokens, move_tokens], axis=1)
+    text = np.concatenate([_TOKEN_BYTES[tokens].reshape(n, -1),
+                           np.full((n, 1), ord("\n"), dtype=np.uint8)], axis=1)
+    blob = text.tobytes().replace(b"\0", b"").replace(b" \n", b"\n").decode("ascii")
+    return blob.split("\n")[:n], (tokens > 0).sum(axis=1).tolist()
+
+
+def solve_chunk(states, table, scan_order=True):
+    """
+    Résout un lot d'états avec une table déjà ouverte.
+    Retourne une liste de dicts (mêmes champs que /api/solve) dans l'ordre des états.
+    """
+    stickers, ok = encode_states(states)
+    if scan_order:
+        stickers = stickers[:, SCAN_TO_SOLVER]
+    orient_stickers(stickers)
+    shifts = align_tips(stickers)
+    fixed_states = decode_states(np.where(ok[:, None], stickers, 0).astype(np.uint8))
+    ok &= (shifts >= 0).all(axis=1)
+
+    canon, valid = canonicalise(stickers)
+    ok &= valid
+    ok &= rank_stickers(canon) >= 0
+    moves, depth, found = walk_many(table, canon, ok)
+    sequences, counts = _sequences(shifts, moves, depth)
+
+    results = []
+    for i, (state_ok, state_found) in enumerate(zip(ok.tolist(), found.tolist())):
+        if not state_ok:
+            results.append({"status": "impossible", "message": "État impossible"})
+        elif not state_found:
+            results.append({"status": "not_found", "message": "Aucune solution dans la table"})
+        else:
+            results.append({
+                "status": "solved", "sequence": sequences[i],
+                "move_count": counts[i], "fixed_state": fixed_states[i],
+            })
+    return results
+
+
+def iter_solutions(states, table_path, scan_order=True, chunk_size=BATCH_CHUNK_SIZE,
+                   engine=default_engine):
+    """
+    Résout une liste d'états (format de solve() si `scan_order`, sinon format interne).
+    Retourne un itérateur des résultats, dans l'ordre, calculés lot par lot.
+    Lève FileNotFoundError (immédiatement) si la table est absente.
+    """
+    if not os.path.exists(table_path):
+        raise FileNotFoundError(table_path)
+    table = engine.table(table_path)
+
+    def chunks():
+        for start in range(0, len(states), chunk_size):
+            yield from solve_chunk(states[start:start + chunk_size], table, scan_order)
+    return chunks()
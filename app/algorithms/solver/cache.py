@@ -0,0 +1,219 @@
+"""
+Cache LRU des solutions, devant solve().
+
+La clé est l'état canonique compressé (engine.pack_state) : couleurs renommées vers
+SOLVED_COLOURS, tips alignés, puis le plus petit des 12 états obtenus en tournant
+le puzzle entier. Un état, ses 11 recolorations et ses 11 rotations partagent donc
+la même entrée ; les coups sont renommés (U -> R, ...) à la lecture et à l'écriture.
+
+Chaque nouvelle solution est ajoutée à un journal texte (une ligne par solution) qui
+sert à réchauffer le cache au démarrage : les mélanges de démo reviennent en O(1).
+
+Les séquences du robot (planner.plan_robot_solution) ont leur propre entrée : leur durée
+dépend du moteur de chaque coup, donc ni rotation ni journal. La clé est l'état exact
+(couleurs renommées), les coups de tips et les paramètres du modèle de coût.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from itertools import permutations
+
+from .pyraminx import (MOVE_PERMUTATIONS, INVERSE_MOVES, AXIAL_CENTERS, TIPS, EDGES,
+                       OPPOSITE_FACE, permutation_parity)
+from .invariants import face_colours, to_canonical
+from .engine import pack_state
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+# --- ROTATIONS DU PUZZLE ENTIER ---
+
+def _sticker_labels():
+    """Chaque sticker décrit par (type de pièce, sommets de la pièce, face)."""
+    labels = [None] * 36
+    for kind, pieces in (("tip", TIPS), ("center", AXIAL_CENTERS), ("edge", EDGES)):
+        for vertices, positions in pieces.items():
+            for p in positions:
+                labels[p] = (kind, frozenset(vertices), p // 9)
+    return labels
+
+
+def _build_rotations():
+    """
+    Les 12 rotations (permutations paires des sommets), chacune sous forme de
+    (permutation des stickers au format de apply_move, renommage des coups).
+    """
+    labels = _sticker_labels()
+    position = {label: p for p, label in enumerate(labels)}
+    vertices = list(OPPOSITE_FACE)
+    face_vertex = {face: vertex for vertex, face in OPPOSITE_FACE.items()}
+
+    rotations = []
+    for image in permutations(vertices):
+        if permutation_parity([vertices.index(v) for v in image]):
+            continue
+        inverse = dict(zip(image, vertices))
+        # Le sticker qui arrive en p est celui de l'étiquette antécédente
+        perm = tuple(
+            position[(kind, frozenset(inverse[v] for v in piece),
+                      OPPOSITE_FACE[inverse[face_vertex[face]]])]
+            for kind, piece, face in labels
+        )
+        # Coup m' tel que tourner puis jouer m' = jouer m puis tourner
+        move_map = {}
+        for move, move_perm in MOVE_PERMUTATIONS.items():
+            after = tuple(move_perm[i] for i in perm)
+            for other, other_perm in MOVE_PERMUTATIONS.items():
+                if tuple(perm[i] for i in other_perm) == after:
+                    move_map[move] = other
+        rotations.append((perm, move_map))
+    return rotations
+
+
+ROTATIONS = _build_rotations()
+
+
+def canonical_key(state):
+    """
+    Clé (9 octets) d'un état canonique aux tips alignés, et indice de la rotation
+    qui mène à son représentant.
+    """
+    best = None
+    for index, (perm, _) in enumerate(ROTATIONS):
+        rotated = "".join([state[i] for i in perm])
+        candidate = to_canonical(rotated, face_colours(rotated))
+        if best is None or candidate < best[0]:
+            best = (candidate, index)
+    return pack_state(best[0]), best[1]
+
+
+# --- CACHE ---
+
+class SolutionCache:
+    """Cache LRU borné : clé canonique -> coups stockés (format PathResult) du représentant."""
+
+    def __init__(self, capacity=DEFAULT_CACHE_SIZE, journal_path=None):
+        self.capacity = capacity
+        self.journal_path = journal_path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.plan_hits = 0
+        self.plan_misses = 0
+        self._entries = OrderedDict()
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _insert(self, key, moves):
+        self._entries[key] = moves
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, state):
+        """Coups stockés pour cet état canonique (même format que PathResult.moves), ou None."""
+        key, rotation = canonical_key(state)
+        with self._lock:
+            moves = self._entries.get(key)
+            if moves is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        # Le représentant est l'état tourné : on ramène ses coups dans le repère du scan
+        move_map = ROTATIONS[rotation][1]
+        back = {image: move for move, image in move_map.items()}
+        return [back[m] for m in moves]
+
+    def put(self, state, moves):
+        """Mémorise la solution d'un état canonique et l'ajoute au journal."""
+        key, rotation = canonical_key(state)
+        move_map = ROTATIONS[rotation][1]
+        moves = [move_map[m] for m in moves]
+        with self._lock:
+            self._insert(key, moves)
+            if self.journal_path:
+                try:
+                    os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+                    with open(self.journal_path, "a") as f:
+                        f.write(f"{key.hex()} {' '.join(moves)}\n")
+                except OSError as e:
+                    print(f"Journal du cache inaccessible : {e}")
+
+    @staticmethod
+    def _plan_key(state, tip_tokens, model):
+        return pack_state(state), tuple(tip_tokens), json.dumps(model.to_dict(), sort_keys=True)
+
+    def get_plan(self, state, tip_tokens, model):
+        """(coups, durée estimée) déjà planifiés pour ce modèle de coût, ou None."""
+        key = self._plan_key(state, tip_tokens, model)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                self.plan_misses += 1
+                return None
+            self._plans.move_to_end(key)
+            self.plan_hits += 1
+        return list(plan[0]), plan[1]
+
+    def put_plan(self, state, tip_tokens, model, plan):
+        """Mémorise une séquence robot (coups, durée estimée), en mémoire seulement."""
+        key = self._plan_key(state, tip_tokens, model)
+        with self._lock:
+            self._plans[key] = (tuple(plan[0]), plan[1])
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.capacity:
+                self._plans.popitem(last=False)
+
+    def warm(self):
+        """
+        Recharge les dernières solutions du journal (les plus récentes restent en cache).
+        Le journal est réécrit sans doublons quand il dépasse deux fois la capacité.
+        """
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return 0
+
+        lines = 0
+        with self._lock:
+            with open(self.journal_path) as f:
+                for line in f:
+                    parts = line.split()
+                    try:
+                        key = bytes.fromhex(parts[0])
+                    except (IndexError, ValueError):
+                        continue
+                    if all(m in INVERSE_MOVES for m in parts[1:]):
+                        self._insert(key, parts[1:])
+                        lines += 1
+            # Le réchauffage ne compte pas comme des évictions en service
+            self.evictions = 0
+
+            if lines > 2 * self.capacity:
+                tmp_path = self.journal_path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    for key, moves in self._entries.items():
+                        f.write(f"{key.hex()} {' '.join(moves)}\n")
+                os.replace(tmp_path, self.journal_path)
+
+        print(f"Cache des solutions : {len(self._entries)} entrées rechargées du journal.")
+        return len(self._entries)
+
+    def stats(self):
+        """Compteurs pour le suivi (taille, hits, misses, evictions)."""
+        with self._lock:
+            return {
+                "size": len(self._entries), "capacity": self.capacity,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "plans": len(self._plans), "plan_hits": self.plan_hits, "plan_misses": self.plan_misses,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
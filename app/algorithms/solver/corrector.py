@@ -1,12 +1,31 @@
 import subprocess
 import os
 import platform
+import heapq
+
+import numpy as np
+
+from .invariants import (rank_orientations, repair_state, to_canonical, from_canonical,
+                         ORIENTATIONS, SOLVED_COLOURS)
+from .engine import default_engine, BFSTable, CompressedTable, STATE_SIZE
+from .nearest import (parse_target, part_distances, first_key, coordinate_log_likelihoods, coordinate_state,
+                      COLOR_CHARS, WILDCARDS)
 
 # --- CONFIGURATION DES CHEMINS ---
 # Adaptez 'flask_path' selon votre structure de dossiers
 flask_path = 'algorithms/solver' 
 bfs_dir = os.path.join(flask_path, "BFS")
 
+# Table unique : toutes les orientations y sont ramenées par renommage des couleurs.
+# get_corrected_state n'en a plus besoin (nearest.py) ; le parcours linéaire du .bin (C) ou
+# du .cbin (fuzzy_search_blocks) reste disponible comme référence.
+canonical_bin = os.path.join(bfs_dir, f"{SOLVED_COLOURS}.bin")
+canonical_cbin = os.path.join(bfs_dir, f"{SOLVED_COLOURS}.cbin")
+
+# Correction d'un scan (nearest_across_orientations, most_likely_states) : tips libres, comme
+# repair_state et apply_tip_fixes. Les entrées des tables (correct_many, C) ont leurs tips alignés.
+FREE_TIPS = True
+
 # Détection automatique de l'exécutable (Linux vs Windows)
 systeme = platform.system()
 engine_name = "corrector.exe" if systeme == "Windows" else "corrector"
@@ -33,29 +52,19 @@ def preprocess_bottom_face(scrambled):
     
     return top_faces + new_bottom
 
-def get_target_bin_filename(state):
+def get_candidate_orientations(state):
     """
-    Devine quel fichier .bin utiliser en regardant les CENTRES (Tips/Coins).
-    Sur un Pyraminx, les centres (indices 0, 9, 18, 27) déterminent la parité du fichier.
+    Détermine l'orientation (couleur de chaque face) à partir des invariants des CENTRES et TIPS.
+    Les centres axiaux ne bougent jamais de leur sommet : ils fixent la couleur des faces.
+    On ne garde que les orientations qui contredisent le moins de stickers (en général une
+    seule), les '?' ne comptant pas.
     """
-    # Indices des sommets (Tips) dans votre représentation string
-    # F(0), R(9), L(18), B(27)
-    try:
-        c1 = state[0]
-        c2 = state[9]
-        c3 = state[18]
-        c4 = state[27]
-        
-        # Si un des centres est inconnu '?', on ne peut pas deviner facilement le fichier.
-        # Dans ce cas, on renvoie None pour forcer un scan complet.
-        if '?' in [c1, c2, c3, c4]:
-            return None
-            
-        # Le nom du fichier est généralement la concaténation des couleurs des centres
-        # Ex: "rygb.bin"
-        return f"{c1}{c2}{c3}{c4}.bin"
-    except IndexError:
-        return None
+    if len(state) != 36:
+        return []
+
+    ranked = rank_orientations(state)
+    best = ranked[0][0]
+    return [code for conflicts, code in ranked if conflicts == best]
 
 def call_fuzzy_solver(bin_path, state_str):
     """Exécute le programme C pour un fichier donné."""
@@ -81,43 +90,409 @@ def call_fuzzy_solver(bin_path, state_str):
         print(f"Erreur exécution C: {e}")
         return None
 
-def get_corrected_state(raw_state_from_camera):
+# --- CORRECTION SUR TABLE COMPRESSÉE (.cbin) ---
+
+# Nombre de paires de bits non nulles (stickers différents) de chaque octet
+_STICKER_DIFFS = np.array([sum(1 for shift in (0, 2, 4, 6) if (byte >> shift) & 3)
+                           for byte in range(256)], dtype=np.uint8)
+
+
+def pack_target_with_mask(state_str):
+    """Comme pack_target_with_mask en C : (cible, masque) de 9 octets, masque à 0 sur les jokers."""
+    value = mask = 0
+    for c in state_str:
+        known = c not in WILDCARDS
+        value = (value << 2) | (COLOR_CHARS.index(c) if known and c in COLOR_CHARS else 0)
+        mask = (mask << 2) | (3 if known else 0)
+    return (np.frombuffer(value.to_bytes(STATE_SIZE, "big"), dtype=np.uint8),
+            np.frombuffer(mask.to_bytes(STATE_SIZE, "big"), dtype=np.uint8))
+
+
+def unpack_state(packed):
+    """Clé de 9 octets -> chaîne de 36 couleurs."""
+    return "".join(COLOR_CHARS[(byte >> shift) & 3] for byte in packed for shift in (6, 4, 2, 0))
+
+
+def fuzzy_search_blocks(cbin_path, state_str):
+    """
+    Équivalent de corrector_helper.c sur une table .cbin : état de la table le plus proche
+    (stickers différents hors jokers), le premier dans l'ordre des clés en cas d'égalité.
+    Les blocs sont décompressés un par un : la table entière n'est jamais en mémoire.
+    """
+    if not os.path.exists(cbin_path) or len(state_str) != 36:
+        return None
+
+    target, mask = pack_target_with_mask(state_str)
+    best = None
+    for keys, _ in default_engine.table(cbin_path).iter_blocks():
+        distances = _STICKER_DIFFS[(keys ^ target) & mask].sum(axis=1, dtype=np.int32)
+        i = int(np.argmin(distances))
+        if best is None or distances[i] < best[0]:
+            best = (int(distances[i]), keys[i].tobytes())
+            if best[0] == 0:
+                break
+    return unpack_state(best[1]) if best else None
+
+# --- CORRECTION PAR LOTS (archives de scans) ---
+
+# Une entrée de 10 octets vue comme deux mots : octets 0..7 de la clé, puis octet 8 + coup
+TABLE_WORDS = np.dtype([("hi", ">u8"), ("lo", ">u2")])
+# Bit de poids faible de chaque sticker (paire de bits)
+_STICKER_LSB = np.uint64(0x5555555555555555)
+_STICKER_LSB_LO = np.uint16(0x5500)
+
+# np.bitwise_count n'existe qu'à partir de NumPy 2.0 : sinon, table _STICKER_DIFFS par octet
+_BITWISE_COUNT = getattr(np, "bitwise_count", None)
+
+# Tranche de table (~320 Ko de mots, tient dans le cache L2) et nombre de scans traités ensemble
+CORRECTION_CHUNK = 32768
+CORRECTION_GROUP = 256
+
+
+def table_words(table):
+    """
+    Clés d'une table .bin (v2 ou ancienne) ou .cbin en deux tableaux natifs : (hi uint64, lo uint16),
+    l'octet du coup étant à zéro dans `lo`. Environ 9 Mo pour la table complète.
+    """
+    if isinstance(table, CompressedTable):
+        keys = np.concatenate([keys for keys, _ in table.iter_blocks()])
+        hi = np.ascontiguousarray(keys[:, :8]).view(">u8").ravel().astype(np.uint64)
+        return hi, keys[:, 8].astype(np.uint16) << 8
+    if not isinstance(table, BFSTable):
+        raise ValueError("La correction par lots demande une table .bin ou .cbin (clés stockées)")
+    words = np.asarray(table.entries).view(TABLE_WORDS)
+    return words["hi"].astype(np.uint64), words["lo"] & np.uint16(0xFF00)
+
+
+def target_words(state_str):
+    """Cible et masque de pack_target_with_mask, découpés comme table_words : (hi, masque hi, lo, masque lo)."""
+    target, mask = pack_target_with_mask(state_str)
+    return (np.uint64(int.from_bytes(target[:8].tobytes(), "big")), np.uint64(int.from_bytes(mask[:8].tobytes(), "big")),
+            np.uint16(int(target[8]) << 8), np.uint16(int(mask[8]) << 8))
+
+
+# Popcount SWAR sans bitwise_count : masques 0x33.., 0x0f.., 0x01.. et décalage final, par type de mot
+_SWAR = {np.dtype(np.uint64): tuple(np.uint64(v) for v in (0x3333333333333333, 0x0F0F0F0F0F0F0F0F,
+                                                          0x0101010101010101, 2, 4, 56)),
+         np.dtype(np.uint16): tuple(np.uint16(v) for v in (0x3333, 0x0F0F, 0x0101, 2, 4, 8))}
+
+
+def _count_stickers(diff, out):
+    """
+    Nombre de stickers différents de chaque mot de `diff` (au plus un bit à 1 par paire,
+    déjà replié), dans `out`. `diff` sert de tampon et est écrasé.
+    """
+    if _BITWISE_COUNT is not None:
+        _BITWISE_COUNT(diff, out=out)
+        return
+    # Paires déjà réduites à 0/1 : sommes par quartet, par octet, puis des octets (multiplication)
+    m2, m4, ones, two, four, top = _SWAR[diff.dtype]
+    np.add(diff & m2, (diff >> two) & m2, out=diff)
+    diff += diff >> four
+    diff &= m4
+    diff *= ones
+    np.right_shift(diff, top, out=diff)
+    out[...] = diff
+
+
+def _scan_distances(hi, lo, targets):
+    """
+    Distance minimale, indice du premier état à cette distance et nombre d'ex aequo pour chaque
+    cible de `targets` (target_words). La table est parcourue par tranches de CORRECTION_CHUNK
+    entrées, chacune traitée pour toutes les cibles pendant qu'elle est dans le cache.
+    """
+    best = np.full(len(targets), 255, dtype=np.int64)
+    first = np.zeros(len(targets), dtype=np.int64)
+    ties = np.zeros(len(targets), dtype=np.int64)
+
+    # Tampons réutilisés : aucune allocation dans la boucle
+    diff_hi, diff_lo = np.empty(CORRECTION_CHUNK, dtype=np.uint64), np.empty(CORRECTION_CHUNK, dtype=np.uint16)
+    distances, count_lo = np.empty(CORRECTION_CHUNK, dtype=np.uint8), np.empty(CORRECTION_CHUNK, dtype=np.uint8)
+
+    for start in range(0, len(hi), CORRECTION_CHUNK):
+        chunk_hi, chunk_lo = hi[start:start + CORRECTION_CHUNK], lo[start:start + CORRECTION_CHUNK]
+        n = len(chunk_hi)
+        for q, (target_hi, mask_hi, target_lo, mask_lo) in enumerate(targets):
+            for words, target, mask, diff, lsb, out in (
+                    (chunk_hi, target_hi, mask_hi, diff_hi[:n], _STICKER_LSB, distances[:n]),
+                    (chunk_lo, target_lo, mask_lo, diff_lo[:n], _STICKER_LSB_LO, count_lo[:n])):
+                np.bitwise_xor(words, target, out=diff)
+                diff &= mask
+                # Un sticker différent a au moins un de ses deux bits à 1 : replié sur le bit faible
+                diff |= diff >> 1
+                diff &= lsb
+                _count_stickers(diff, out)
+            chunk_distances = distances[:n]
+            chunk_distances += count_lo[:n]
+
+            i = int(chunk_distances.argmin())
+            distance = int(chunk_distances[i])
+            if distance < best[q]:
+                best[q], first[q] = distance, start + i
+                ties[q] = np.count_nonzero(chunk_distances == distance)
+            elif distance == best[q]:
+                ties[q] += np.count_nonzero(chunk_distances == distance)
+    return best, first, ties
+
+
+def correct_many(states, table_path, engine=default_engine, canonical=False):
+    """
+    Corrige des milliers de scans contre une table .bin ou .cbin, sans sous-processus : XOR
+    avec la cible, masque des jokers ('?', '.', '_'), puis un popcount des stickers différents
+    sur toute la table.
+    Les scans sont bruts, comme pour get_corrected_state (ordre caméra, couleurs réelles) :
+    face du bas réordonnée, couleurs renommées pour chaque orientation candidate des centres,
+    et la meilleure est retenue. Avec `canonical`, ils sont déjà dans l'ordre du solveur et
+    aux couleurs de la table ; un scan dont les centres désignent une autre orientation est
+    alors refusé.
+    Retourne, dans l'ordre, des dicts {state, distance, ties, orientation} : état aux couleurs
+    du scan, ordre du solveur, même état que corrector_helper.c sur le scan renommé (le premier
+    dans l'ordre des clés), `ties` = nombre d'états de la table à cette distance.
+    Un scan de longueur incorrecte (ou refusé) donne {state: None}. Lève FileNotFoundError si
+    la table est absente.
+    """
+    if not os.path.exists(table_path):
+        raise FileNotFoundError(table_path)
+    table = engine.table(table_path)
+
+    # Les archives contiennent beaucoup de scans identiques : chacun n'est calculé qu'une fois.
+    # Scan -> [(orientation, cible canonique)], dans l'ordre de get_candidate_orientations
+    candidates = {}
+    for state_str in dict.fromkeys(s for s in states if len(s) == 36):
+        if canonical:
+            if SOLVED_COLOURS in get_candidate_orientations(state_str):
+                candidates[state_str] = [(SOLVED_COLOURS, state_str)]
+        else:
+            adapted = preprocess_bottom_face(state_str)
+            candidates[state_str] = [(code, to_canonical(adapted, code))
+                                     for code in get_candidate_orientations(adapted)]
+
+    found, pending = {}, []
+    for target in dict.fromkeys(t for options in candidates.values() for _, t in options):
+        # Scan complet et valide : présent tel quel dans la table, distance 0 et unique
+        if not any(c in WILDCARDS for c in target):
+            packed = pack_target_with_mask(target)[0].tobytes()
+            if table.find(packed) is not None:
+                found[target] = (unpack_state(packed), 0, 1)
+                continue
+        pending.append(target)
+
+    if pending:
+        hi, lo = table_words(table)
+        for group in range(0, len(pending), CORRECTION_GROUP):
+            targets = pending[group:group + CORRECTION_GROUP]
+            best, first, ties = _scan_distances(hi, lo, [target_words(t) for t in targets])
+            for target, distance, i, count in zip(targets, best, first, ties):
+                packed = int(hi[i]).to_bytes(8, "big") + bytes([int(lo[i]) >> 8])
+                found[target] = (unpack_state(packed), int(distance), int(count))
+
+    results = {}
+    for state_str, options in candidates.items():
+        best = None
+        for code, target in options:
+            corrected, distance, count = found[target]
+            if best is None or distance < best["distance"]:
+                best = {"state": from_canonical(corrected, code), "distance": distance,
+                        "ties": count, "orientation": code}
+            elif distance == best["distance"]:
+                # Orientations ex aequo : leurs états comptent parmi les égalités
+                best["ties"] += count
+        if best is not None:
+            results[state_str] = best
+
+    return [dict(results[s]) if s in results else {"state": None, "distance": None, "ties": 0, "orientation": None}
+            for s in states]
+
+# --- DÉCODAGE AU MAXIMUM DE VRAISEMBLANCE (probabilités du scan) ---
+
+# Plancher des probabilités : une lecture « certaine » mais fausse reste corrigible
+MIN_PROBABILITY = 1e-4
+DEFAULT_TOP_K = 5
+
+# Position (ordre caméra) de chaque sticker dans l'ordre du solveur (preprocess_bottom_face)
+_SCAN_ORDER = [ord(c) - 48 for c in preprocess_bottom_face("".join(chr(48 + i) for i in range(36)))]
+
+
+def _top(scores, k):
+    """Indices des k meilleurs scores, du meilleur au moins bon."""
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def most_likely_states(probabilities, k=DEFAULT_TOP_K, stats=None):
+    """
+    Les k états valides les plus vraisemblables pour un scan donné en probabilités :
+    `probabilities` (36, 4), ordre caméra (comme get_corrected_state), colonnes COLOR_CHARS.
+    Retourne des dicts {state, log_likelihood, orientation}, le meilleur en tête, états au
+    format de get_corrected_state.
+
+    Pour chacune des 12 orientations, la log-vraisemblance d'un état valide est la somme
+    d'une part « arêtes » et d'une part « centres » (nearest.py) : seuls les k meilleurs de
+    chaque part peuvent entrer dans le top k. Séparation et évaluation : les orientations sont
+    visitées par borne décroissante, et une branche est abandonnée dès qu'elle ne peut plus
+    battre le k-ième meilleur score trouvé.
+    Si `stats` (dict) est fourni, il reçoit `orientations_pruned`, `candidates` (états évalués)
+    et `margin` (écart de log-vraisemblance entre les deux premiers).
+    """
+    if stats is None:
+        stats = {}
+    probs = np.maximum(np.asarray(probabilities, dtype=np.float64), MIN_PROBABILITY)
+    if probs.shape != (36, len(COLOR_CHARS)):
+        raise ValueError("Probabilités attendues : 36 stickers x 4 couleurs")
+    log_probs = np.log(probs / probs.sum(axis=1, keepdims=True))[_SCAN_ORDER]
+
+    branches = []
+    for code in ORIENTATIONS:
+        # Chiffre canonique -> colonne de la couleur du scan qui lui correspond
+        columns = [COLOR_CHARS.index(from_canonical(c, code)) for c in COLOR_CHARS]
+        edge_ll, center_ll = coordinate_log_likelihoods(log_probs[:, columns], FREE_TIPS)
+        top_edges, top_centers = _top(edge_ll, k), _top(center_ll, k)
+        bound = float(edge_ll[top_edges[0]] + center_ll[top_centers[0]])
+        branches.append((bound, code, edge_ll, top_edges, center_ll, top_centers))
+    branches.sort(key=lambda branch: -branch[0])
+
+    # k meilleurs trouvés, le moins bon en tête : (score, -ordre d'arrivée, orientation, arêtes, centres)
+    best, order = [], 0
+    stats["orientations_pruned"], stats["candidates"] = 0, 0
+    for visited, (bound, code, edge_ll, top_edges, center_ll, top_centers) in enumerate(branches):
+        if len(best) == k and bound <= best[0][0]:
+            # Bornes décroissantes : aucune orientation suivante ne peut mieux faire
+            stats["orientations_pruned"] = len(branches) - visited
+            break
+        for e in top_edges:
+            if len(best) == k and edge_ll[e] + center_ll[top_centers[0]] <= best[0][0]:
+                break
+            for c in top_centers:
+                score = float(edge_ll[e] + center_ll[c])
+                if len(best) == k and score <= best[0][0]:
+                    break
+                stats["candidates"] += 1
+                item = (score, -order, code, int(e), int(c))
+                order += 1
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                else:
+                    heapq.heapreplace(best, item)
+
+    ranked = sorted(best, reverse=True)
+    stats["margin"] = round(ranked[0][0] - ranked[1][0], 4) if len(ranked) > 1 else None
+    return [{"state": from_canonical(coordinate_state(e, c, FREE_TIPS), code),
+             "log_likelihood": round(score, 4), "orientation": code}
+            for score, _, code, e, c in ranked]
+
+
+# Chiffre canonique (COLOR_CHARS) de chaque chiffre lu, par orientation ; le 5e (couleur
+# inconnue) vaut 'r' comme dans to_canonical puis parse_target
+_ORIENTATION_DIGITS = np.array([[COLOR_CHARS.index(to_canonical(c, code)) for c in COLOR_CHARS] + [0]
+                                for code in ORIENTATIONS], dtype=np.uint8)
+
+
+def nearest_across_orientations(state, stats=None):
+    """
+    État valide le plus proche du scan (ordre solveur) parmi les 12 orientations, et non
+    seulement celles que désignent les centres : un centre mal lu ne fait plus manquer la
+    bonne. Retourne (état, distance) aux couleurs du scan, ou None si la chaîne est invalide.
+
+    La distance d'une orientation est « arêtes » + « centres » (nearest.py, tips libres comme
+    repair_state : un scan « partial » a toujours une complétion à distance 0). Les coordonnées
+    des centres se calculent pour les 12 orientations en une passe : leur minimum borne
+    l'orientation entière. Les orientations sont visitées par borne croissante et la borne
+    partagée est la distance du second meilleur état trouvé : dès qu'une borne l'atteint, ni le
+    meilleur ni le second ne peuvent plus changer et les suivantes sont abandonnées.
+    Si `stats` (dict) est fourni, il reçoit `tables_probed` (orientations dont les arêtes ont
+    été calculées), `orientations_pruned`, `orientation`, `distance` et `margin` (distance du
+    second meilleur état moins celle du meilleur : 0 signale une correction ambiguë).
+    """
+    if stats is None:
+        stats = {}
+    if len(state) != 36:
+        return None
+
+    # Chiffres canoniques du scan dans chaque orientation, puis bornes « centres » des 12 en une passe
+    digits, known = parse_target(state)
+    digits[[c not in COLOR_CHARS for c in state]] = len(COLOR_CHARS)
+    digits = _ORIENTATION_DIGITS[:, digits]
+    all_center_distances = part_distances(digits, known, 1, FREE_TIPS)
+    bounds = all_center_distances.min(axis=1)
+    # À borne égale, ordre de ORIENTATIONS : départage les égalités de distance
+    branches = [(int(bounds[i]), i, ORIENTATIONS[i], digits[i], known, all_center_distances[i])
+                for i in np.argsort(bounds, kind="stable")]
+
+    # Deux plus petites distances trouvées (meilleur, second) et le meilleur état
+    top, best = [np.inf, np.inf], None
+    stats["tables_probed"], stats["orientations_pruned"] = 0, 0
+    for visited, (bound, _, code, digits, known, center_distances) in enumerate(branches):
+        if bound >= top[1]:
+            stats["orientations_pruned"] = len(branches) - visited
+            break
+        stats["tables_probed"] += 1
+        edge_distances = part_distances(digits, known, 0, FREE_TIPS)
+        e1, e2 = np.partition(edge_distances, 1)[:2].astype(int)
+        c1, c2 = np.partition(center_distances, 1)[:2].astype(int)
+        if e1 + c1 < top[0]:
+            best = (code, edge_distances, center_distances)
+        # Second meilleur état de l'orientation : une seule des deux parts cède sa meilleure valeur
+        top = sorted(top + [e1 + c1, min(e1 + c2, e2 + c1)])[:2]
+
+    code, edge_distances, center_distances = best
+    edge_best, center_best = edge_distances.min(), center_distances.min()
+    edge_coord, center_coord = first_key(np.flatnonzero(edge_distances == edge_best),
+                                         np.flatnonzero(center_distances == center_best), FREE_TIPS)
+    stats["orientation"], stats["distance"] = code, int(top[0])
+    stats["margin"] = int(top[1] - top[0])
+    return from_canonical(coordinate_state(edge_coord, center_coord, FREE_TIPS), code), int(top[0])
+
+
+def get_corrected_state(raw_state_from_camera, stats=None):
     """
     FONCTION PRINCIPALE
     1. Adapte l'ordre de la face du bas.
-    2. Trouve le bon fichier .bin.
-    3. Appelle le correcteur C.
-    4. Retourne l'état propre.
+    2. Répare le scan par les contraintes des pièces (repair_state) : un scan complet ou dont
+       les '?' sont tous déduits est retourné tout de suite.
+    3. Sinon (trous non déduits, ou sticker mal lu qui contredit les contraintes), cherche
+       l'état valide le plus proche sur toutes les orientations (nearest_across_orientations,
+       en mémoire, arrêt anticipé par borne partagée).
+    4. Retourne l'état propre (None si la chaîne ne fait pas 36 caractères).
+    Si `stats` (dict) est fourni, il reçoit l'issue de la réparation (`repair`, et `reason` si
+    des contraintes sont violées), puis, après une recherche, les statistiques de
+    nearest_across_orientations (`tables_probed`, `orientations_pruned`, `orientation`,
+    `distance` et `margin`).
     """
-    
+    if stats is None:
+        stats = {}
+    stats["tables_probed"] = 0
+
     # 1. Adaptation de l'ordre (Mapping caméra -> Solver)
     # Si votre scan est déjà dans le bon ordre, commentez cette ligne.
     adapted_state = preprocess_bottom_face(raw_state_from_camera)
-    
-    # 2. Identification du fichier cible
-    target_filename = get_target_bin_filename(adapted_state)
-    
-    files_to_check = []
-    
-    if target_filename:
-        # Si on a deviné le fichier, on le teste en PREMIER
-        files_to_check.append(os.path.join(bfs_dir, target_filename))
-    
-    # On ajoute TOUS les autres fichiers au cas où (si la détection des centres était fausse)
-    all_bins = [os.path.join(bfs_dir, f) for f in os.listdir(bfs_dir) if f.endswith('.bin')]
-    for f in all_bins:
-        if f not in files_to_check:
-            files_to_check.append(f)
-
-    # 3. Scan des fichiers
-    for bin_file in files_to_check:
-        corrected = call_fuzzy_solver(bin_file, adapted_state)
-        
-        if corrected:
-            print(f"✓ État trouvé et corrigé via {os.path.basename(bin_file)}")
-            return corrected
 
-    print("X Impossible de corriger l'état (trop d'erreurs ou fichier manquant)")
+    # 2. Contraintes des pièces : les cas courants s'arrêtent ici, sans aucune recherche
+    adapted_state, stats["repair"], reason = repair_state(adapted_state)
+    if stats["repair"] == "impossible":
+        stats["reason"] = reason
+        if len(adapted_state) != 36:
+            print(f"X Scan impossible : {reason}")
+            return None
+        # Sticker mal lu : la recherche ci-dessous trouve l'état valide le plus proche
+        print(f"Scan incohérent ({reason}), correction par l'état le plus proche")
+    elif stats["repair"] in ("valid", "repaired"):
+        stats["distance"] = 0
+        print(f"✓ État {'valide' if stats['repair'] == 'valid' else 'complété par les contraintes'}")
+        return adapted_state
+
+    # 3. État valide le plus proche sur toutes les orientations, sans parcourir de table
+    found = nearest_across_orientations(adapted_state, stats)
+    if found:
+        corrected, distance = found
+        ambiguity = " ambigu" if stats["margin"] == 0 else ""
+        print(f"✓ État trouvé et corrigé (orientation {stats['orientation']}, {distance} sticker(s) "
+              f"corrigé(s), marge {stats['margin']}{ambiguity})")
+        return corrected
+
+    print("X Impossible de corriger l'état (scan incomplet ou orientation introuvable)")
     return None
 
 '''
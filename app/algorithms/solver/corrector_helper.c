@@ -22,6 +22,28 @@ typedef struct {
 const char* MOVE_NAMES[] = { "U", "U'", "R", "R'", "L", "L'", "B", "B'" };
 const char COLOR_CHARS[] = "rgby";
 
+/* Tables v2 (voir engine.py) : en-tête de 64 octets (magic, ..., nombre d'entrées à
+   l'octet 20, position des entrées à l'octet 48), index épars, puis les entrées.
+   Les anciens fichiers (entrées brutes) sont lus tels quels. */
+#define TABLE_MAGIC "PYRBFS2\n"
+#define TABLE_HEADER_SIZE 64
+
+size_t table_data_offset(const uint8_t *raw, size_t size, size_t *num_entries) {
+    if (size < TABLE_HEADER_SIZE || memcmp(raw, TABLE_MAGIC, 8) != 0) {
+        *num_entries = size / ENTRY_SIZE;
+        return 0;
+    }
+    uint64_t count = 0, offset = 0;
+    for (int i = 3; i >= 0; i--) count = (count << 8) | raw[20 + i];
+    for (int i = 7; i >= 0; i--) offset = (offset << 8) | raw[48 + i];
+    if (offset + count * ENTRY_SIZE > size) {
+        *num_entries = 0;
+        return 0;
+    }
+    *num_entries = (size_t) count;
+    return (size_t) offset;
+}
+
 // Reconvertit les bits en texte (rgby...)
 void unpack_state(const uint8_t* packed, char* output) {
     for (int i = 0; i < 9; i++) {
@@ -109,18 +131,19 @@ int main(int argc, char *argv[]) {
     if (fstat(fd, &sb) == -1) { close(fd); return 1; }
     void *map = mmap(0, sb.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
     if (map == MAP_FAILED) { close(fd); return 1; }
-    entries = (Entry*) map;
-    num_entries = sb.st_size / ENTRY_SIZE;
+    size_t data_offset = table_data_offset((const uint8_t*) map, sb.st_size, &num_entries);
+    entries = (Entry*) ((uint8_t*) map + data_offset);
 #else
     FILE *f = fopen(filename, "rb");
     if (!f) return 1;
     fseek(f, 0, SEEK_END);
     long size = ftell(f);
     fseek(f, 0, SEEK_SET);
-    num_entries = size / ENTRY_SIZE;
-    entries = malloc(size);
-    fread(entries, ENTRY_SIZE, num_entries, f);
+    uint8_t *raw = malloc(size);
+    fread(raw, 1, size, f);
     fclose(f);
+    size_t data_offset = table_data_offset(raw, size, &num_entries);
+    entries = (Entry*) (raw + data_offset);
 #endif
 
     // --- PRÉPARATION ---
@@ -161,10 +184,10 @@ int main(int argc, char *argv[]) {
 
     // --- NETTOYAGE ---
 #ifndef _WIN32
-    munmap(entries, num_entries * ENTRY_SIZE);
+    munmap(map, sb.st_size);
     close(fd);
 #else
-    free(entries);
+    free(raw);
 #endif
 
     return 0;
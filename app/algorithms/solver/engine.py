@@ -0,0 +1,574 @@
+"""
+Moteur de résolution résident.
+
+Remplace l'appel `sudo fast_solver <bin> <etat>` (un processus + un mmap par coup)
+par des tables BFS ouvertes une seule fois en mémoire (np.memmap) et interrogées
+directement depuis le processus Flask.
+Deux formats sont lus :
+- `.bin`  : celui de `generateBFS.convert_to_binary_for_c` (entrées triées de 10 octets :
+            9 octets d'état compressé + 1 octet de mouvement), recherche dichotomique ;
+- `.rank` : celui de `generateBFS.convert_to_rank_table`, un tableau dense de codes de
+            4 bits indexé par le rang parfait de l'état (pyraminx.rank_state), accès O(1) ;
+- `.cbin` : celui de `generateBFS.convert_to_compressed_table`, les entrées d'un .bin
+            compressées par blocs (écarts entre clés + zlib), décompressés à la demande.
+Les `.bin` v2 (generateBFS.SortedTableWriter) ont un en-tête auto-descriptif ; les
+anciens `.bin` sans en-tête restent lus tels quels.
+
+Contrôle d'une table : python -m algorithms.solver.engine verify BFS/rygb.bin [...]
+"""
+import os
+import sys
+import struct
+import threading
+import zlib
+from bisect import bisect_right
+from collections import namedtuple, OrderedDict
+
+import numpy as np
+
+from .pyraminx import (PackedState, INVERSE_MOVES, N_STATES, rank_state,
+                       apply_move_to_rank)
+
+# Même format que solver_helper.c (Entry = 9 octets d'état + 1 octet de mouvement)
+ENTRY_SIZE = 10
+STATE_SIZE = 9
+ENTRY_DTYPE = np.dtype([("state", f"S{STATE_SIZE}"), ("move", "u1")])
+
+# Mêmes codes que generateBFS.MOVE_MAP / solver_helper.c
+MOVE_NAMES = ["U", "U`", "R", "R`", "L", "L`", "B", "B`"]
+START_CODE = 255
+# Code renvoyé par les recherches par lots pour une clé absente de la table
+MISSING_CODE = 254
+
+# Codes de 4 bits des tables .rank : 0..7 = MOVE_NAMES, 8 = START, 15 = état absent
+RANK_START_CODE = 8
+RANK_EMPTY_CODE = 15
+RANK_TABLE_SIZE = (N_STATES + 1) // 2
+_INVERSE_CODES = [MOVE_NAMES.index(INVERSE_MOVES[m]) for m in MOVE_NAMES]
+
+# Sécurité : aucune solution optimale ne dépasse 11 coups (hors tips)
+MAX_PATH_LENGTH = 50
+
+# Résultat d'une remontée complète : status = FOUND, NOT_FOUND, FILE_NOT_FOUND ou ERROR
+PathResult = namedtuple("PathResult", ["status", "moves", "depth"])
+
+# Couleur -> chiffre en base 4 (r=0, g=1, b=2, y=3), comme COLOR_MAP de generateBFS
+_BASE4_DIGITS = {"r": "0", "g": "1", "b": "2", "y": "3"}
+_BASE4_TABLE = str.maketrans(_BASE4_DIGITS)
+
+
+# --- FORMAT V2 DES TABLES .bin ---
+# En-tête de 64 octets (petit-boutiste), index épars (la clé d'une entrée sur
+# TABLE_INDEX_STRIDE), puis les entrées de 10 octets à partir d'une page (mmap) :
+#   magic, version, taille d'entrée, orientation (couleur de chaque face), couleurs des
+#   chiffres base 4, nombre d'entrées, profondeur max, CRC32 des entrées, pas de l'index,
+#   nombre de clés de l'index, position de l'index, position des entrées.
+TABLE_MAGIC = b"PYRBFS2\n"
+TABLE_VERSION = 2
+TABLE_HEADER = struct.Struct("<8sHH4s4sIIIIIQQ")
+TABLE_HEADER_SIZE = 64
+TABLE_INDEX_STRIDE = 1024
+PAGE_SIZE = 4096
+
+TableHeader = namedtuple("TableHeader", [
+    "version", "orientation", "colour_map", "count", "max_depth", "checksum",
+    "index_stride", "index_count", "index_offset", "data_offset",
+])
+
+
+def table_data_offset(count, index_stride=TABLE_INDEX_STRIDE):
+    """Position (alignée sur une page) des entrées d'une table v2 de `count` entrées."""
+    index_count = -(-count // index_stride)
+    end = TABLE_HEADER_SIZE + index_count * STATE_SIZE
+    return -(-end // PAGE_SIZE) * PAGE_SIZE
+
+
+def table_header_bytes(orientation, count, max_depth, checksum, index_keys,
+                       index_stride=TABLE_INDEX_STRIDE):
+    """En-tête + index d'une table v2, complétés jusqu'au début des entrées."""
+    colour_map = "".join(sorted(_BASE4_DIGITS, key=_BASE4_DIGITS.get))
+    data_offset = table_data_offset(count, index_stride)
+    header = TABLE_HEADER.pack(
+        TABLE_MAGIC, TABLE_VERSION, ENTRY_SIZE, orientation.encode("ascii"),
+        colour_map.encode("ascii"), count, max_depth, checksum,
+        index_stride, len(index_keys), TABLE_HEADER_SIZE, data_offset,
+    )
+    head = header.ljust(TABLE_HEADER_SIZE, b"\x00") + b"".join(index_keys)
+    return head.ljust(data_offset, b"\x00")
+
+
+def read_table_header(bin_path):
+    """En-tête d'une table v2, ou None pour un ancien .bin (entrées brutes)."""
+    with open(bin_path, "rb") as f:
+        head = f.read(TABLE_HEADER_SIZE)
+    if len(head) < TABLE_HEADER_SIZE or not head.startswith(TABLE_MAGIC):
+        return None
+    fields = TABLE_HEADER.unpack_from(head)
+    if fields[2] != ENTRY_SIZE:
+        raise ValueError(f"Taille d'entrée inattendue : {bin_path} ({fields[2]} octets)")
+    return TableHeader(fields[1], fields[3].decode("ascii"), fields[4].decode("ascii"), *fields[5:])
+
+
+def pack_state(state_str):
+    """Compresse 36 chars en 9 bytes (2 bits par char), identique à pack_state en C."""
+    try:
+        packed_int = int(state_str.translate(_BASE4_TABLE), 4)
+    except ValueError:
+        # Caractère inconnu : le C le code comme 'r' (0), on fait pareil
+        packed_int = int("".join(_BASE4_DIGITS.get(c, "0") for c in state_str), 4)
+    return packed_int.to_bytes(STATE_SIZE, byteorder="big")
+
+
+class BFSTable:
+    """Une table .bin projetée en mémoire, interrogée par recherche dichotomique."""
+
+    def __init__(self, bin_path):
+        self.path = bin_path
+        size = os.path.getsize(bin_path)
+        self.header = read_table_header(bin_path)
+        self.index = None
+
+        if self.header is None:
+            # Ancien format : uniquement des entrées
+            if size == 0 or size % ENTRY_SIZE != 0:
+                raise ValueError(f"Fichier corrompu : {bin_path} ({size} octets)")
+            offset, count = 0, size // ENTRY_SIZE
+        else:
+            header = self.header
+            if header.version != TABLE_VERSION:
+                raise ValueError(f"Version de table non gérée : {bin_path} (v{header.version})")
+            if header.count == 0 or header.data_offset + header.count * ENTRY_SIZE != size:
+                raise ValueError(f"Fichier corrompu : {bin_path} ({size} octets)")
+            offset, count = header.data_offset, header.count
+            # Index épars chargé en RAM (8 Ko), en liste de clés pour bisect (pas de conversion NumPy)
+            with open(bin_path, "rb") as f:
+                f.seek(header.index_offset)
+                raw = f.read(header.index_count * STATE_SIZE)
+            self.index = [raw[i:i + STATE_SIZE] for i in range(0, len(raw), STATE_SIZE)]
+
+        self.entries = np.memmap(bin_path, dtype=ENTRY_DTYPE, mode="r", offset=offset, shape=(count,))
+        # Vues ndarray simples : découper une sous-classe memmap coûte plus que la recherche
+        self.keys = np.asarray(self.entries["state"])
+        self.moves = np.asarray(self.entries["move"])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def find(self, packed):
+        """Retourne le code du mouvement stocké pour un état compressé, ou None."""
+        if self.index is None:
+            i = int(np.searchsorted(self.keys, packed))
+        else:
+            # L'index épars (8 Ko, toujours en cache) désigne le bloc : seuls ses 10 Ko sont lus
+            stride = self.header.index_stride
+            start = max(bisect_right(self.index, packed) - 1, 0) * stride
+            i = start + int(np.searchsorted(self.keys[start:start + stride], packed))
+        # NumPy retire les octets nuls de fin des valeurs 'S9' : on compare sans eux
+        if i < len(self.keys) and self.keys[i] == packed.rstrip(b"\x00"):
+            return int(self.moves[i])
+        return None
+
+    def lookup(self, state_str):
+        """Même réponse texte que le programme C (START, U, U`, ..., NOT_FOUND)."""
+        code = self.find(pack_state(state_str))
+        if code is None:
+            return "NOT_FOUND"
+        if code == START_CODE:
+            return "START"
+        if code < len(MOVE_NAMES):
+            return MOVE_NAMES[code]
+        return "UNKNOWN_MOVE"
+
+    def walk(self, state_str, max_depth=MAX_PATH_LENGTH):
+        """
+        Suit la chaîne des coups parents jusqu'à START, entièrement dans le moteur.
+        Retourne (coups, profondeur) avec les noms de la table, ou None si la chaîne casse.
+        """
+        moves = []
+        current = PackedState.from_string(state_str)
+        for _ in range(max_depth + 1):
+            code = self.find(current.pack())
+            if code == START_CODE:
+                return moves, len(moves)
+            if code is None or code >= len(MOVE_NAMES):
+                return None
+
+            move = MOVE_NAMES[code]
+            moves.append(move)
+            # Le coup stocké mène du parent à l'état : on applique son inverse
+            current = current.move(INVERSE_MOVES[move])
+        return None
+
+
+class RankTable:
+    """Une table .rank projetée en mémoire : deux codes de 4 bits par octet."""
+
+    def __init__(self, rank_path):
+        self.path = rank_path
+        size = os.path.getsize(rank_path)
+        if size != RANK_TABLE_SIZE:
+            raise ValueError(f"Fichier corrompu : {rank_path} ({size} octets)")
+
+        self.codes = np.memmap(rank_path, dtype=np.uint8, mode="r")
+
+    def __len__(self):
+        return N_STATES
+
+    def code(self, rank):
+        """Code de 4 bits du rang `rank` (rang pair = 4 bits de poids faible)."""
+        byte = int(self.codes[rank >> 1])
+        return byte >> 4 if rank & 1 else byte & 0x0F
+
+    def lookup(self, state_str):
+        """Même réponse texte que le programme C (START, U, U`, ..., NOT_FOUND)."""
+        rank = rank_state(state_str)
+        if rank is None:
+            return "NOT_FOUND"
+        code = self.code(rank)
+        if code == RANK_START_CODE:
+            return "START"
+        if code < len(MOVE_NAMES):
+            return MOVE_NAMES[code]
+        return "NOT_FOUND"
+
+    def walk(self, state_str, max_depth=MAX_PATH_LENGTH):
+        """Comme BFSTable.walk, mais entièrement sur les rangs (aucune chaîne reconstruite)."""
+        rank = rank_state(state_str)
+        if rank is None:
+            return None
+
+        moves = []
+        for _ in range(max_depth + 1):
+            code = self.code(rank)
+            if code == RANK_START_CODE:
+                return moves, len(moves)
+            if code >= len(MOVE_NAMES):
+                return None
+
+            moves.append(MOVE_NAMES[code])
+            rank = apply_move_to_rank(rank, _INVERSE_CODES[code])
+        return None
+
+
+# --- TABLES COMPRESSÉES PAR BLOCS (.cbin) ---
+# Mêmes entrées qu'un .bin, par blocs de CBIN_BLOCK_SIZE clés consécutives (un bloc ne
+# change jamais de premier octet de clé). Dans un bloc, les 8 derniers octets des clés
+# sont codés en écarts de largeur fixe (octets) puis le bloc entier passe par zlib.
+# Fichier : en-tête de 64 octets, index des blocs (première clé, nombre d'entrées,
+# position), puis les blocs compressés.
+CBIN_MAGIC = b"PYRCBIN\n"
+CBIN_VERSION = 1
+CBIN_HEADER = struct.Struct("<8sHH4s4sIIIIQQ")
+CBIN_BLOCK_SIZE = 256
+BLOCK_CACHE_SIZE = 512
+
+CompressedHeader = namedtuple("CompressedHeader", [
+    "version", "block_size", "orientation", "colour_map", "count", "max_depth",
+    "checksum", "n_blocks", "index_offset", "data_offset",
+])
+
+
+def encode_block(keys, moves):
+    """Bloc compressé de clés triées (n, 9) de même premier octet et de leurs codes (n,)."""
+    low = keys[:, 1:].copy().view(">u8").ravel().astype(np.uint64)
+    deltas = np.diff(low)
+    width = max(1, (int(deltas.max()).bit_length() + 7) // 8) if len(deltas) else 1
+    delta_bytes = deltas.astype("<u8").view(np.uint8).reshape(-1, 8)[:, :width]
+    return zlib.compress(bytes([width]) + delta_bytes.tobytes() + moves.tobytes(), 9)
+
+
+def decode_block(data, first_key, count):
+    """Inverse de encode_block : (premier octet, fins de clés uint64 triées, codes uint8)."""
+    raw = zlib.decompress(data)
+    width = raw[0]
+    deltas = np.zeros((count - 1, 8), dtype=np.uint8)
+    deltas[:, :width] = np.frombuffer(raw, dtype=np.uint8, count=(count - 1) * width,
+                                      offset=1).reshape(-1, width)
+    low = np.empty(count, dtype=np.uint64)
+    low[0] = int.from_bytes(first_key[1:], "big")
+    np.cumsum(deltas.view("<u8").ravel(), out=low[1:])
+    low[1:] += low[0]
+    moves = np.frombuffer(raw, dtype=np.uint8, offset=1 + (count - 1) * width)
+    return first_key[0], low, moves
+
+
+class CompressedTable(BFSTable):
+    """
+    Une table .cbin : seul l'index des blocs (quelques dizaines de Ko) est en mémoire,
+    les blocs sont décompressés à la demande et gardés dans un cache LRU borné.
+    """
+
+    def __init__(self, cbin_path, cache_size=BLOCK_CACHE_SIZE):
+        self.path = cbin_path
+        with open(cbin_path, "rb") as f:
+            head = f.read(TABLE_HEADER_SIZE)
+            if len(head) < TABLE_HEADER_SIZE or not head.startswith(CBIN_MAGIC):
+                raise ValueError(f"Fichier corrompu : {cbin_path} (en-tête .cbin absent)")
+            fields = CBIN_HEADER.unpack_from(head)
+            self.header = CompressedHeader(fields[1], fields[2], fields[3].decode("ascii"),
+                                           fields[4].decode("ascii"), *fields[5:])
+            if self.header.version != CBIN_VERSION:
+                raise ValueError(f"Version de table non gérée : {cbin_path} (v{self.header.version})")
+
+            n = self.header.n_blocks
+            f.seek(self.header.index_offset)
+            raw = f.read(n * STATE_SIZE + n * 2 + (n + 1) * 8)
+        if len(raw) != n * (STATE_SIZE + 2 + 8) + 8:
+            raise ValueError(f"Fichier corrompu : {cbin_path} (index tronqué)")
+
+        # Index des blocs : premières clés (liste pour bisect), tailles et positions
+        self.index = [raw[i:i + STATE_SIZE] for i in range(0, n * STATE_SIZE, STATE_SIZE)]
+        self.block_counts = np.frombuffer(raw, dtype="<u2", count=n, offset=n * STATE_SIZE)
+        self.block_offsets = np.frombuffer(raw, dtype="<u8", count=n + 1, offset=n * (STATE_SIZE + 2))
+        if (int(self.block_counts.sum()) != self.header.count
+                or self.header.data_offset + int(self.block_offsets[-1]) != os.path.getsize(cbin_path)):
+            raise ValueError(f"Fichier corrompu : {cbin_path} (index incohérent)")
+
+        self.data = np.memmap(cbin_path, dtype=np.uint8, mode="r", offset=self.header.data_offset)
+        self.cache_size = cache_size
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.header.count
+
+    def block(self, b):
+        """Bloc n° b décodé (premier octet, fins de clés, codes), via le cache LRU."""
+        with self._lock:
+            found = self._blocks.get(b)
+            if found is not None:
+                self._blocks.move_to_end(b)
+                return found
+
+        start, end = int(self.block_offsets[b]), int(self.block_offsets[b + 1])
+        found = decode_block(self.data[start:end].tobytes(), self.index[b], int(self.block_counts[b]))
+        with self._lock:
+            self._blocks[b] = found
+            while len(self._blocks) > self.cache_size:
+                self._blocks.popitem(last=False)
+        return found
+
+    def find(self, packed):
+        """Retourne le code du mouvement stocké pour un état compressé, ou None."""
+        b = bisect_right(self.index, packed) - 1
+        if b < 0:
+            return None
+        first, low, moves = self.block(b)
+        if first != packed[0]:
+            return None
+        target = np.uint64(int.from_bytes(packed[1:], "big"))
+        i = int(np.searchsorted(low, target))
+        if i < len(low) and low[i] == target:
+            return int(moves[i])
+        return None
+
+    def find_many(self, packed):
+        """Codes stockés pour un lot de clés (n, 9) ; START_CODE/0..7, 254 si absent."""
+        packed = np.ascontiguousarray(packed, dtype=np.uint8)
+        keys = packed.view(f"S{STATE_SIZE}").ravel()
+        index = np.array(self.index, dtype=f"S{STATE_SIZE}")
+        blocks = np.searchsorted(index, keys, side="right") - 1
+        low = packed[:, 1:].copy().view(">u8").ravel().astype(np.uint64)
+
+        codes = np.full(len(packed), MISSING_CODE, dtype=np.uint8)
+        for b in np.unique(blocks[blocks >= 0]):
+            members = np.flatnonzero(blocks == b)
+            first, block_low, moves = self.block(int(b))
+            i = np.minimum(np.searchsorted(block_low, low[members]), len(block_low) - 1)
+            hit = (block_low[i] == low[members]) & (packed[members, 0] == first)
+            codes[members[hit]] = moves[i[hit]]
+        return codes
+
+    def iter_blocks(self):
+        """Parcourt toute la table : (clés (n, 9) uint8, codes (n,)) bloc par bloc, sans cache."""
+        for b in range(self.header.n_blocks):
+            start, end = int(self.block_offsets[b]), int(self.block_offsets[b + 1])
+            first, low, moves = decode_block(self.data[start:end].tobytes(), self.index[b],
+                                             int(self.block_counts[b]))
+            keys = np.empty((len(low), STATE_SIZE), dtype=np.uint8)
+            keys[:, 0] = first
+            keys[:, 1:] = low.astype(">u8").view(np.uint8).reshape(-1, 8)
+            yield keys, moves
+
+    def cache_info(self):
+        with self._lock:
+            return {"blocks": self.header.n_blocks, "cached": len(self._blocks), "capacity": self.cache_size}
+
+
+def open_table(table_path):
+    """Ouvre une table selon son extension (.rank, .cbin ou .bin)."""
+    if table_path.endswith(".rank"):
+        return RankTable(table_path)
+    if table_path.endswith(".cbin"):
+        return CompressedTable(table_path)
+    return BFSTable(table_path)
+
+
+# --- CONTRÔLE DES TABLES ---
+
+def _checksum(data, chunk_size=1 << 20):
+    """CRC32 d'un tableau d'octets projeté, lu par blocs."""
+    crc = 0
+    for start in range(0, len(data), chunk_size):
+        crc = zlib.crc32(data[start:start + chunk_size], crc)
+    return crc
+
+
+def verify_table(table_path, deep=True):
+    """
+    Contrôle d'une table (.bin v2 ou ancien, .rank) sans faire de résolution.
+    v2 : en-tête, taille, CRC32 et index ; `deep` ajoute l'ordre des clés et les codes.
+    Retourne un rapport {path, format, count, max_depth, errors}, `errors` vide si la table est saine.
+    """
+    report = {"path": table_path, "format": None, "count": None, "max_depth": None, "errors": []}
+    errors = report["errors"]
+    try:
+        table = open_table(table_path)
+    except (OSError, ValueError) as e:
+        errors.append(str(e))
+        return report
+
+    if isinstance(table, RankTable):
+        report["format"], report["count"] = "rank", len(table)
+        if table.code(0) != RANK_START_CODE:
+            errors.append("le rang 0 (état résolu) n'est pas START")
+        if deep:
+            nibbles = np.concatenate([table.codes & 0x0F, table.codes >> 4])
+            if np.any((nibbles > RANK_START_CODE) & (nibbles != RANK_EMPTY_CODE)):
+                errors.append("codes de 4 bits invalides")
+            if np.count_nonzero(nibbles == RANK_START_CODE) != 1:
+                errors.append("la table doit contenir exactement un START")
+            report["count"] = int(np.count_nonzero(nibbles != RANK_EMPTY_CODE))
+        return report
+
+    if isinstance(table, CompressedTable):
+        header = table.header
+        report.update(format="cbin", count=len(table), orientation=header.orientation,
+                      max_depth=header.max_depth)
+        if _checksum(table.data) != header.checksum:
+            errors.append("CRC32 des blocs incorrect")
+        if deep:
+            previous, starts = None, 0
+            try:
+                for keys, moves in table.iter_blocks():
+                    keys = keys.view(f"S{STATE_SIZE}").ravel()
+                    if np.any(keys[1:] <= keys[:-1]) or (previous is not None and keys[0] <= previous):
+                        errors.append("clés non triées ou dupliquées")
+                        break
+                    previous = keys[-1]
+                    starts += int(np.count_nonzero(moves == START_CODE))
+            except (zlib.error, ValueError) as e:
+                errors.append(f"bloc illisible : {e}")
+            else:
+                if starts != 1:
+                    errors.append("la table doit contenir exactement un START")
+        return report
+
+    header = table.header
+    report["format"], report["count"] = ("v2" if header else "legacy"), len(table)
+    if header is not None:
+        report.update(orientation=header.orientation, max_depth=header.max_depth)
+        data = np.memmap(table_path, dtype=np.uint8, mode="r", offset=header.data_offset,
+                         shape=(header.count * ENTRY_SIZE,))
+        if _checksum(data) != header.checksum:
+            errors.append("CRC32 des entrées incorrect")
+        index = np.array(table.index, dtype=f"S{STATE_SIZE}")
+        if not np.array_equal(index, table.keys[::header.index_stride]):
+            errors.append("index épars incohérent avec les entrées")
+
+    if deep:
+        if np.any(table.keys[1:] <= table.keys[:-1]):
+            errors.append("clés non triées ou dupliquées")
+        if np.count_nonzero(table.moves == START_CODE) != 1:
+            errors.append("la table doit contenir exactement un START")
+        if np.any((table.moves >= len(MOVE_NAMES)) & (table.moves != START_CODE)):
+            errors.append("codes de mouvement invalides")
+    return report
+
+
+class SolverEngine:
+    """Garde les tables BFS ouvertes pour toute la durée de vie de l'application."""
+
+    def __init__(self):
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def table(self, table_path):
+        """Ouvre (une seule fois) et retourne la table associée à ce fichier."""
+        abs_path = os.path.abspath(table_path)
+        table = self._tables.get(abs_path)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(abs_path)
+                if table is None:
+                    table = open_table(abs_path)
+                    self._tables[abs_path] = table
+        return table
+
+    def lookup(self, table_path, state_str):
+        """Prochain coup pour `state_str` dans `table_path` (contrat de query_c_solver)."""
+        if len(state_str) != 36:
+            return "ERROR"
+
+        if not os.path.exists(table_path):
+            return "FILE_NOT_FOUND"
+
+        try:
+            return self.table(table_path).lookup(state_str)
+        except (OSError, ValueError) as e:
+            print(f"Erreur moteur de résolution : {e}")
+            return "ERROR"
+
+    def solve_path(self, table_path, state_str):
+        """Séquence complète (et sa profondeur) pour `state_str` en un seul appel."""
+        if len(state_str) != 36:
+            return PathResult("ERROR", None, None)
+
+        if not os.path.exists(table_path):
+            return PathResult("FILE_NOT_FOUND", None, None)
+
+        try:
+            found = self.table(table_path).walk(state_str)
+        except (OSError, ValueError) as e:
+            print(f"Erreur moteur de résolution : {e}")
+            return PathResult("ERROR", None, None)
+
+        if found is None:
+            return PathResult("NOT_FOUND", None, None)
+        return PathResult("FOUND", *found)
+
+    def forget(self, table_paths):
+        """
+        Retire ces tables du moteur (version remplacée). Les appels en cours gardent
+        leur référence : la projection est libérée quand le dernier se termine.
+        """
+        with self._lock:
+            for table_path in table_paths:
+                self._tables.pop(os.path.abspath(table_path), None)
+
+    def close(self):
+        """Libère toutes les projections mémoire."""
+        with self._lock:
+            self._tables.clear()
+
+
+# Instance partagée par le solveur et l'application Flask
+default_engine = SolverEngine()
+
+
+if __name__ == "__main__":
+    # python -m algorithms.solver.engine verify <table> [<table> ...] [--fast]
+    if len(sys.argv) < 3 or sys.argv[1] != "verify":
+        print("Usage : python -m algorithms.solver.engine verify <table> [...] [--fast]")
+        sys.exit(2)
+
+    failed = False
+    for table_path in [a for a in sys.argv[2:] if a != "--fast"]:
+        report = verify_table(table_path, deep="--fast" not in sys.argv)
+        status = "OK" if not report["errors"] else "ÉCHEC"
+        print(f"{status} {table_path} : format {report['format']}, {report['count']} états, "
+              f"profondeur max {report['max_depth']}")
+        for error in report["errors"]:
+            print(f"  - {error}")
+        failed = failed or bool(report["errors"])
+    sys.exit(1 if failed else 0)
@@ -1,15 +1,31 @@
 from collections import deque
 import time
+import json
 import pickle
+import shutil
+import threading
 import multiprocessing
+from multiprocessing import shared_memory
 import os
+import sys
 import struct
+import zlib
 
-from .pyraminx import Pyraminx
+import numpy as np
 
-# Dossier de sortie
+from .pyraminx import (PackedState, MOVE_PERMUTATIONS, EDGES, SOLVED_COLOURS, rank_state,
+                       unrank_state, coordinate_move_tables, N_STATES, N_EDGE_PERMS, N_EDGE_FLIPS,
+                       N_CENTER_TWISTS)
+from .engine import (ENTRY_SIZE, STATE_SIZE, RANK_START_CODE, RANK_EMPTY_CODE, TABLE_INDEX_STRIDE,
+                     TABLE_HEADER_SIZE, CBIN_MAGIC, CBIN_VERSION, CBIN_HEADER, CBIN_BLOCK_SIZE,
+                     BFSTable, table_data_offset, table_header_bytes, encode_block)
+from .batch import rank_stickers
+
+# Dossier de sortie (créé au lancement d'une génération)
 path = "BFS/"
-os.makedirs(path, exist_ok=True)
+
+# État résolu de la table canonique (couleurs SOLVED_COLOURS)
+CANONICAL_SOLVED_STATE = "rrrrrrrrryyyyyyyyygggggggggbbbbbbbbb"
 
 # Mapping couleur -> bits
 COLOR_MAP = {'r': 0, 'g': 1, 'b': 2, 'y': 3}
@@ -21,6 +37,10 @@ MOVE_MAP = {
     "START": 255
 }
 
+# Ordre d'exploration des coups (sens 0 puis 1 pour chaque couche) : il fixe, à égalité
+# de profondeur, le coup parent retenu, donc le contenu exact des tables
+BFS_MOVE_ORDER = [layer + suffix for layer in "URLB" for suffix in ("`", "")]
+
 def pack_state(state_str):
     """Compresse 36 chars en 9 bytes (2 bits par char)."""
     packed_int = 0
@@ -51,82 +71,852 @@ def convert_to_binary_for_c(pkl_full_path, output_bin_full_path):
             f.write(struct.pack('B', move_byte))
 
 
-def bfs_generate_combinations(solved_state):
-    visited = set()
-    queue = deque([solved_state])
-    visited.add(solved_state)
+def convert_to_rank_table(combinations, output_rank_full_path):
+    """
+    Écrit la table dense indexée par rang (lue par engine.RankTable) :
+    un code de 4 bits par état (0..7 = mouvement, 8 = START, 15 = absent),
+    deux états par octet, le rang pair dans les 4 bits de poids faible.
+    """
+    codes = bytearray(b"\xff" * ((N_STATES + 1) // 2))
 
-    allStates = {solved_state: "START"}
+    for state, move in combinations.items():
+        rank = rank_state(state)
+        if rank is None:
+            continue
+        code = 8 if move == "START" else MOVE_MAP[move]
+        byte_index = rank >> 1
+        if rank & 1:
+            codes[byte_index] = (codes[byte_index] & 0x0F) | (code << 4)
+        else:
+            codes[byte_index] = (codes[byte_index] & 0xF0) | code
+
+    with open(output_rank_full_path, 'wb') as f:
+        f.write(codes)
+
+
+def convert_to_compressed_table(bin_path, output_path, block_size=CBIN_BLOCK_SIZE):
+    """
+    Compresse un .bin trié (v2 ou ancien) en .cbin (engine.CompressedTable) : blocs de
+    `block_size` entrées au plus, coupés à chaque changement de premier octet de clé.
+    """
+    table = BFSTable(bin_path)
+    entries = np.asarray(table.entries).view(np.uint8).reshape(-1, ENTRY_SIZE)
+    bounds = np.searchsorted(entries[:, 0], np.arange(257))
+    starts = [s for h in range(256) for s in range(bounds[h], bounds[h + 1], block_size)]
+    ends = starts[1:] + [len(entries)]
+
+    n = len(starts)
+    index_offset = TABLE_HEADER_SIZE
+    data_offset = index_offset + n * (STATE_SIZE + 2) + (n + 1) * 8
+    offsets, checksum = [0], 0
+    tmp_output = output_path + ".tmp"
+    with open(tmp_output, "wb") as out:
+        out.seek(data_offset)
+        for start, end in zip(starts, ends):
+            block = encode_block(entries[start:end, :STATE_SIZE], entries[start:end, STATE_SIZE])
+            checksum = zlib.crc32(block, checksum)
+            out.write(block)
+            offsets.append(offsets[-1] + len(block))
+
+        header = table.header
+        out.seek(0)
+        out.write(CBIN_HEADER.pack(
+            CBIN_MAGIC, CBIN_VERSION, block_size,
+            (header.orientation if header else SOLVED_COLOURS).encode("ascii"), b"rgby",
+            len(entries), header.max_depth if header else 0, checksum, n, index_offset, data_offset,
+        ).ljust(TABLE_HEADER_SIZE, b"\x00"))
+        out.write(b"".join(entries[s, :STATE_SIZE].tobytes() for s in starts))
+        out.write(np.array([e - s for s, e in zip(starts, ends)], dtype="<u2").tobytes())
+        out.write(np.array(offsets, dtype="<u8").tobytes())
+    os.replace(tmp_output, output_path)
+    return len(entries)
 
-    moves = [(r, d) for r in ['U', 'R', 'L', 'B'] for d in [0, 1]]
+
+def bfs_generate_combinations(solved_state):
+    """
+    BFS depuis l'état résolu : {état (36 chars): coup qui y a mené, "START" pour l'origine}.
+    Les états circulent en PackedState (36 octets, coups par permutation d'indices) ;
+    la conversion en chaînes n'a lieu qu'à la fin.
+    """
+    start = PackedState.from_string(solved_state)
+    queue = deque([start])
+    allStates = {start.data: "START"}
 
     while queue:
-        currentState = queue.popleft()
-        cube = Pyraminx(state=currentState)
-
-        for move in moves:
-            if move[0] == 'U':
-                newStateObj = cube.up(move[1])
-            elif move[0] == 'R':
-                newStateObj = cube.right(move[1])
-            elif move[0] == 'L':
-                newStateObj = cube.left(move[1])
-            elif move[0] == 'B':
-                newStateObj = cube.back(move[1])
-
-            newState = newStateObj.stringify()
-
-            if newState not in visited:
-                visited.add(newState)
+        current = queue.popleft()
+
+        for mov_name in BFS_MOVE_ORDER:
+            newState = current.move(mov_name)
+            if newState.data not in allStates:
+                allStates[newState.data] = mov_name
                 queue.append(newState)
-                mov_name = move[0] + ('`' if move[1] == 0 else '')
-                allStates[newState] = mov_name
 
-    return allStates
+    return {state.decode("ascii"): move for state, move in allStates.items()}
+
+
+# Octet ASCII d'une couleur <-> chiffre en base 4 de COLOR_MAP (celui des clés de 9 octets)
+_BASE4_LUT = np.zeros(256, dtype=np.uint8)
+for _colour, _digit in COLOR_MAP.items():
+    _BASE4_LUT[ord(_colour)] = _digit
+_COLOUR_LUT = np.array([ord(c) for c in sorted(COLOR_MAP, key=COLOR_MAP.get)], dtype=np.uint8)
+
+# Parents développés d'un bloc : 8 x 36 octets d'enfants chacun (~5 Mo pour 16 384)
+BFS_CHUNK_SIZE = 16384
+# Tampon d'écriture de chaque seau de SortedTableWriter (256 seaux)
+BUCKET_BUFFER_SIZE = 64 * 1024
+
+# Permutations des coups dans l'ordre d'exploration, et leur code MOVE_MAP
+_BFS_PERMS = np.array([MOVE_PERMUTATIONS[m] for m in BFS_MOVE_ORDER], dtype=np.intp)
+_BFS_CODES = np.array([MOVE_MAP[m] for m in BFS_MOVE_ORDER], dtype=np.uint8)
+
+
+def pack_states(digits):
+    """Clés de 9 octets (pack_state) d'un tableau (N, 36) de chiffres COLOR_MAP, en tableau 'S9'."""
+    digits = digits.reshape(len(digits), 9, 4)
+    packed = (digits[:, :, 0] << 6) | (digits[:, :, 1] << 4) | (digits[:, :, 2] << 2) | digits[:, :, 3]
+    return np.ascontiguousarray(packed).view("S9").ravel()
+
+
+def unpack_states(keys):
+    """Opération inverse de pack_states : tableau (N, 36) de chiffres COLOR_MAP."""
+    packed = np.ascontiguousarray(keys).view(np.uint8).reshape(-1, 9)
+    shifts = np.array([6, 4, 2, 0], dtype=np.uint8)
+    return ((packed[:, :, None] >> shifts) & 3).reshape(-1, 36)
+
+
+class FrontierBFS:
+    """
+    BFS niveau par niveau, entièrement en NumPy. Chaque frontière est un tableau (F, 36)
+    de chiffres COLOR_MAP : les 8 coups sont 8 gathers, les doublons disparaissent par
+    np.unique et par recherche dichotomique dans les clés déjà visitées (triées).
+    Les parents sont développés par blocs de `chunk_size` (mémoire bornée) ; le premier
+    (parent, coup) rencontré est gardé, dans l'ordre de la file de bfs_generate_combinations :
+    les tables produites sont identiques.
+    Entre deux niveaux, (depth, frontier, visited) suffit à reprendre (voir TableGenerator).
+    """
+
+    def __init__(self, solved_state=None, chunk_size=BFS_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.depth = 0
+        if solved_state is not None:
+            # Les états circulent en chiffres COLOR_MAP (0..3) : la clé n'est qu'un jeu de décalages
+            self.frontier = _BASE4_LUT[np.frombuffer(solved_state.encode("ascii"), dtype=np.uint8)].reshape(1, 36)
+            self.visited = pack_states(self.frontier)
+
+    @classmethod
+    def restore(cls, depth, frontier_keys, visited, chunk_size=BFS_CHUNK_SIZE):
+        """Reprend après le niveau `depth` (frontière et clés visitées compressées)."""
+        bfs = cls(chunk_size=chunk_size)
+        bfs.depth = depth
+        bfs.frontier = unpack_states(frontier_keys)
+        bfs.visited = visited
+        return bfs
+
+    def done(self):
+        return len(self.frontier) == 0
+
+    def expand(self):
+        """Développe le niveau suivant : produit (nouveaux états (n, 36), codes MOVE_MAP (n,)) par bloc."""
+        next_frontier = []
+        for start in range(0, len(self.frontier), self.chunk_size):
+            # (F, 8, 36) -> (F * 8, 36) : parent majeur, coup mineur, comme la file FIFO
+            children = self.frontier[start:start + self.chunk_size, _BFS_PERMS].reshape(-1, 36)
+            keys, first = np.unique(pack_states(children), return_index=True)
+
+            position = np.searchsorted(self.visited, keys)
+            known = position < len(self.visited)
+            known[known] = self.visited[position[known]] == keys[known]
+
+            # Nouveaux états, remis dans l'ordre de découverte pour le niveau suivant
+            first = np.sort(first[~known])
+            self.visited = np.insert(self.visited, position[~known], keys[~known])
+            if len(first):
+                next_frontier.append(children[first])
+                yield children[first], _BFS_CODES[first % len(BFS_MOVE_ORDER)]
+
+        self.frontier = np.concatenate(next_frontier) if next_frontier else self.frontier[:0]
+        self.depth += 1
+
+
+def iter_bfs_levels(solved_state, chunk_size=BFS_CHUNK_SIZE, verbose=True):
+    """Tout le BFS : produit (profondeur, nouveaux états (n, 36), codes MOVE_MAP (n,)) bloc par bloc."""
+    bfs = FrontierBFS(solved_state, chunk_size)
+    yield 0, bfs.frontier, np.array([MOVE_MAP["START"]], dtype=np.uint8)
+
+    while not bfs.done():
+        level_start = time.time()
+        for states, codes in bfs.expand():
+            yield bfs.depth + 1, states, codes
+        if verbose:
+            print(f"  Niveau {bfs.depth:2d} : {len(bfs.frontier):7d} nouveaux états "
+                  f"({len(bfs.visited)} au total) en {time.time() - level_start:.2f}s")
+
+
+def bfs_generate_frontier(solved_state, verbose=True):
+    """Tout le BFS en mémoire : (états (N, 36) en octets ASCII, codes MOVE_MAP (N,))."""
+    _, states, codes = zip(*iter_bfs_levels(solved_state, verbose=verbose))
+    return _COLOUR_LUT[np.concatenate(states)], np.concatenate(codes)
+
+
+def frontier_to_combinations(states, codes):
+    """Dictionnaire {état: coup} (format de bfs_generate_combinations) depuis le BFS NumPy."""
+    names = {code: name for name, code in MOVE_MAP.items()}
+    raw = states.tobytes().decode("ascii")
+    return {raw[i * 36:(i + 1) * 36]: names[code] for i, code in enumerate(codes.tolist())}
+
+
+# --- ÉCRITURE EN FLUX DES TABLES ---
+
+class SortedTableWriter:
+    """
+    Écrit un .bin trié (entrées de 10 octets) sans jamais tenir toute la table en mémoire.
+    Tri radix externe sur le premier octet de la clé : les entrées sont réparties dans
+    256 fichiers temporaires (écritures groupées), puis chaque seau est trié en mémoire
+    et ajouté au fichier final. Mémoire de pointe : un seau + les tampons.
+    """
+
+    def __init__(self, output_path, buffer_size=BUCKET_BUFFER_SIZE, resume_sizes=None):
+        self.output_path = output_path
+        self.buffer_size = buffer_size
+        self.tmp_dir = output_path + ".parts"
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.buffers = [bytearray() for _ in range(256)]
+
+        # Reprise : chaque seau est ramené à sa taille du dernier point de reprise
+        # (sans reprise, les seaux d'une génération interrompue sont vidés)
+        sizes = resume_sizes or [0] * 256
+        for bucket, size in enumerate(sizes):
+            bucket_path = self._bucket_path(bucket)
+            if size:
+                # Seau disparu ou plus court : le point de reprise ne correspond plus aux fichiers
+                if not os.path.exists(bucket_path) or os.path.getsize(bucket_path) < size:
+                    raise ValueError(f"Seau {bucket_path} absent ou incomplet")
+                os.truncate(bucket_path, size)
+            elif os.path.exists(bucket_path):
+                os.remove(bucket_path)
+        self.count = sum(sizes) // ENTRY_SIZE
+
+    def _bucket_path(self, bucket):
+        return os.path.join(self.tmp_dir, f"{bucket:02x}")
+
+    def _flush(self, bucket):
+        with open(self._bucket_path(bucket), "ab") as f:
+            f.write(self.buffers[bucket])
+        self.buffers[bucket].clear()
+
+    def add(self, keys, codes):
+        """Ajoute un bloc : clés 'S9' (ou (n, 9) octets) et codes de mouvement (n,)."""
+        keys = np.ascontiguousarray(keys).view(np.uint8).reshape(-1, STATE_SIZE)
+        entries = np.empty((len(keys), ENTRY_SIZE), dtype=np.uint8)
+        entries[:, :STATE_SIZE] = keys
+        entries[:, STATE_SIZE] = codes
+
+        order = np.argsort(entries[:, 0], kind="stable")
+        entries = entries[order]
+        bounds = np.searchsorted(entries[:, 0], np.arange(257))
+        for bucket in np.flatnonzero(np.diff(bounds)):
+            self.buffers[bucket] += entries[bounds[bucket]:bounds[bucket + 1]].tobytes()
+            if len(self.buffers[bucket]) >= self.buffer_size:
+                self._flush(bucket)
+        self.count += len(entries)
+
+    def checkpoint(self):
+        """Vide les tampons et retourne la taille de chaque seau (pour une reprise)."""
+        sizes = []
+        for bucket in range(256):
+            if self.buffers[bucket]:
+                self._flush(bucket)
+            bucket_path = self._bucket_path(bucket)
+            sizes.append(os.path.getsize(bucket_path) if os.path.exists(bucket_path) else 0)
+        return sizes
+
+    def close(self, orientation=SOLVED_COLOURS, max_depth=0):
+        """
+        Trie chaque seau et assemble le fichier final au format v2 (remplacé d'un coup) :
+        les entrées sont écrites à leur position, puis l'en-tête (CRC32, index épars).
+        """
+        tmp_output = self.output_path + ".tmp"
+        data_offset = table_data_offset(self.count)
+        checksum, index_keys, written = 0, [], 0
+        with open(tmp_output, "wb") as out:
+            out.seek(data_offset)
+            for bucket in range(256):
+                if self.buffers[bucket]:
+                    self._flush(bucket)
+                bucket_path = self._bucket_path(bucket)
+                if not os.path.exists(bucket_path):
+                    continue
+                entries = np.fromfile(bucket_path, dtype=np.uint8).reshape(-1, ENTRY_SIZE)
+                keys = np.ascontiguousarray(entries[:, :STATE_SIZE]).view(f"S{STATE_SIZE}").ravel()
+                entries = entries[np.argsort(keys, kind="stable")]
+
+                # Clés de l'index : une entrée sur TABLE_INDEX_STRIDE du fichier entier
+                first = -written % TABLE_INDEX_STRIDE
+                index_keys += [row.tobytes() for row in entries[first::TABLE_INDEX_STRIDE, :STATE_SIZE]]
+                checksum = zlib.crc32(entries, checksum)
+                out.write(entries.tobytes())
+                written += len(entries)
+
+            out.seek(0)
+            out.write(table_header_bytes(orientation, written, max_depth, checksum, index_keys))
+        os.replace(tmp_output, self.output_path)
+        # Seaux supprimés seulement une fois le .bin en place : un arrêt pendant l'assemblage
+        # laisse le point de reprise utilisable
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        return self.count
+
+
+def rank_codes(table, ranks):
+    """Codes de 4 bits (format .rank) des rangs `ranks`."""
+    return (table[ranks >> 1] >> ((ranks & 1) << 2).astype(np.uint8)) & 0x0F
+
+
+def set_rank_codes(table, ranks, codes):
+    """Écrit les codes de 4 bits `codes` aux rangs `ranks` (rangs pairs dans les bits faibles)."""
+    even = ranks & 1 == 0
+    low, high = ranks[even] >> 1, ranks[~even] >> 1
+    table[low] = (table[low] & 0xF0) | codes[even]
+    table[high] = (table[high] & 0x0F) | (codes[~even] << 4)
+
+
+class RankTableWriter:
+    """Table .rank (engine.RankTable) remplie bloc par bloc : 466 Ko quel que soit le BFS."""
+
+    def __init__(self, output_path, solved_state, codes=None):
+        self.output_path = output_path
+        if codes is None:
+            codes = np.full((N_STATES + 1) // 2, 0xFF, dtype=np.uint8)
+        self.codes = codes
+        # Chiffre COLOR_MAP -> indice de face de l'état résolu : états en couleurs canoniques
+        self.faces = np.zeros(4, dtype=np.uint8)
+        for face in range(4):
+            self.faces[COLOR_MAP[solved_state[face * 9]]] = face
+
+    def add(self, digits, codes):
+        ranks = rank_stickers(self.faces[digits])
+        valid = ranks >= 0
+        ranks, codes = ranks[valid], codes[valid]
+        codes = np.where(codes == MOVE_MAP["START"], RANK_START_CODE, codes).astype(np.uint8)
+        set_rank_codes(self.codes, ranks, codes)
+
+    def close(self):
+        tmp_output = self.output_path + ".tmp"
+        self.codes.tofile(tmp_output)
+        os.replace(tmp_output, self.output_path)
+
+
+# --- BFS SUR LES RANGS (MÉMOIRE BORNÉE) ---
+
+# Taille des tampons des seaux en mode compact : 256 x 4 Ko au plus
+COMPACT_BUFFER_SIZE = 4 * 1024
+
+
+class RankBFS:
+    """
+    BFS sur les rangs parfaits (pyraminx.rank_state) : un coup est trois lectures dans
+    les tables de mouvements des coordonnées, sans chaîne d'état. L'ensemble visité est
+    la table .rank elle-même (4 bits par état, 15 = absent, 466 Ko), la frontière un
+    tableau de rangs int32 (2 Mo au niveau le plus large).
+    Même ordre de parcours que FrontierBFS : la table produite est identique.
+    """
+
+    def __init__(self, chunk_size=BFS_CHUNK_SIZE, codes=None, frontier=None, depth=0):
+        # Colonnes dans l'ordre de BFS_MOVE_ORDER, déjà multipliées par le poids de chaque coordonnée
+        order = [list(MOVE_PERMUTATIONS).index(m) for m in BFS_MOVE_ORDER]
+        perm_moves, flip_moves, center_moves = coordinate_move_tables()
+        self.perm_moves = np.array(perm_moves, dtype=np.int32)[:, order] * (N_EDGE_FLIPS * N_CENTER_TWISTS)
+        self.flip_moves = np.array(flip_moves, dtype=np.int32)[:, order] * N_CENTER_TWISTS
+        self.center_moves = np.array(center_moves, dtype=np.int32)[:, order]
+
+        self.chunk_size = chunk_size
+        self.depth = depth
+        if codes is None:
+            # Rang 0 = état résolu
+            codes = np.full((N_STATES + 1) // 2, 0xFF, dtype=np.uint8)
+            codes[0] = 0xF0 | RANK_START_CODE
+            frontier = np.zeros(1, dtype=np.int32)
+        self.codes = codes
+        self.frontier = frontier
+        self.count = int(np.count_nonzero(codes & 0x0F != RANK_EMPTY_CODE)
+                         + np.count_nonzero(codes >> 4 != RANK_EMPTY_CODE))
+
+    def done(self):
+        return len(self.frontier) == 0
+
+    def expand(self):
+        """Développe le niveau suivant : produit (nouveaux rangs, codes MOVE_MAP) par bloc."""
+        next_frontier = []
+        for start in range(0, len(self.frontier), self.chunk_size):
+            rest, center = np.divmod(self.frontier[start:start + self.chunk_size], N_CENTER_TWISTS)
+            perm, flip = np.divmod(rest, N_EDGE_FLIPS)
+            # (F, 8) -> (F * 8) : parent majeur, coup mineur, comme la file FIFO
+            children = (self.perm_moves[perm] + self.flip_moves[flip] + self.center_moves[center]).ravel()
+            ranks, first = np.unique(children, return_index=True)
+            first = np.sort(first[rank_codes(self.codes, ranks) == RANK_EMPTY_CODE])
+
+            ranks, codes = children[first], _BFS_CODES[first % len(BFS_MOVE_ORDER)]
+            set_rank_codes(self.codes, ranks, codes)
+            self.count += len(ranks)
+            if len(ranks):
+                next_frontier.append(ranks)
+                yield ranks, codes
+
+        self.frontier = np.concatenate(next_frontier) if next_frontier else self.frontier[:0]
+        self.depth += 1
+
+
+# --- BFS SUR LES RANGS EN PARALLÈLE (MÉMOIRE PARTAGÉE) ---
+
+# Parents traités par tour de travailleurs : 1 << 17 parents, 4 Mo d'enfants partagés
+PARALLEL_CHUNK_SIZE = 1 << 17
+
+# Attente maximale à la barrière entre les deux phases (travailleur mort : erreur, pas de blocage)
+BARRIER_TIMEOUT_SEC = 60
+
+# Tableaux partagés vus par chaque processus travailleur (rempli par _attach_worker)
+_WORKER = {}
+
+
+def _shared_array(block, dtype, count):
+    return np.ndarray((count,), dtype=dtype, buffer=block.buf)
+
+
+def _attach_worker(names, chunk_size, workers, move_tables, barrier):
+    """Initialisation d'un travailleur : ouvre les blocs de mémoire partagée du BFS."""
+    blocks = {name: shared_memory.SharedMemory(name=block_name) for name, block_name in names.items()}
+    _WORKER.update(
+        blocks=blocks, workers=workers, move_tables=move_tables, barrier=barrier,
+        codes=_shared_array(blocks["codes"], np.uint8, (N_STATES + 1) // 2),
+        parents=_shared_array(blocks["parents"], np.int32, chunk_size),
+        children=_shared_array(blocks["children"], np.int32, chunk_size * len(BFS_MOVE_ORDER)),
+        new=_shared_array(blocks["new"], np.bool_, chunk_size * len(BFS_MOVE_ORDER)),
+    )
+
+
+def _expand_slice(start, stop):
+    """Enfants des parents [start, stop) du bloc, à leur place dans le tableau partagé."""
+    perm_moves, flip_moves, center_moves = _WORKER["move_tables"]
+    rest, center = np.divmod(_WORKER["parents"][start:stop], N_CENTER_TWISTS)
+    perm, flip = np.divmod(rest, N_EDGE_FLIPS)
+    width = len(BFS_MOVE_ORDER)
+    _WORKER["children"][start * width:stop * width] = (
+        perm_moves[perm] + flip_moves[flip] + center_moves[center]).ravel()
+
+
+def _claim_partition(partition, size):
+    """
+    Le travailleur `partition` traite les enfants dont l'octet de la table .rank
+    lui appartient (hachage (rang >> 1) % travailleurs) : il est seul à lire et écrire ces
+    octets, sans verrou. Il garde la première occurrence de chaque nouvel état.
+    """
+    children, new, codes = _WORKER["children"][:size], _WORKER["new"][:size], _WORKER["codes"]
+    owned = np.flatnonzero((children >> 1) % _WORKER["workers"] == partition)
+    new[owned] = False
+
+    ranks, first = np.unique(children[owned], return_index=True)
+    found = owned[first[rank_codes(codes, ranks) == RANK_EMPTY_CODE]]
+    set_rank_codes(codes, children[found], _BFS_CODES[found % len(BFS_MOVE_ORDER)])
+    new[found] = True
+
+
+def _expand_and_claim(partition, start, stop, size):
+    """
+    Tâche d'un travailleur pour un bloc : sa tranche de parents, puis, une fois toutes les
+    tranches écrites (barrière), sa partition des enfants. Un seul aller-retour par bloc.
+    """
+    _expand_slice(start, stop)
+    _WORKER["barrier"].wait(BARRIER_TIMEOUT_SEC)
+    _claim_partition(partition, size)
+
+
+class ParallelRankBFS(RankBFS):
+    """
+    RankBFS dont chaque niveau est réparti sur `workers` processus. La table .rank
+    (ensemble visité), les parents du bloc en cours, leurs enfants et les drapeaux
+    « nouvel état » vivent en multiprocessing.shared_memory : rien n'est copié entre
+    processus. Phase 1, chaque travailleur développe une tranche de parents ; phase 2,
+    chacun dédoublonne les enfants de sa partition. Les deux phases forment une seule tâche
+    par travailleur et par bloc, séparées par une barrière. Les drapeaux, lus dans l'ordre
+    des enfants, redonnent l'ordre FIFO : la table produite est identique.
+
+    Mesuré sur un seul cœur, table complète (65 blocs) : les tâches des travailleurs font
+    1,71 s sur 1,74 s, la collecte des drapeaux par le parent 0,03 s. Le travail réparti
+    (np.unique par partition) domine ; seul le masque de partition (~5 ms par bloc) est
+    refait par chaque travailleur. Sur un cœur, ce mode est ~1,5x plus lent que RankBFS
+    (1,16 s) : CompactTableGenerator plafonne `workers` au nombre de cœurs.
+    """
+
+    def __init__(self, workers, chunk_size=PARALLEL_CHUNK_SIZE, codes=None, frontier=None, depth=0):
+        super().__init__(chunk_size, codes, frontier, depth)
+        self.workers = workers
+        width = len(BFS_MOVE_ORDER)
+        sizes = {"codes": len(self.codes), "parents": chunk_size * 4,
+                 "children": chunk_size * width * 4, "new": chunk_size * width}
+        self._blocks = {name: shared_memory.SharedMemory(create=True, size=size)
+                        for name, size in sizes.items()}
+
+        shared_codes = _shared_array(self._blocks["codes"], np.uint8, len(self.codes))
+        shared_codes[:] = self.codes
+        self.codes = shared_codes
+        self._parents = _shared_array(self._blocks["parents"], np.int32, chunk_size)
+        self._children = _shared_array(self._blocks["children"], np.int32, chunk_size * width)
+        self._new = _shared_array(self._blocks["new"], np.bool_, chunk_size * width)
+
+        names = {name: block.name for name, block in self._blocks.items()}
+        self.pool = multiprocessing.Pool(
+            workers, initializer=_attach_worker,
+            initargs=(names, chunk_size, workers, (self.perm_moves, self.flip_moves, self.center_moves),
+                      multiprocessing.Barrier(workers)),
+        )
+
+    def expand(self):
+        next_frontier = []
+        width = len(BFS_MOVE_ORDER)
+        for start in range(0, len(self.frontier), self.chunk_size):
+            parents = self.frontier[start:start + self.chunk_size]
+            self._parents[:len(parents)] = parents
+
+            # Une tâche par travailleur (chunksize=1) : chacun bloque à la barrière jusqu'aux autres
+            bounds = np.linspace(0, len(parents), self.workers + 1).astype(int)
+            self.pool.starmap(_expand_and_claim,
+                              [(p, bounds[p], bounds[p + 1], len(parents) * width) for p in range(self.workers)],
+                              chunksize=1)
+
+            first = np.flatnonzero(self._new[:len(parents) * width])
+            ranks, codes = self._children[first].copy(), _BFS_CODES[first % width]
+            self.count += len(ranks)
+            if len(ranks):
+                next_frontier.append(ranks)
+                yield ranks, codes
+
+        self.frontier = np.concatenate(next_frontier) if next_frontier else self.frontier[:0]
+        self.depth += 1
+
+    def close(self):
+        """Arrête les travailleurs et libère la mémoire partagée (la table est recopiée)."""
+        self.pool.terminate()
+        self.pool.join()
+        self.codes = self.codes.copy()
+        self._parents = self._children = self._new = None
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+
+
+def _rank_sticker_tables(scheme):
+    """
+    Chiffres COLOR_MAP des stickers d'un rang, en deux morceaux indépendants :
+    arêtes selon (permutation, orientation), centres et tips selon la torsion des centres.
+    """
+    edge_positions = sorted(p for pair in EDGES.values() for p in pair)
+    other_positions = [p for p in range(36) if p not in edge_positions]
+
+    def digits(state, positions):
+        return [COLOR_MAP[state[p]] for p in positions]
+
+    edges = np.array([digits(unrank_state(v * N_CENTER_TWISTS, scheme), edge_positions)
+                      for v in range(N_EDGE_PERMS * N_EDGE_FLIPS)], dtype=np.uint8)
+    centers = np.array([digits(unrank_state(c, scheme), other_positions)
+                        for c in range(N_CENTER_TWISTS)], dtype=np.uint8)
+    return edge_positions, edges, other_positions, centers
+
+
+def write_bin_from_ranks(codes, output_path, solved_state, max_depth=0, chunk_size=BFS_CHUNK_SIZE,
+                         buffer_size=COMPACT_BUFFER_SIZE):
+    """Écrit le .bin trié d'une table .rank complète, en parcourant les rangs bloc par bloc."""
+    scheme = solved_state[0] + solved_state[9] + solved_state[18] + solved_state[27]
+    edge_positions, edges, other_positions, centers = _rank_sticker_tables(scheme)
+
+    writer = SortedTableWriter(output_path, buffer_size)
+    for start in range(0, N_STATES, chunk_size):
+        ranks = np.arange(start, min(start + chunk_size, N_STATES), dtype=np.int32)
+        found = rank_codes(codes, ranks)
+        ranks, found = ranks[found != RANK_EMPTY_CODE], found[found != RANK_EMPTY_CODE]
+
+        digits = np.empty((len(ranks), 36), dtype=np.uint8)
+        digits[:, edge_positions] = edges[ranks // N_CENTER_TWISTS]
+        digits[:, other_positions] = centers[ranks % N_CENTER_TWISTS]
+        writer.add(pack_states(digits),
+                   np.where(found == RANK_START_CODE, MOVE_MAP["START"], found).astype(np.uint8))
+    return writer.close(scheme, max_depth)
+
+
+# --- GÉNÉRATION REPRENABLE ---
+
+class TableGenerator:
+    """
+    Génère une table (.bin + .rank) avec un point de reprise après chaque niveau du BFS :
+    frontière et clés visitées compressées, taille des seaux du .bin et table .rank.
+    Après un arrêt (plantage, coupure de courant), run() reprend au dernier niveau terminé.
+    `snapshot()` donne l'avancement (niveaux, états/s, ETA), lisible depuis un autre thread.
+    """
+
+    mode = "standard"
+    CHECKPOINT_ARRAYS = ("frontier", "visited", "rank")
+
+    def __init__(self, solved_state=CANONICAL_SOLVED_STATE, output_dir=path,
+                 chunk_size=BFS_CHUNK_SIZE, verbose=True):
+        self.solved_state = solved_state
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.verbose = verbose
+
+        # Nom du fichier basé sur les 4 faces
+        self.name_code = f"{solved_state[0]}{solved_state[9]}{solved_state[18]}{solved_state[27]}"
+        self.bin_path = os.path.join(output_dir, f"{self.name_code}.bin")
+        self.rank_path = os.path.join(output_dir, f"{self.name_code}.rank")
+        self.checkpoint_dir = os.path.join(output_dir, f"{self.name_code}.checkpoint")
+
+        self._lock = threading.Lock()
+        self.progress = {
+            "status": "pending", "mode": self.mode, "table": self.name_code, "depth": 0, "states": 0,
+            "total": N_STATES, "states_per_sec": None, "eta_sec": None,
+            "resumed_from": None, "levels": [], "error": None,
+        }
+
+    def snapshot(self):
+        """Copie de l'avancement (pour l'app Flask)."""
+        with self._lock:
+            progress = dict(self.progress)
+            progress["levels"] = list(self.progress["levels"])
+            return progress
+
+    def _update(self, **values):
+        with self._lock:
+            self.progress.update(values)
+
+    # --- Étapes propres au mode (FrontierBFS + écriture en flux) ---
+
+    def _start(self):
+        """BFS au niveau 0, état résolu déjà écrit."""
+        bfs = FrontierBFS(self.solved_state, self.chunk_size)
+        self.bin_writer = SortedTableWriter(self.bin_path)
+        self.rank_writer = RankTableWriter(self.rank_path, self.solved_state)
+        start_code = np.array([MOVE_MAP["START"]], dtype=np.uint8)
+        self.bin_writer.add(pack_states(bfs.frontier), start_code)
+        self.rank_writer.add(bfs.frontier, start_code)
+        return bfs
+
+    def _restore(self, state, arrays):
+        self.bin_writer = SortedTableWriter(self.bin_path, resume_sizes=state["bucket_sizes"])
+        self.rank_writer = RankTableWriter(self.rank_path, self.solved_state, arrays["rank"])
+        return FrontierBFS.restore(state["depth"], arrays["frontier"],
+                                   arrays["visited"].view(f"S{STATE_SIZE}").ravel(), self.chunk_size)
+
+    def _checkpoint_arrays(self, bfs):
+        return {"frontier": pack_states(bfs.frontier).view(np.uint8),
+                "visited": bfs.visited.view(np.uint8), "rank": self.rank_writer.codes}
+
+    def _checkpoint_state(self):
+        return {"bucket_sizes": self.bin_writer.checkpoint()}
+
+    def _expand(self, bfs):
+        for digits, codes in bfs.expand():
+            self.bin_writer.add(pack_states(digits), codes)
+            self.rank_writer.add(digits, codes)
+
+    def _count(self, bfs):
+        return self.bin_writer.count
+
+    def _finish(self, bfs):
+        # Le dernier niveau développé est vide : la profondeur max est celle d'avant
+        count = self.bin_writer.close(self.name_code, bfs.depth - 1)
+        self.rank_writer.close()
+        return count
+
+    def _release(self, bfs):
+        """Libère les ressources du BFS (processus, mémoire partagée), même après une erreur."""
+
+    # --- Points de reprise ---
+
+    def _checkpoint_file(self, name, depth):
+        return os.path.join(self.checkpoint_dir, f"{name}_{depth}.npy")
+
+    def _save_checkpoint(self, bfs):
+        """Écrit le point de reprise du niveau bfs.depth ; state.json (remplacé en dernier) le valide."""
+        depth = bfs.depth
+        for name, array in self._checkpoint_arrays(bfs).items():
+            np.save(self._checkpoint_file(name, depth), array)
+
+        state = {
+            "mode": self.mode, "solved_state": self.solved_state, "depth": depth,
+            "states": self._count(bfs), "levels": self.progress["levels"], **self._checkpoint_state(),
+        }
+        state_path = os.path.join(self.checkpoint_dir, "state.json")
+        with open(state_path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(state_path + ".tmp", state_path)
+
+        # Les fichiers des niveaux précédents ne servent plus
+        for name in os.listdir(self.checkpoint_dir):
+            if name.endswith(".npy") and not name.endswith(f"_{depth}.npy"):
+                os.remove(os.path.join(self.checkpoint_dir, name))
+
+    def _load_checkpoint(self):
+        """(bfs, niveaux déjà faits) du dernier niveau terminé, ou None."""
+        state_path = os.path.join(self.checkpoint_dir, "state.json")
+        if not os.path.exists(state_path):
+            return None
+        with open(state_path) as f:
+            state = json.load(f)
+        if state.get("solved_state") != self.solved_state or state.get("mode", "standard") != self.mode:
+            return None
+
+        try:
+            arrays = {name: np.load(self._checkpoint_file(name, state["depth"]))
+                      for name in self.CHECKPOINT_ARRAYS}
+            return self._restore(state, arrays), state["levels"]
+        except (OSError, ValueError) as e:
+            # Point de reprise inutilisable (fichiers disparus) : on repart de zéro
+            print(f"[{self.name_code}] Point de reprise ignoré : {e}")
+            return None
+
+    def run(self):
+        """Génère (ou termine) la table ; retourne le nombre d'états écrits."""
+        try:
+            return self._run()
+        except Exception as e:
+            self._update(status="error", error=str(e))
+            raise
+
+    def _run(self):
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        run_start = time.time()
+
+        restored = self._load_checkpoint()
+        if restored is not None:
+            bfs, levels = restored
+            self._update(resumed_from=bfs.depth, depth=bfs.depth, states=self._count(bfs), levels=levels)
+            if self.verbose:
+                print(f"[{self.name_code}] Reprise après le niveau {bfs.depth} ({self._count(bfs)} états)")
+        else:
+            bfs = self._start()
+        try:
+            if restored is None:
+                self._save_checkpoint(bfs)
+            count = self._generate(bfs, run_start)
+        finally:
+            self._release(bfs)
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+        self._update(status="done", eta_sec=0.0)
+        return count
+
+    def _generate(self, bfs, run_start):
+        """Niveaux restants (un point de reprise par niveau), puis écriture des fichiers."""
+        resumed_states = self._count(bfs)
+        self._update(status="running")
+
+        while not bfs.done():
+            level_start = time.time()
+            self._expand(bfs)
+
+            # Avancement : états/s du niveau, et ETA sur le rythme moyen depuis le (re)démarrage
+            states = self._count(bfs)
+            level_time = time.time() - level_start
+            rate = (states - resumed_states) / max(time.time() - run_start, 1e-9)
+            eta = (N_STATES - states) / rate if rate else None
+            level = {"depth": bfs.depth, "states": len(bfs.frontier), "seconds": round(level_time, 3),
+                     "states_per_sec": round(len(bfs.frontier) / max(level_time, 1e-9))}
+            with self._lock:
+                self.progress["levels"].append(level)
+                self.progress.update(depth=bfs.depth, states=states,
+                                     states_per_sec=round(rate), eta_sec=round(eta, 1) if eta else 0.0)
+            self._save_checkpoint(bfs)
+            if self.verbose:
+                print(f"  Niveau {bfs.depth:2d} : {len(bfs.frontier):7d} nouveaux états "
+                      f"({states} au total) en {level_time:.2f}s | "
+                      f"{level['states_per_sec']} états/s | reste ~{eta or 0:.0f}s")
+
+        return self._finish(bfs)
+
+
+class CompactTableGenerator(TableGenerator):
+    """
+    Mode à mémoire bornée (Raspberry Pi 3, à côté de l'app Flask) : BFS sur les rangs
+    (RankBFS), la table .rank en construction sert d'ensemble visité, et le .bin est
+    écrit à la fin en parcourant les rangs. Quelques Mo au lieu de ~100 Mo, mêmes tables.
+    """
+
+    mode = "compact"
+    CHECKPOINT_ARRAYS = ("frontier", "rank")
+
+    def __init__(self, solved_state=CANONICAL_SOLVED_STATE, output_dir=path,
+                 chunk_size=None, verbose=True, workers=1):
+        # workers > 1 : chaque niveau est réparti sur plusieurs processus (ParallelRankBFS).
+        # Sur un seul cœur, le mode parallèle est plus lent que RankBFS : plafonné au nombre de cœurs
+        self.workers = max(1, min(workers, os.cpu_count() or 1))
+        if self.workers != workers and verbose:
+            print(f"{workers} travailleurs demandés, {self.workers} cœur(s) disponible(s)")
+        if chunk_size is None:
+            chunk_size = PARALLEL_CHUNK_SIZE if self.workers > 1 else BFS_CHUNK_SIZE
+        super().__init__(solved_state, output_dir, chunk_size, verbose)
+        self.progress["workers"] = self.workers
+
+    def _search(self, *restored):
+        if self.workers > 1:
+            return ParallelRankBFS(self.workers, self.chunk_size, *restored)
+        return RankBFS(self.chunk_size, *restored)
+
+    def _start(self):
+        return self._search()
+
+    def _restore(self, state, arrays):
+        return self._search(arrays["rank"], arrays["frontier"], state["depth"])
+
+    def _release(self, bfs):
+        if isinstance(bfs, ParallelRankBFS):
+            bfs.close()
+
+    def _checkpoint_arrays(self, bfs):
+        return {"frontier": bfs.frontier, "rank": bfs.codes}
+
+    def _checkpoint_state(self):
+        return {}
+
+    def _expand(self, bfs):
+        for _ in bfs.expand():
+            pass
+
+    def _count(self, bfs):
+        return bfs.count
+
+    def _finish(self, bfs):
+        RankTableWriter(self.rank_path, self.solved_state, bfs.codes).close()
+        return write_bin_from_ranks(bfs.codes, self.bin_path, self.solved_state, bfs.depth - 1,
+                                    self.chunk_size)
 
 
 def process_case(args):
-    index, state = args
-
-    # Nom du fichier basé sur les 4 faces
-    name_code = f"{state[0]}{state[9]}{state[18]}{state[27]}"
-    pkl_filename = f"{path}{name_code}.pkl"
-    bin_filename = f"{path}{name_code}.bin"
+    index, state, compact, workers, compress = args
 
-    print(f"[Process {index}] Démarrage pour : {name_code} ({state[:10]}...)")
+    if workers > 1:
+        generator = CompactTableGenerator(state, path, workers=workers)
+    else:
+        generator = (CompactTableGenerator if compact else TableGenerator)(state, path)
+    print(f"[Process {index}] Démarrage pour : {generator.name_code} ({state[:10]}...)")
     start_time = time.time()
 
-    # BFS
-    combinations = bfs_generate_combinations(state)
-
-    # Sauvegarde directe en Pickle
-    with open(pkl_filename, "wb") as f:
-        pickle.dump(combinations, f, protocol=pickle.HIGHEST_PROTOCOL)
-
-    # Conversion en .bin
-    convert_to_binary_for_c(pkl_filename, bin_filename)
+    # BFS (NumPy, niveau par niveau) écrit en flux : .bin (correcteur, programme C)
+    # et .rank (solveur), sans dictionnaire ni pickle intermédiaire, repris au dernier
+    # niveau terminé si une génération précédente a été interrompue
+    count = generator.run()
+    if compress:
+        # Copie compressée par blocs (.cbin), lue par le solveur et le correcteur sans le .bin
+        convert_to_compressed_table(generator.bin_path, generator.bin_path[:-len(".bin")] + ".cbin")
 
     duration = time.time() - start_time
     return (f"[Process {index}] Terminé en {duration:.2f}s | "
-            f"PKL : {pkl_filename} | BIN : {bin_filename} | "
-            f"Combinaisons : {len(combinations)}")
+            f"BIN : {generator.bin_path} | RANK : {generator.rank_path} | "
+            f"Combinaisons : {count}")
 
 
 if __name__ == '__main__':
 
+    # Une seule table canonique : les 11 autres orientations n'en diffèrent que par
+    # la couleur de chaque face, le solveur y ramène tout état par renommage des couleurs
+    # (voir invariants.to_canonical).
     target_states = [
-        "rrrrrrrrrbbbbbbbbbyyyyyyyyyggggggggg",
-        "rrrrrrrrrgggggggggbbbbbbbbbyyyyyyyyy",
-        "gggggggggyyyyyyyyybbbbbbbbbrrrrrrrrr",
-        "bbbbbbbbbyyyyyyyyyrrrrrrrrrggggggggg",
-        "rrrrrrrrryyyyyyyyygggggggggbbbbbbbbb",
-        "gggggggggbbbbbbbbbrrrrrrrrryyyyyyyyy",
-        "gggggggggrrrrrrrrryyyyyyyyybbbbbbbbb",
-        "yyyyyyyyybbbbbbbbbgggggggggrrrrrrrrr",
-        "yyyyyyyyyrrrrrrrrrbbbbbbbbbggggggggg",
-        "yyyyyyyyygggggggggrrrrrrrrrbbbbbbbbb",
-        "bbbbbbbbbgggggggggyyyyyyyyyrrrrrrrrr",
-        "bbbbbbbbbrrrrrrrrrgggggggggyyyyyyyyy"
+        CANONICAL_SOLVED_STATE,
     ]
 
     # Vérification de sécurité
@@ -135,15 +925,25 @@ if __name__ == '__main__':
             print(f"ERREUR : L'état {i} fait {len(s)} chars au lieu de 36.")
             exit()
 
-    tasks = [(i, state) for i, state in enumerate(target_states)]
+    # --compact : BFS sur les rangs, quelques Mo de mémoire (Raspberry Pi)
+    compact = "--compact" in sys.argv
+    # --workers N : chaque niveau du BFS réparti sur N processus (mode compact)
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else 1
+    # --compress : écrit aussi la table compressée par blocs (.cbin)
+    compress = "--compress" in sys.argv
+    tasks = [(i, state, compact, workers, compress) for i, state in enumerate(target_states)]
 
     cpu_count = multiprocessing.cpu_count()
     print(f"Démarrage du traitement sur {cpu_count} processeurs...")
 
     global_start = time.time()
 
-    with multiprocessing.Pool() as pool:
-        results = pool.map(process_case, tasks)
+    if workers > 1:
+        # Les processus d'un Pool ne peuvent pas lancer leurs propres travailleurs
+        results = [process_case(task) for task in tasks]
+    else:
+        with multiprocessing.Pool() as pool:
+            results = pool.map(process_case, tasks)
 
     print("\n--- Résultat Final ---")
     for res in results:
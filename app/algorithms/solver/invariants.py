@@ -0,0 +1,240 @@
+"""
+Invariants de couleurs du Pyraminx.
+
+Les centres axiaux ne quittent jamais leur sommet : leurs couleurs suffisent à
+déterminer la couleur de chaque face, donc l'orientation du puzzle. Les arêtes
+(paires de couleurs, parité de permutation et d'orientation) permettent ensuite
+de déclarer un état impossible avant toute recherche dans les tables.
+
+Les 12 orientations ne diffèrent que par la couleur de chaque face : un simple
+renommage des couleurs ramène tout état sur la table canonique (SOLVED_COLOURS).
+"""
+from itertools import permutations
+
+from .pyraminx import (AXIAL_CENTERS, TIPS, EDGES, OPPOSITE_FACE, SOLVED_COLOURS,
+                       permutation_parity, piece_twist, edge_pieces)
+
+
+# Les 12 orientations physiques = permutations paires des couleurs de référence
+# (les 12 façons de tenir le puzzle)
+ORIENTATIONS = tuple(
+    "".join(p) for p in permutations(SOLVED_COLOURS)
+    if permutation_parity([SOLVED_COLOURS.index(c) for c in p]) == 0
+)
+
+
+def to_canonical(state, code):
+    """Renomme les couleurs pour que l'orientation `code` devienne SOLVED_COLOURS ('?' inchangé)."""
+    return state.translate(str.maketrans(code, SOLVED_COLOURS))
+
+
+def from_canonical(state, code):
+    """Opération inverse de to_canonical : retour aux couleurs du scan."""
+    return state.translate(str.maketrans(SOLVED_COLOURS, code))
+
+
+def face_colours(state):
+    """Couleur de chaque face déduite des centres axiaux (ex: 'rygb'), ou None."""
+    scheme = [None] * 4
+    for vertex, positions in AXIAL_CENTERS.items():
+        colours = {state[p] for p in positions}
+        missing = set(SOLVED_COLOURS) - colours
+        if len(colours) != 3 or len(missing) != 1:
+            return None
+        # Le centre touche 3 faces : la couleur absente est celle de la face opposée
+        scheme[OPPOSITE_FACE[vertex]] = missing.pop()
+
+    if len(set(scheme)) != 4:
+        return None
+    return "".join(scheme)
+
+
+def identify_orientation(state):
+    """
+    Identifie l'orientation (la couleur de chaque face) d'un état sans aucune recherche.
+    Retourne (code, None) avec code = couleurs des faces 0..3, ou (None, raison)
+    si l'état ne peut exister sur un vrai Pyraminx.
+    """
+    if len(state) != 36:
+        return None, "longueur incorrecte"
+
+    scheme = face_colours(state)
+    if scheme is None:
+        return None, "centres incohérents"
+    if scheme not in ORIENTATIONS:
+        return None, "jeu de couleurs miroir"
+
+    for vertex in AXIAL_CENTERS:
+        for positions in (AXIAL_CENTERS[vertex], TIPS[vertex]):
+            stickers = tuple(state[p] for p in positions)
+            expected = tuple(scheme[p // 9] for p in positions)
+            if piece_twist(stickers, expected) is None:
+                return None, f"pièce {vertex} impossible"
+
+    pieces = edge_pieces(state, scheme)
+    if pieces is None:
+        return None, "arête aux couleurs invalides"
+    if len({home for home, _ in pieces}) != len(pieces):
+        return None, "arête en double"
+    if permutation_parity([home for home, _ in pieces]):
+        return None, "permutation d'arêtes impaire"
+    if sum(flip for _, flip in pieces) % 2:
+        return None, "orientation d'arêtes impaire"
+
+    return scheme, None
+
+
+def rank_orientations(state):
+    """
+    Classe les 12 orientations pour un scan incomplet ('?') ou bruité :
+    liste de (nombre de stickers de centre/tip en contradiction, code), meilleure en tête.
+    """
+    ranked = []
+    for code in ORIENTATIONS:
+        conflicts = 0
+        for vertex in AXIAL_CENTERS:
+            for positions in (AXIAL_CENTERS[vertex], TIPS[vertex]):
+                stickers = [state[p] for p in positions]
+                expected = [code[p // 9] for p in positions]
+                # Meilleure rotation de la pièce ; les stickers inconnus ne comptent pas
+                conflicts += min(
+                    sum(1 for s, e in zip(stickers, expected[t:] + expected[:t])
+                        if s in SOLVED_COLOURS and s != e)
+                    for t in range(3)
+                )
+        ranked.append((conflicts, code))
+    ranked.sort()
+    return ranked
+
+
+# --- RÉPARATION PAR CONTRAINTES (avant toute correction) ---
+
+def _piece_options(state, positions, expected):
+    """Rotations d'une pièce (centre ou tip) compatibles avec les stickers connus."""
+    return [expected[t:] + expected[:t] for t in range(3)
+            if all(state[p] not in SOLVED_COLOURS or state[p] == c
+                   for p, c in zip(positions, expected[t:] + expected[:t]))]
+
+
+def _edge_completion(flips, fixed):
+    """
+    Existe-t-il un placement des arêtes (permutation paire, somme des retournements paire)
+    respectant `flips` ({arête: retournements permis} par emplacement) et `fixed` (emplacement -> arête) ?
+    Recherche en profondeur qui s'arrête au premier placement trouvé.
+    """
+    n = len(flips)
+
+    def search(slot, used, perm):
+        if slot == n:
+            if permutation_parity(perm):
+                return False
+            allowed = [flips[s][home] for s, home in enumerate(perm)]
+            # Un emplacement libre de son retournement suffit à rendre la somme paire
+            return any(len(f) == 2 for f in allowed) or sum(f[0] for f in allowed) % 2 == 0
+        homes = [fixed[slot]] if slot in fixed else flips[slot]
+        for home in homes:
+            if home not in used:
+                perm.append(home)
+                if search(slot + 1, used | {home}, perm):
+                    return True
+                perm.pop()
+        return False
+
+    return search(0, frozenset(), [])
+
+
+def _edge_options(state, code):
+    """
+    Pour l'orientation `code` : couleurs possibles (1er sticker, 2e) de chaque emplacement d'arête,
+    en ne gardant que celles qui entrent dans au moins un placement valide. None si aucun.
+    """
+    slots = list(EDGES.values())
+    homes = [(code[a // 9], code[b // 9]) for a, b in slots]
+
+    # Pour chaque emplacement : {arête: retournements} compatibles avec les stickers connus
+    flips = []
+    for a, b in slots:
+        allowed = {}
+        for home, colours in enumerate(homes):
+            for flip in (0, 1):
+                if all(state[p] not in SOLVED_COLOURS or state[p] == c
+                       for p, c in zip((a, b), colours[::-1] if flip else colours)):
+                    allowed.setdefault(home, []).append(flip)
+        if not allowed:
+            return None
+        flips.append(allowed)
+
+    options = []
+    for slot, allowed in enumerate(flips):
+        colours = []
+        for home, home_flips in allowed.items():
+            if not _edge_completion(flips, {slot: home}):
+                continue
+            for flip in home_flips:
+                # Retournement imposé par la parité si aucun autre emplacement n'est libre : vérifié ici
+                if len(home_flips) == 2 and not _edge_completion(
+                        flips[:slot] + [{**allowed, home: [flip]}] + flips[slot + 1:], {slot: home}):
+                    continue
+                colours.append(homes[home][::-1] if flip else homes[home])
+        if not colours:
+            return None
+        options.append(colours)
+    return options
+
+
+def repair_state(state):
+    """
+    Répare un scan avec les contraintes des pièces, sans table : 9 stickers de chaque couleur,
+    centres et tips aux couleurs de leur sommet, arêtes = paires de couleurs valides en
+    permutation et orientation paires. Chaque '?' (ou caractère inconnu) dont une seule
+    couleur est possible est rempli.
+    Retourne (état, statut, raison) ; statut :
+        "valid"      scan complet et possible ;
+        "repaired"   tous les inconnus ont été déduits ;
+        "partial"    possible, mais des inconnus restent ambigus (remplis autant que possible) ;
+        "impossible" aucun état valide ne correspond aux stickers connus (raison donnée).
+    """
+    if len(state) != 36:
+        return state, "impossible", "longueur incorrecte"
+
+    for colour in SOLVED_COLOURS:
+        if state.count(colour) > 9:
+            return state, "impossible", f"{state.count(colour)} stickers '{colour}' (9 attendus)"
+
+    # Couleurs encore possibles pour chaque sticker, toutes orientations compatibles confondues
+    possible = [set() for _ in range(36)]
+    reason = "centres incohérents"
+    for code in ORIENTATIONS:
+        pieces = []
+        for vertex in AXIAL_CENTERS:
+            for positions in (AXIAL_CENTERS[vertex], TIPS[vertex]):
+                options = _piece_options(state, positions, tuple(code[p // 9] for p in positions))
+                if not options:
+                    break
+                pieces.append((positions, options))
+            else:
+                continue
+            break
+        else:
+            edge_options = _edge_options(state, code)
+            if edge_options is None:
+                reason = "arêtes incohérentes"
+                continue
+            for positions, options in pieces:
+                for colours in options:
+                    for p, c in zip(positions, colours):
+                        possible[p].add(c)
+            for (a, b), options in zip(EDGES.values(), edge_options):
+                for colour_a, colour_b in options:
+                    possible[a].add(colour_a)
+                    possible[b].add(colour_b)
+
+    if not possible[0]:
+        return state, "impossible", reason
+
+    repaired = "".join(next(iter(colours)) if len(colours) == 1 else c for c, colours in zip(state, possible))
+    if repaired == state and all(c in SOLVED_COLOURS for c in state):
+        return state, "valid", None
+    if all(len(colours) == 1 for colours in possible):
+        return repaired, "repaired", None
+    return repaired, "partial", None
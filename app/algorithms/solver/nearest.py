@@ -0,0 +1,195 @@
+"""
+Correction d'un scan par l'état valide le plus proche, sans parcourir la table.
+
+La table canonique contient exactement les 933 120 états de rang 0..N_STATES-1, et un rang
+est le produit de deux coordonnées indépendantes (voir pyraminx.unrank_state) :
+    - arêtes (permutation paire x orientations) : 11 520 valeurs, 12 stickers ;
+    - twists des 4 centres axiaux : 81 valeurs, 24 stickers (centres + tips alignés).
+Chaque sticker ne dépend que de l'une des deux. La distance (stickers différents hors jokers)
+d'un état valide au scan est donc la somme d'une distance « arêtes » et d'une distance
+« centres », minimisées séparément sur 11 520 + 81 lignes au lieu de 933 120 entrées.
+
+Tips libres (`free_tips=True`) : sur le puzzle, chaque tip tourne indépendamment de son
+centre (invariants.repair_state, solver.apply_tip_fixes). La coordonnée « centres » devient
+alors twist des centres x rotation des 4 tips : 81 x 81 lignes sur les mêmes 24 stickers,
+le reste est inchangé. Sans l'option, les tips restent alignés comme dans la table.
+
+Mêmes conventions que corrector_helper.c : '?', '.', '_' sont des jokers, une couleur
+inconnue compte comme 'r', et en cas d'égalité l'état retenu est le premier dans l'ordre
+des clés de la table (chiffres base 4 "rgby").
+"""
+import numpy as np
+
+from .pyraminx import (EDGES, TIPS, N_EDGE_PERMS, N_EDGE_FLIPS, N_CENTER_TWISTS, SOLVED_COLOURS,
+                       unrank_state)
+
+# Chiffres des clés de la table (pack_state en C) et jokers
+COLOR_CHARS = "rgby"
+WILDCARDS = "?._"
+
+# Stickers des arêtes ; tous les autres (centres axiaux et tips) suivent les twists des centres
+EDGE_POSITIONS = np.array(sorted(p for pair in EDGES.values() for p in pair))
+CENTER_POSITIONS = np.array(sorted(set(range(36)) - set(EDGE_POSITIONS.tolist())))
+
+N_EDGE_COORDS = N_EDGE_PERMS * N_EDGE_FLIPS
+
+# Rotations des 4 tips quand ils sont libres : 3 par tip
+N_TIP_TWISTS = 3 ** len(TIPS)
+
+# Pas entre deux coordonnées d'arêtes consécutives dans l'espace des rangs
+N_STATES_STEP = N_CENTER_TWISTS
+
+# Colonne de chaque position dans les tableaux de coordinate_colours()
+_EDGE_COLUMN = {p: i for i, p in enumerate(EDGE_POSITIONS.tolist())}
+_CENTER_COLUMN = {p: i for i, p in enumerate(CENTER_POSITIONS.tolist())}
+
+# Tables calculées au premier appel, par modèle des tips (free_tips)
+_COORD_COLOURS = {}
+_MISMATCHES = {}
+_ONEHOTS = {}
+
+
+def _free_tip_colours(center_colours):
+    """
+    Lignes twist * N_TIP_TWISTS + rotations des tips (chiffre base 3 par tip, dans l'ordre de
+    TIPS) : la rotation t d'un tip place en k la couleur alignée de k + t, comme _piece_options.
+    """
+    colours = np.repeat(center_colours, N_TIP_TWISTS, axis=0)
+    combos = np.tile(np.arange(N_TIP_TWISTS), N_CENTER_TWISTS)
+    for i, positions in enumerate(TIPS.values()):
+        columns = np.array([_CENTER_COLUMN[p] for p in positions])
+        twists = combos // 3 ** i % 3
+        for t in (1, 2):
+            rows = np.flatnonzero(twists == t)
+            colours[np.ix_(rows, columns)] = colours[np.ix_(rows, np.roll(columns, -t))]
+    return colours
+
+
+def coordinate_colours(free_tips=False):
+    """
+    Chiffres (0..3, ordre COLOR_CHARS) des stickers de chaque coordonnée, calculés au premier appel :
+    (N_EDGE_COORDS, 12) pour les arêtes, (N_CENTER_TWISTS, 24) pour les centres
+    ((N_CENTER_TWISTS * N_TIP_TWISTS, 24) avec `free_tips`).
+    """
+    if free_tips not in _COORD_COLOURS:
+        if free_tips:
+            edge_colours, center_colours = coordinate_colours()
+            _COORD_COLOURS[True] = (edge_colours, _free_tip_colours(center_colours))
+        else:
+            lut = np.zeros(256, dtype=np.uint8)
+            for code, c in enumerate(COLOR_CHARS):
+                lut[ord(c)] = code
+
+            def digits(ranks, positions):
+                states = "".join(unrank_state(rank, SOLVED_COLOURS) for rank in ranks).encode("ascii")
+                return lut[np.frombuffer(states, dtype=np.uint8).reshape(-1, 36)][:, positions]
+
+            _COORD_COLOURS[False] = (digits(range(0, N_STATES_STEP * N_EDGE_COORDS, N_STATES_STEP),
+                                            EDGE_POSITIONS),
+                                     digits(range(N_CENTER_TWISTS), CENTER_POSITIONS))
+    return _COORD_COLOURS[free_tips]
+
+
+def mismatch_tables(free_tips=False):
+    """
+    Pour chaque sticker (colonne) et chaque chiffre lu, 1 sur les coordonnées qui ne l'ont pas :
+    (12 * 4, N_EDGE_COORDS) et (24 * 4, coordonnées des centres). Une distance est une somme de lignes.
+    """
+    if free_tips not in _MISMATCHES:
+        _MISMATCHES[free_tips] = tuple(
+            (colours.T[:, None, :] != np.arange(4, dtype=np.uint8)[None, :, None])
+            .reshape(-1, len(colours)).astype(np.uint8)
+            for colours in coordinate_colours(free_tips))
+    return _MISMATCHES[free_tips]
+
+
+def coordinate_onehots(free_tips=False):
+    """
+    1.0 là où chaque coordonnée porte chaque chiffre, par sticker : (N_EDGE_COORDS, 12 * 4) et
+    (coordonnées des centres, 24 * 4). Un score additif par sticker et couleur devient un produit matriciel.
+    """
+    if free_tips not in _ONEHOTS:
+        _ONEHOTS[free_tips] = tuple(
+            (colours[:, :, None] == np.arange(4, dtype=np.uint8)).reshape(len(colours), -1).astype(np.float32)
+            for colours in coordinate_colours(free_tips))
+    return _ONEHOTS[free_tips]
+
+
+def coordinate_log_likelihoods(log_probs, free_tips=False):
+    """
+    `log_probs` (36, 4) : log-probabilité de chaque chiffre (COLOR_CHARS) à chaque position.
+    Retourne la log-vraisemblance de chaque coordonnée d'arêtes et de chaque coordonnée des
+    centres : celle de l'état coordinate_state(arêtes, centres) est leur somme.
+    """
+    log_probs = np.asarray(log_probs, dtype=np.float32)
+    return [onehot @ log_probs[positions].ravel()
+            for onehot, positions in zip(coordinate_onehots(free_tips), (EDGE_POSITIONS, CENTER_POSITIONS))]
+
+
+def parse_target(state_str):
+    """Chaîne du scan -> (chiffres, connus) : deux tableaux de 36, `connus` à False sur les jokers."""
+    digits = np.array([COLOR_CHARS.index(c) if c in COLOR_CHARS else 0 for c in state_str], dtype=np.uint8)
+    known = np.array([c not in WILDCARDS for c in state_str], dtype=bool)
+    return digits, known
+
+
+def part_distances(digits, known, part, free_tips=False):
+    """
+    Distances au scan de chaque coordonnée d'une part : 0 pour les arêtes, 1 pour les centres.
+    `digits` peut être un lot (n, 36) de lectures ayant les mêmes jokers : résultat (n, coordonnées).
+    """
+    mismatches, positions = mismatch_tables(free_tips)[part], (EDGE_POSITIONS, CENTER_POSITIONS)[part]
+    columns = np.flatnonzero(known[positions])
+    rows = mismatches[columns * 4 + digits[..., positions][..., columns]]
+    # 24 stickers au plus : la somme tient sur un octet
+    return rows.sum(axis=-2, dtype=np.uint8)
+
+
+def coordinate_distances(digits, known, free_tips=False):
+    """Distances au scan de chaque coordonnée d'arêtes et de chaque coordonnée des centres."""
+    return [part_distances(digits, known, part, free_tips) for part in (0, 1)]
+
+
+def first_key(edge_rows, center_rows, free_tips=False):
+    """
+    Plus petite clé du produit edge_rows x center_rows : ordre lexicographique des 36 chiffres,
+    chaque position ne restreignant que l'ensemble (arêtes ou centres) dont elle dépend.
+    """
+    edge_colours, center_colours = coordinate_colours(free_tips)
+    for p in range(36):
+        if len(edge_rows) == 1 and len(center_rows) == 1:
+            break
+        if p in _EDGE_COLUMN:
+            column = edge_colours[edge_rows, _EDGE_COLUMN[p]]
+            edge_rows = edge_rows[column == column.min()]
+        else:
+            column = center_colours[center_rows, _CENTER_COLUMN[p]]
+            center_rows = center_rows[column == column.min()]
+    return int(edge_rows[0]), int(center_rows[0])
+
+
+def coordinate_state(edge_coord, center_coord, free_tips=False):
+    """État (couleurs SOLVED_COLOURS) d'une coordonnée d'arêtes et d'une coordonnée des centres."""
+    if not free_tips:
+        return unrank_state(edge_coord * N_STATES_STEP + center_coord)
+    state = list(unrank_state(edge_coord * N_STATES_STEP + center_coord // N_TIP_TWISTS))
+    for p, digit in zip(CENTER_POSITIONS.tolist(), coordinate_colours(True)[1][center_coord]):
+        state[p] = COLOR_CHARS[digit]
+    return "".join(state)
+
+
+def nearest_valid_state(state_str, free_tips=False):
+    """
+    État valide (couleurs SOLVED_COLOURS) le plus proche du scan et sa distance, ou None si la
+    chaîne ne fait pas 36 caractères. Même résultat que corrector_helper.c sur la table complète ;
+    avec `free_tips`, les tips gardent la rotation lue au lieu d'être réalignés.
+    """
+    if len(state_str) != 36:
+        return None
+
+    edge_distances, center_distances = coordinate_distances(*parse_target(state_str), free_tips)
+    edge_best, center_best = edge_distances.min(), center_distances.min()
+
+    edge_coord, center_coord = first_key(np.flatnonzero(edge_distances == edge_best),
+                                         np.flatnonzero(center_distances == center_best), free_tips)
+    return coordinate_state(edge_coord, center_coord, free_tips), int(edge_best + center_best)
@@ -0,0 +1,162 @@
+"""
+Choix de la solution la plus rapide à exécuter par le robot.
+
+Tous les coups ne coûtent pas le même temps sur le banc (robot/controller.c) :
+chaque coup fait STEPS_PER_MOVE pas puis attend WAIT_TIME_SEC, et passer des faces
+(servo 0°) aux tips (servo 45°) ajoute une attente du servo. Parmi toutes les solutions
+optimales (ou optimales + `slack` coups) de la table, on garde celle dont la durée
+modélisée est la plus faible.
+
+Les solutions ne sont pas listées une à une : une programmation dynamique sur
+(rang, coups restants, coup précédent) parcourt le graphe de toutes ces solutions,
+guidée par la distance exacte de chaque état (longueur de sa chaîne dans la table).
+Les tips sont indépendants des faces : on essaie de les jouer avant ou après.
+"""
+import json
+import os
+
+from .pyraminx import rank_state, unrank_state, apply_move_to_rank, INVERSE_MOVES
+from .engine import (RankTable, MOVE_NAMES, START_CODE, RANK_START_CODE, RANK_EMPTY_CODE,
+                     pack_state, MAX_PATH_LENGTH)
+
+# Coups de face au format de sortie de solve() : "U" = up(1), "U'" = up(0), ...
+FACE_TOKENS = [m.replace("`", "'") for m in MOVE_NAMES]
+
+
+class RobotCostModel:
+    """Durée d'exécution d'une séquence, calquée sur arduino() de robot/controller.c."""
+
+    def __init__(self, steps_per_move=67, delay_step_sec=0.01, wait_time_sec=0.5,
+                 servo_wait_sec=0.5, reversal_sec=0.0, motor_steps=None):
+        self.steps_per_move = steps_per_move
+        self.delay_step_sec = delay_step_sec
+        self.wait_time_sec = wait_time_sec
+        self.servo_wait_sec = servo_wait_sec
+        # Jeu mécanique quand un même moteur repart dans l'autre sens (0 sur le banc actuel)
+        self.reversal_sec = reversal_sec
+        # Pas par moteur ("U", "R", "L", "B") si un moteur diffère de STEPS_PER_MOVE
+        self.motor_steps = motor_steps or {}
+
+    @classmethod
+    def from_file(cls, config_path):
+        """Modèle lu depuis un JSON (mêmes clés que le constructeur) ; valeurs par défaut sinon."""
+        if not os.path.exists(config_path):
+            return cls()
+        with open(config_path) as f:
+            return cls(**json.load(f))
+
+    def to_dict(self):
+        return {
+            "steps_per_move": self.steps_per_move, "delay_step_sec": self.delay_step_sec,
+            "wait_time_sec": self.wait_time_sec, "servo_wait_sec": self.servo_wait_sec,
+            "reversal_sec": self.reversal_sec, "motor_steps": self.motor_steps,
+        }
+
+    def transition(self, previous, token):
+        """Durée de `token` (ex: "U", "r'") joué juste après `previous` (None au départ)."""
+        # Le contrôleur met le servo à 0° au démarrage : départ comme après un coup de face
+        previous_tip = previous is not None and previous[0].islower()
+        cost = self.servo_wait_sec if token[0].islower() != previous_tip else 0.0
+
+        motor = token[0].upper()
+        if (previous is not None and previous[0].upper() == motor
+                and previous.endswith("'") != token.endswith("'")):
+            cost += self.reversal_sec
+
+        steps = self.motor_steps.get(motor, self.steps_per_move)
+        return cost + steps * self.delay_step_sec + self.wait_time_sec
+
+    def sequence_time(self, tokens, previous=None):
+        """Durée des coups `tokens` enchaînés après `previous`, sans les attentes fixes."""
+        total = 0.0
+        for token in tokens:
+            total += self.transition(previous, token)
+            previous = token
+        return total
+
+    def estimate(self, tokens):
+        """Durée totale d'une séquence (liste de coups), servo initial et final compris."""
+        if not tokens:
+            return 0.0
+        return self.servo_wait_sec + self.sequence_time(tokens) + self.servo_wait_sec
+
+
+def _table_code(table, rank):
+    """Code (convention .rank : 0..7, START = 8, sinon absent) du rang dans la table."""
+    if isinstance(table, RankTable):
+        return table.code(rank)
+    code = table.find(pack_state(unrank_state(rank)))
+    if code == START_CODE:
+        return RANK_START_CODE
+    return RANK_EMPTY_CODE if code is None else code
+
+
+class _Distances:
+    """Distance exacte au résolu de chaque rang (longueur de sa chaîne dans la table), mémorisée."""
+
+    def __init__(self, table):
+        self.table = table
+        self.known = {}
+        self._inverse = [MOVE_NAMES.index(INVERSE_MOVES[m]) for m in MOVE_NAMES]
+
+    def __call__(self, rank):
+        chain = []
+        while rank not in self.known:
+            code = _table_code(self.table, rank)
+            if code == RANK_START_CODE:
+                self.known[rank] = 0
+                break
+            if code >= len(MOVE_NAMES) or len(chain) > MAX_PATH_LENGTH:
+                return None
+            chain.append(rank)
+            rank = apply_move_to_rank(rank, self._inverse[code])
+
+        distance = self.known[rank]
+        for previous in reversed(chain):
+            distance += 1
+            self.known[previous] = distance
+        return distance
+
+
+def plan_robot_solution(canonical_state, tip_tokens, model, table, slack=1):
+    """
+    Solution la plus rapide pour le robot d'un état canonique aux tips alignés.
+    `tip_tokens` : coups de tips au format de sortie (ex: ["u", "r'"]).
+    Retourne (liste de coups, durée estimée), ou None si l'état n'est pas dans la table.
+    """
+    start = rank_state(canonical_state)
+    distance = _Distances(table)
+    if start is None or distance(start) is None:
+        return None
+
+    best = None
+    for tips_first in (True, False):
+        memo = {}
+
+        def cheapest(rank, budget, previous):
+            """(durée, coups) de la fin la moins chère depuis `rank` en au plus `budget` coups."""
+            if rank == 0:
+                tail = [] if tips_first else tip_tokens
+                return model.sequence_time(tail, previous), tail
+            key = (rank, budget, previous)
+            if key not in memo:
+                found = None
+                for m, token in enumerate(FACE_TOKENS):
+                    child = apply_move_to_rank(rank, m)
+                    child_distance = distance(child)
+                    if child_distance is None or child_distance > budget - 1:
+                        continue
+                    cost, rest = cheapest(child, budget - 1, token)
+                    cost += model.transition(previous, token)
+                    if found is None or cost < found[0]:
+                        found = (cost, [token] + rest)
+                memo[key] = found
+            return memo[key]
+
+        head = tip_tokens if tips_first else []
+        _, tokens = cheapest(start, distance(start) + slack, head[-1] if head else None)
+        tokens = head + tokens
+        if best is None or model.estimate(tokens) < best[1]:
+            best = (tokens, model.estimate(tokens))
+
+    return best
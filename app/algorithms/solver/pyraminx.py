@@ -1,3 +1,6 @@
+from operator import itemgetter
+
+
 class Pyraminx:
     def __init__(self, colours=["r", "y", "g", "b"], state=None):
         self.rotateNumber = 0 # Initialisation inconditionnelle de rotateNumber
@@ -48,6 +51,10 @@ class Pyraminx:
         new_obj.rotateNumber = self.rotateNumber
         return new_obj
 
+    def rank(self):
+        """Rang parfait de l'état (voir rank_state), tips ignorés."""
+        return rank_state(self.stringify())
+
     def show(self):
         # (Ton code d'affichage reste identique, je ne le répète pas ici pour gagner de la place)
         print(
@@ -166,8 +173,331 @@ class Pyraminx:
         newState.cube[3][4] = old_bottom[8]
 
         return newState
-        
-    
+
+
+# --- MOUVEMENTS SOUS FORME DE PERMUTATIONS D'INDICES ---
+# nouvel_etat[i] = ancien_etat[perm[i]] sur la chaîne de 36 caractères.
+# Les noms et l'ordre suivent generateBFS.MOVE_MAP : "U" = up(1), "U`" = up(0), etc.
+
+def _build_move_permutation(move, *direction):
+    """Déduit la permutation d'un mouvement en l'appliquant à un cube d'indices."""
+    probe = Pyraminx()
+    probe.cube = [[face * 9 + i for i in range(9)] for face in range(4)]
+    moved = getattr(probe, move)(*direction)
+    return tuple(i for face in moved.cube for i in face)
+
+MOVE_PERMUTATIONS = {
+    letter + ("" if direction else "`"): _build_move_permutation(move, direction)
+    for letter, move in (("U", "up"), ("R", "right"), ("L", "left"), ("B", "back"))
+    for direction in (1, 0)
+}
+
+# Rotation du puzzle entier, celle de l'auto-orientation du constructeur
+ROTATION_PERMUTATION = _build_move_permutation("rotate")
+
+# Mouvement qui annule chaque mouvement (X <-> X`)
+INVERSE_MOVES = {m: (m[0] if m.endswith("`") else m + "`") for m in MOVE_PERMUTATIONS}
+
+_STRING_GETTERS = {name: itemgetter(*perm) for name, perm in MOVE_PERMUTATIONS.items()}
+
+def apply_move(state, move):
+    """Applique un mouvement (nom de table) à une chaîne d'état, sans objet Pyraminx."""
+    return "".join(_STRING_GETTERS[move](state))
+
+
+# --- GÉOMÉTRIE DES PIÈCES (indices dans la chaîne de 36) ---
+# Faces : 0 = avant, 1 = droite, 2 = gauche, 3 = bas (face = indice // 9).
+
+# Centres axiaux et tips, dans l'ordre du cycle de leur mouvement (voir up/right/left/back)
+AXIAL_CENTERS = {
+    "U": (2, 11, 20),   # faces 0, 1, 2
+    "R": (7, 34, 14),   # faces 0, 3, 1
+    "L": (5, 25, 32),   # faces 0, 2, 3
+    "B": (16, 29, 23),  # faces 1, 3, 2
+}
+TIPS = {
+    "U": (0, 9, 18),
+    "R": (8, 35, 13),
+    "L": (4, 26, 31),
+    "B": (17, 27, 22),
+}
+
+# La face opposée à chaque sommet (celle que le centre axial ne touche pas)
+OPPOSITE_FACE = {"U": 3, "R": 2, "L": 1, "B": 0}
+
+# Les 6 arêtes (2 stickers chacune), nommées par les deux couches qui les déplacent
+EDGES = {
+    "RU": (3, 10),
+    "LU": (1, 21),
+    "BU": (12, 19),
+    "LR": (6, 33),
+    "BR": (15, 30),
+    "BL": (24, 28),
+}
+
+# Couleurs des faces 0..3 de Pyraminx() (état résolu de référence)
+SOLVED_COLOURS = "rygb"
+
+
+def permutation_parity(sequence):
+    """0 si la permutation (liste d'entiers 0..n-1) est paire, 1 sinon."""
+    seen = [False] * len(sequence)
+    parity = 0
+    for start in range(len(sequence)):
+        length = 0
+        i = start
+        while not seen[i]:
+            seen[i] = True
+            i = sequence[i]
+            length += 1
+        if length:
+            parity ^= (length - 1) & 1
+    return parity
+
+
+def piece_twist(stickers, expected):
+    """Rotation t (0, 1, 2) telle que stickers == expected décalé de t, sinon None."""
+    for t in range(3):
+        if stickers == expected[t:] + expected[:t]:
+            return t
+    return None
+
+
+def edge_pieces(state, scheme=SOLVED_COLOURS):
+    """
+    Pour chaque emplacement d'arête (ordre de EDGES) : (indice de l'arête qui s'y trouve,
+    retournement 0/1). None si une paire de couleurs ne correspond à aucune arête.
+    """
+    slots = list(EDGES.values())
+    homes = [frozenset((scheme[a // 9], scheme[b // 9])) for a, b in slots]
+
+    pieces = []
+    for a, b in slots:
+        colours = frozenset((state[a], state[b]))
+        if colours not in homes:
+            return None
+        home = homes.index(colours)
+        # Retournement : le premier sticker porte-t-il la couleur de la face d'origine ?
+        flip = 0 if state[a] == scheme[slots[home][0] // 9] else 1
+        pieces.append((home, flip))
+    return pieces
+
+
+# --- ÉTAT COMPACT ---
+# Boucle interne de la génération BFS, de la remontée des tables et de test_sequence :
+# 36 octets immuables, chaque coup est une seule permutation d'indices (itemgetter, en C).
+# Les conversions vers chaîne / Pyraminx ne se font qu'aux extrémités.
+
+def _tip_permutation(positions, direction):
+    """Permutation d'un coup de tip, comme test_sequence (1 = rotateRight, 0 = rotateLeft)."""
+    perm = list(range(36))
+    a, b, c = positions
+    perm[a], perm[b], perm[c] = (b, c, a) if direction else (c, a, b)
+    return tuple(perm)
+
+# Coups de tips "u", "u`", ... (même convention de noms que MOVE_PERMUTATIONS)
+TIP_PERMUTATIONS = {
+    vertex.lower() + ("" if direction else "`"): _tip_permutation(TIPS[vertex], direction)
+    for vertex in TIPS
+    for direction in (1, 0)
+}
+
+_MOVE_GETTERS = {name: itemgetter(*perm)
+                 for name, perm in {**MOVE_PERMUTATIONS, **TIP_PERMUTATIONS}.items()}
+_MOVE_GETTERS.update({name.replace("`", "'"): getter for name, getter in list(_MOVE_GETTERS.items())})
+_FACE_GETTERS = [(name, _MOVE_GETTERS[name]) for name in MOVE_PERMUTATIONS]
+
+_SOLVED_BYTES = "".join(c * 9 for c in SOLVED_COLOURS).encode("ascii")
+# Couleur -> chiffre en base 4 ; tout autre octet compte pour 'r' (0), comme en C
+_BASE4_BYTES = bytes(b"0123"[b"rgby".index(i)] if i in b"rgby" else ord("0") for i in range(256))
+
+
+class PackedState:
+    """État de 36 couleurs dans un `bytes` ; coups par permutations précalculées."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data=_SOLVED_BYTES):
+        self.data = data
+
+    @classmethod
+    def from_string(cls, state):
+        return cls(state.encode("ascii"))
+
+    @classmethod
+    def from_pyraminx(cls, cube):
+        return cls.from_string(cube.stringify())
+
+    def __str__(self):
+        return self.data.decode("ascii")
+
+    def __repr__(self):
+        return f"PackedState({str(self)!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, PackedState) and self.data == other.data
+
+    def __hash__(self):
+        return hash(self.data)
+
+    def to_pyraminx(self):
+        """Objet Pyraminx équivalent (sans l'auto-rotation du constructeur)."""
+        cube = Pyraminx()
+        state = str(self)
+        cube.cube = [list(state[i * 9:(i + 1) * 9]) for i in range(4)]
+        return cube
+
+    def move(self, name):
+        """Nouvel état après un coup : "U", "U`" ou "U'", tips "u", "u`" ou "u'"."""
+        return PackedState(bytes(_MOVE_GETTERS[name](self.data)))
+
+    def neighbours(self):
+        """(nom du coup, état) pour les 8 coups de face, dans l'ordre de MOVE_PERMUTATIONS."""
+        data = self.data
+        return [(name, PackedState(bytes(getter(data)))) for name, getter in _FACE_GETTERS]
+
+    def solved(self):
+        return all(self.data[i:i + 9] == self.data[i:i + 1] * 9 for i in range(0, 36, 9))
+
+    def pack(self):
+        """Clé de 9 octets des tables .bin (2 bits par couleur, r=0, g=1, b=2, y=3)."""
+        return int(self.data.translate(_BASE4_BYTES), 4).to_bytes(9, byteorder="big")
+
+
+# --- RANG PARFAIT D'UN ÉTAT (SANS LES TIPS) ---
+# rang = (permutation paire des arêtes * 32 + orientation des arêtes) * 81 + torsion des centres
+# 360 permutations paires x 2^5 orientations x 3^4 centres = 933 120 états, tous atteignables.
+N_EDGE_PERMS = 360
+N_EDGE_FLIPS = 32
+N_CENTER_TWISTS = 81
+N_STATES = N_EDGE_PERMS * N_EDGE_FLIPS * N_CENTER_TWISTS
+
+
+def _lex_rank(perm):
+    """Rang lexicographique d'une permutation de 0..n-1."""
+    items = list(range(len(perm)))
+    rank = 0
+    for i, p in enumerate(perm):
+        idx = items.index(p)
+        rank = rank * (len(perm) - i) + idx
+        items.pop(idx)
+    return rank
+
+
+def _lex_unrank(rank, n):
+    """Permutation de 0..n-1 de rang lexicographique `rank`."""
+    digits = []
+    for base in range(1, n + 1):
+        rank, digit = divmod(rank, base)
+        digits.append(digit)
+    items = list(range(n))
+    return [items.pop(d) for d in reversed(digits)]
+
+
+def state_coordinates(state, scheme=SOLVED_COLOURS):
+    """(permutation, orientation, centres) d'un état, ou None s'il est invalide."""
+    pieces = edge_pieces(state, scheme)
+    if pieces is None:
+        return None
+
+    perm = [home for home, _ in pieces]
+    flips = [flip for _, flip in pieces]
+    if len(set(perm)) != len(perm) or permutation_parity(perm) or sum(flips) % 2:
+        return None
+
+    # Une permutation et sa voisine lexicographique (2 derniers échangés) sont de parités
+    # opposées : le rang des permutations paires est donc le rang lexicographique // 2
+    perm_coord = _lex_rank(perm) >> 1
+    flip_coord = sum(f << i for i, f in enumerate(flips[:-1]))
+
+    center_coord = 0
+    for positions in AXIAL_CENTERS.values():
+        twist = piece_twist(tuple(state[p] for p in positions),
+                            tuple(scheme[p // 9] for p in positions))
+        if twist is None:
+            return None
+        center_coord = center_coord * 3 + twist
+
+    return perm_coord, flip_coord, center_coord
+
+
+def rank_state(state, scheme=SOLVED_COLOURS):
+    """Rang parfait (0 .. N_STATES-1) d'un état, tips ignorés ; None si invalide."""
+    coords = state_coordinates(state, scheme)
+    if coords is None:
+        return None
+    perm_coord, flip_coord, center_coord = coords
+    return (perm_coord * N_EDGE_FLIPS + flip_coord) * N_CENTER_TWISTS + center_coord
+
+
+def unrank_state(rank, scheme=SOLVED_COLOURS):
+    """Chaîne de 36 chars de rang `rank` ; les tips sont alignés sur leur centre."""
+    rest, center_coord = divmod(rank, N_CENTER_TWISTS)
+    perm_coord, flip_coord = divmod(rest, N_EDGE_FLIPS)
+
+    perm = _lex_unrank(perm_coord << 1, 6)
+    if permutation_parity(perm):
+        perm[-1], perm[-2] = perm[-2], perm[-1]
+    flips = [(flip_coord >> i) & 1 for i in range(5)]
+    flips.append(sum(flips) % 2)
+
+    state = [scheme[i // 9] for i in range(36)]
+    slots = list(EDGES.values())
+    for (a, b), home, flip in zip(slots, perm, flips):
+        colours = (scheme[slots[home][0] // 9], scheme[slots[home][1] // 9])
+        state[a], state[b] = colours[::-1] if flip else colours
+
+    twists = []
+    for _ in AXIAL_CENTERS:
+        center_coord, twist = divmod(center_coord, 3)
+        twists.append(twist)
+    for vertex, twist in zip(AXIAL_CENTERS, reversed(twists)):
+        for positions in (AXIAL_CENTERS[vertex], TIPS[vertex]):
+            expected = [scheme[p // 9] for p in positions]
+            for p, colour in zip(positions, expected[twist:] + expected[:twist]):
+                state[p] = colour
+
+    return "".join(state)
+
+
+def _coordinate_move_table(size, make_state, coordinate):
+    """Table [coordonnée][mouvement] -> coordonnée, calculée via les chaînes d'état."""
+    table = []
+    for value in range(size):
+        state = make_state(value)
+        table.append(tuple(coordinate(apply_move(state, move)) for move in MOVE_PERMUTATIONS))
+    return table
+
+
+_MOVE_TABLES = None
+
+def coordinate_move_tables():
+    """
+    Tables de mouvements par coordonnée (calculées une fois, ~0.1 s).
+    Permutation, orientation et centres évoluent indépendamment : un coup se fait
+    en trois lectures de tableau, sans reconstruire la chaîne de 36 caractères.
+    """
+    global _MOVE_TABLES
+    if _MOVE_TABLES is None:
+        perm_of = lambda s: state_coordinates(s)[0]
+        flip_of = lambda s: state_coordinates(s)[1]
+        center_of = lambda s: state_coordinates(s)[2]
+        _MOVE_TABLES = (
+            _coordinate_move_table(N_EDGE_PERMS, lambda v: unrank_state(v * N_EDGE_FLIPS * N_CENTER_TWISTS), perm_of),
+            _coordinate_move_table(N_EDGE_FLIPS, lambda v: unrank_state(v * N_CENTER_TWISTS), flip_of),
+            _coordinate_move_table(N_CENTER_TWISTS, unrank_state, center_of),
+        )
+    return _MOVE_TABLES
+
+
+def apply_move_to_rank(rank, move_index):
+    """Applique le mouvement n° move_index (ordre de MOVE_PERMUTATIONS) à un rang."""
+    perm_moves, flip_moves, center_moves = coordinate_move_tables()
+    rest, center_coord = divmod(rank, N_CENTER_TWISTS)
+    perm_coord, flip_coord = divmod(rest, N_EDGE_FLIPS)
+    return ((perm_moves[perm_coord][move_index] * N_EDGE_FLIPS + flip_moves[flip_coord][move_index])
+            * N_CENTER_TWISTS + center_moves[center_coord][move_index])
+
 
 
 
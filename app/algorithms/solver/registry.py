@@ -0,0 +1,261 @@
+"""
+Registre des tables BFS, construit une fois au démarrage de l'application.
+
+Le dossier BFS/ est parcouru une seule fois : chaque table (.rank, .bin, .cbin) est
+contrôlée (engine.verify_table, sans le parcours complet des clés), ouverte dans le
+moteur résident, et sa taille, son orientation et son nombre d'états sont notés.
+Les requêtes demandent ensuite au registre quel fichier interroger, sans toucher au disque.
+
+Préchargement optionnel : madvise(WILLNEED) puis lecture d'un octet par page pour que
+la première résolution ne paie pas les défauts de page, et mlock pour que le noyau ne
+les évince pas (limité par RLIMIT_MEMLOCK, voir `ulimit -l`).
+
+Remplacement à chaud : les tables sont versionnées,
+
+    BFS/versions/20261018-101500.042/rygb.rank, rygb.bin, ...
+    BFS/current -> versions/20261018-101500.042
+
+et `current` est remplacé atomiquement (os.replace d'un lien symbolique). Les requêtes en
+cours gardent leur référence à l'ancienne table (sa projection reste valide jusqu'à leur fin),
+les suivantes reçoivent la nouvelle. Sans `current`, les tables sont lues directement dans BFS/.
+"""
+import ctypes
+import ctypes.util
+import mmap
+import os
+import shutil
+import threading
+import time
+
+from .engine import default_engine, verify_table, PAGE_SIZE
+from .pyraminx import apply_move_to_rank
+from .nearest import mismatch_tables
+
+flask_path = 'algorithms/solver'
+
+# Ordre de préférence des formats pour une même table
+TABLE_FORMATS = ("rank", "bin", "cbin")
+
+# Dossiers des versions, lien vers la version servie, et dossier où la génération écrit
+VERSIONS_DIR = "versions"
+CURRENT_LINK = "current"
+STAGING_DIR = "staging"
+
+# Versions conservées sur disque (retour arrière possible), la version servie comprise
+KEEP_VERSIONS = 3
+
+
+def prefetch_file(table_path, lock=False):
+    """
+    Charge un fichier dans le cache de pages. Avec `lock`, le verrouille en mémoire (mlock) :
+    la projection retournée doit alors rester ouverte. Retourne (projection ou None, verrouillé).
+    """
+    with open(table_path, "rb") as f:
+        # ACCESS_COPY : projection privée inscriptible, nécessaire pour en prendre l'adresse (mlock)
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY if lock else mmap.ACCESS_READ)
+
+    if hasattr(mapping, "madvise"):
+        mapping.madvise(mmap.MADV_WILLNEED)
+    # Lecture effective de chaque page : le préchargement est terminé au retour
+    for offset in range(0, len(mapping), PAGE_SIZE):
+        mapping[offset]
+
+    if not lock:
+        mapping.close()
+        return None, False
+
+    locked = False
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        address = ctypes.addressof(ctypes.c_char.from_buffer(mapping))
+        locked = libc.mlock(ctypes.c_void_p(address), ctypes.c_size_t(len(mapping))) == 0
+        if not locked:
+            print(f"mlock impossible pour {table_path} : {os.strerror(ctypes.get_errno())}")
+    except (OSError, AttributeError, TypeError) as e:
+        print(f"mlock indisponible : {e}")
+    return mapping, locked
+
+
+def scan_tables(table_dir):
+    """Contrôle rapide (sans parcours des clés) de chaque table du dossier : {(nom, format): entrée}."""
+    tables = {}
+    names = sorted(os.listdir(table_dir)) if os.path.isdir(table_dir) else []
+    for filename in names:
+        name, _, fmt = filename.rpartition(".")
+        if fmt not in TABLE_FORMATS:
+            continue
+        table_path = os.path.join(table_dir, filename)
+        report = verify_table(table_path, deep=False)
+        tables[(name, fmt)] = {
+            "name": name, "format": fmt, "path": table_path,
+            "size": os.path.getsize(table_path), "orientation": report.get("orientation", name),
+            "count": report["count"], "max_depth": report["max_depth"],
+            "valid": not report["errors"], "errors": report["errors"],
+            "prefetched": False, "locked": False,
+        }
+    return tables
+
+
+class TableRegistry:
+    """Tables valides de la version servie, par nom (ex: "rygb") et format."""
+
+    def __init__(self, root, engine=default_engine):
+        self.root = root
+        self.engine = engine
+        self.version = None
+        self.table_dir = root
+        self.tables = {}
+        self.scanned_at = None
+        self.scan_seconds = None
+        self.swapped_at = None
+        self._locked = []
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+
+    @property
+    def ready(self):
+        """Le registre a été construit et contient au moins une table valide."""
+        return self.scanned_at is not None and any(t["valid"] for t in self.tables.values())
+
+    def current_version(self):
+        """Version pointée par `current` (None : tables directement dans le dossier racine)."""
+        link = os.path.join(self.root, CURRENT_LINK)
+        if not os.path.islink(link):
+            return None
+        return os.path.basename(os.path.normpath(os.readlink(link)))
+
+    def versions(self):
+        """Versions présentes sur disque, de la plus ancienne à la plus récente."""
+        versions_dir = os.path.join(self.root, VERSIONS_DIR)
+        if not os.path.isdir(versions_dir):
+            return []
+        return sorted(v for v in os.listdir(versions_dir) if os.path.isdir(os.path.join(versions_dir, v)))
+
+    def scan(self, prefetch=False, lock=False):
+        """(Re)construit le registre : contrôle, ouverture et préchargement de chaque table."""
+        start = time.time()
+        # Chemin réel de la version (et non BFS/current/...) : le moteur indexe ses tables par chemin
+        version = self.current_version()
+        table_dir = self.root if version is None else os.path.join(self.root, VERSIONS_DIR, version)
+        tables, mappings = scan_tables(table_dir), []
+        for entry in tables.values():
+            if entry["valid"]:
+                self.engine.table(entry["path"])
+                if prefetch or lock:
+                    mapping, entry["locked"] = prefetch_file(entry["path"], lock)
+                    entry["prefetched"] = True
+                    if mapping is not None:
+                        mappings.append(mapping)
+            else:
+                print(f"Table ignorée : {entry['path']} ({'; '.join(entry['errors'])})")
+
+        # Tables de mouvements des rangs (RankTable.walk) et du correcteur calculées dès maintenant
+        apply_move_to_rank(0, 0)
+        mismatch_tables()
+        mismatch_tables(free_tips=True)
+
+        with self._lock:
+            previous, self._locked = self._locked, mappings
+            replaced = [e["path"] for e in self.tables.values() if e["path"] not in
+                        {entry["path"] for entry in tables.values()}]
+            self.version, self.table_dir, self.tables = version, table_dir, tables
+            self.scanned_at = time.time()
+            self.scan_seconds = round(self.scanned_at - start, 3)
+        # Les fichiers verrouillés par le scan précédent sont libérés (munmap les déverrouille)
+        for mapping in previous:
+            mapping.close()
+        # Tables de l'ancienne version retirées du moteur : les requêtes en cours gardent
+        # leur référence, la projection est libérée quand la dernière se termine
+        self.engine.forget(replaced)
+        print(f"Registre des tables : {sum(t['valid'] for t in tables.values())} table(s) valide(s) "
+              f"en {self.scan_seconds}s")
+        return self
+
+    def path(self, name, formats=TABLE_FORMATS):
+        """Fichier à interroger pour la table `name` (premier format valide de `formats`), ou None."""
+        if self.scanned_at is None:
+            # Registre non construit (scripts, tests) : on regarde le disque
+            version = self.current_version()
+            table_dir = self.root if version is None else os.path.join(self.root, VERSIONS_DIR, version)
+            for fmt in formats:
+                table_path = os.path.join(table_dir, f"{name}.{fmt}")
+                if os.path.exists(table_path):
+                    return table_path
+            return None
+
+        for fmt in formats:
+            entry = self.tables.get((name, fmt))
+            if entry is not None and entry["valid"]:
+                return entry["path"]
+        return None
+
+    def swap(self, version, prefetch=False, lock=False):
+        """
+        Sert la version `version` : ses tables sont contrôlées, puis `current` est remplacé
+        atomiquement et le registre reconstruit. Lève FileNotFoundError (version inconnue)
+        ou ValueError (aucune table valide) sans rien changer.
+        """
+        version_dir = os.path.join(self.root, VERSIONS_DIR, version)
+        if os.path.basename(os.path.normpath(version)) != version or not os.path.isdir(version_dir):
+            raise FileNotFoundError(f"Version inconnue : {version}")
+
+        with self._swap_lock:
+            if not any(entry["valid"] for entry in scan_tables(version_dir).values()):
+                raise ValueError(f"Aucune table valide dans la version {version}")
+
+            # Nouveau lien créé à côté puis renommé par-dessus l'ancien : jamais de `current` absent
+            link = os.path.join(self.root, CURRENT_LINK)
+            tmp_link = f"{link}.tmp"
+            if os.path.lexists(tmp_link):
+                os.remove(tmp_link)
+            os.symlink(os.path.join(VERSIONS_DIR, version), tmp_link)
+            os.replace(tmp_link, link)
+
+            previous = self.version
+            self.scan(prefetch, lock)
+            self.swapped_at = time.time()
+        print(f"Tables : version {previous} -> {version}")
+        return {"previous": previous, "current": version, "swapped_at": self.swapped_at}
+
+    def publish(self, source_dir, prefetch=False, lock=False):
+        """
+        Range les tables fraîchement générées dans `source_dir` comme nouvelle version,
+        la sert (swap) et supprime les versions au-delà de KEEP_VERSIONS.
+        """
+        # Nom horodaté à la milliseconde : l'ordre alphabétique des versions est l'ordre chronologique
+        existing = self.versions()
+        while True:
+            now = time.time()
+            version = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+            if version not in existing:
+                break
+            time.sleep(0.001)
+
+        os.makedirs(os.path.join(self.root, VERSIONS_DIR), exist_ok=True)
+        version_dir = os.path.join(self.root, VERSIONS_DIR, version)
+        os.rename(source_dir, version_dir)
+        try:
+            report = self.swap(version, prefetch, lock)
+        except ValueError:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            raise
+
+        # Les anciennes versions sont supprimées du disque ; une requête encore en cours
+        # sur l'une d'elles garde sa projection (le fichier disparaît à sa fermeture)
+        for old in self.versions()[:-KEEP_VERSIONS]:
+            if old != self.version:
+                shutil.rmtree(os.path.join(self.root, VERSIONS_DIR, old), ignore_errors=True)
+        return report
+
+    def status(self):
+        """État pour /health-check : prêt ou non, version servie et détail de chaque table."""
+        with self._lock:
+            return {
+                "ready": self.ready, "version": self.version, "swapped_at": self.swapped_at,
+                "scanned_at": self.scanned_at, "scan_seconds": self.scan_seconds,
+                "tables": [{k: v for k, v in entry.items() if k != "path"} for entry in self.tables.values()],
+            }
+
+
+# Registre partagé par le solveur, le correcteur et l'application Flask
+default_registry = TableRegistry(os.path.join(flask_path, "BFS"))
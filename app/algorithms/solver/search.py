@@ -0,0 +1,172 @@
+"""
+Moteurs de résolution sans table BFS.
+
+IDA* sur les coordonnées de pyraminx.py (permutation/orientation des arêtes, torsion
+des centres), guidé par deux petites tables d'élagage calculées au premier appel :
+- arêtes seules  : 360 x 32 = 11 520 distances ;
+- centres seuls  : 81 distances.
+Le maximum des deux est une heuristique admissible : les solutions restent optimales.
+
+Recherche bidirectionnelle (meet-in-the-middle) sur les rangs : deux BFS, l'une depuis
+l'état mélangé, l'autre depuis l'état résolu, qui se rejoignent vers la profondeur 5-6.
+Quelques milliers d'états en mémoire, aucune table précalculée à part les mouvements.
+
+Les résultats suivent le contrat de SolverEngine.solve_path (PathResult, coups
+au format « coup stocké » de la table : l'inverse de chaque coup à jouer).
+"""
+from .pyraminx import (MOVE_PERMUTATIONS, INVERSE_MOVES, N_EDGE_FLIPS, N_EDGE_PERMS,
+                       N_CENTER_TWISTS, state_coordinates, coordinate_move_tables,
+                       rank_state, apply_move_to_rank)
+from .engine import PathResult, MAX_PATH_LENGTH
+
+MOVE_NAMES = list(MOVE_PERMUTATIONS)
+N_EDGE_STATES = N_EDGE_PERMS * N_EDGE_FLIPS
+
+# Deux coups consécutifs sur la même couche se simplifient toujours : on les évite
+_MOVE_LAYERS = [name[0] for name in MOVE_NAMES]
+
+_PRUNING = None
+
+
+def _bfs_distances(size, neighbours):
+    """Distance au résolu (indice 0) de chaque coordonnée, par BFS sur la table de mouvements."""
+    dist = [-1] * size
+    dist[0] = 0
+    frontier = [0]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for value in frontier:
+            for child in neighbours[value]:
+                if dist[child] < 0:
+                    dist[child] = depth
+                    next_frontier.append(child)
+        frontier = next_frontier
+    return dist
+
+
+def pruning_tables():
+    """(mouvements arêtes, distances arêtes, mouvements centres, distances centres), calculés une fois."""
+    global _PRUNING
+    if _PRUNING is None:
+        perm_moves, flip_moves, center_moves = coordinate_move_tables()
+        edge_moves = [
+            tuple(perm_moves[e // N_EDGE_FLIPS][m] * N_EDGE_FLIPS + flip_moves[e % N_EDGE_FLIPS][m]
+                  for m in range(len(MOVE_NAMES)))
+            for e in range(N_EDGE_STATES)
+        ]
+        _PRUNING = (
+            edge_moves, _bfs_distances(N_EDGE_STATES, edge_moves),
+            center_moves, _bfs_distances(N_CENTER_TWISTS, center_moves),
+        )
+    return _PRUNING
+
+
+def ida_star_solve(state_str, max_depth=MAX_PATH_LENGTH):
+    """Solution optimale d'un état canonique (SOLVED_COLOURS) par IDA*."""
+    coords = state_coordinates(state_str)
+    if coords is None:
+        return PathResult("NOT_FOUND", None, None)
+
+    edge_moves, edge_dist, center_moves, center_dist = pruning_tables()
+    perm_coord, flip_coord, center_coord = coords
+    path = []
+
+    def search(edge, center, g, bound, last_layer):
+        h = max(edge_dist[edge], center_dist[center])
+        if h == 0:
+            return True, g
+        if g + h > bound:
+            return False, g + h
+
+        next_bound = None
+        for m, layer in enumerate(_MOVE_LAYERS):
+            if layer == last_layer:
+                continue
+            path.append(m)
+            found, value = search(edge_moves[edge][m], center_moves[center][m], g + 1, bound, layer)
+            if found:
+                return True, value
+            path.pop()
+            if next_bound is None or value < next_bound:
+                next_bound = value
+        return False, next_bound
+
+    edge = perm_coord * N_EDGE_FLIPS + flip_coord
+    bound = max(edge_dist[edge], center_dist[center_coord])
+    while bound <= max_depth:
+        found, value = search(edge, center_coord, 0, bound, None)
+        if found:
+            # Coups joués -> format « coup stocké » (inverse), comme SolverEngine.solve_path
+            moves = [INVERSE_MOVES[MOVE_NAMES[m]] for m in path]
+            return PathResult("FOUND", moves, len(moves))
+        if value is None:
+            break
+        bound = value
+
+    return PathResult("NOT_FOUND", None, None)
+
+
+def _chain(parents, rank):
+    """Coups (indices) depuis l'origine d'une recherche jusqu'à `rank`."""
+    moves = []
+    while parents[rank] is not None:
+        rank, move, _ = parents[rank]
+        moves.append(move)
+    moves.reverse()
+    return moves
+
+
+def bidirectional_solve(state_str, max_depth=MAX_PATH_LENGTH):
+    """
+    Solution optimale d'un état canonique (SOLVED_COLOURS) par BFS bidirectionnelle.
+    On étend à chaque fois la plus petite frontière, niveau complet par niveau complet :
+    la meilleure rencontre du premier niveau qui en trouve une est optimale.
+    """
+    start = rank_state(state_str)
+    if start is None:
+        return PathResult("NOT_FOUND", None, None)
+    if start == 0:
+        return PathResult("FOUND", [], 0)
+
+    # parents[rang] = (rang parent, indice du coup joué, profondeur) ; None pour l'origine
+    forward, backward = {start: None}, {0: None}
+    frontiers = {"forward": [start], "backward": [0]}
+    depths = {"forward": 0, "backward": 0}
+
+    while depths["forward"] + depths["backward"] < max_depth:
+        side = "forward" if len(frontiers["forward"]) <= len(frontiers["backward"]) else "backward"
+        visited, other = (forward, backward) if side == "forward" else (backward, forward)
+        depth = depths[side] + 1
+
+        best = None
+        next_frontier = []
+        for rank in frontiers[side]:
+            for m in range(len(MOVE_NAMES)):
+                child = apply_move_to_rank(rank, m)
+                if child in visited:
+                    continue
+                visited[child] = (rank, m, depth)
+                next_frontier.append(child)
+
+                if child in other:
+                    other_depth = other[child][2] if other[child] else 0
+                    if best is None or depth + other_depth < best[0]:
+                        best = (depth + other_depth, child)
+
+        frontiers[side] = next_frontier
+        depths[side] = depth
+
+        if best is not None:
+            meet = best[1]
+            played = [MOVE_NAMES[m] for m in _chain(forward, meet)]
+            # Côté résolu : on rejoue à l'envers les coups qui menaient du résolu à la rencontre
+            played += [INVERSE_MOVES[MOVE_NAMES[m]] for m in reversed(_chain(backward, meet))]
+            moves = [INVERSE_MOVES[name] for name in played]
+            return PathResult("FOUND", moves, len(moves))
+
+        if not next_frontier:
+            break
+
+    return PathResult("NOT_FOUND", None, None)
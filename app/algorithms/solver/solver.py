@@ -1,18 +1,45 @@
-import subprocess
 import os
 import time
 
-from .pyraminx import Pyraminx
+from .pyraminx import Pyraminx, PackedState
+from .engine import default_engine, PathResult
+from .invariants import identify_orientation, to_canonical, SOLVED_COLOURS
+from .search import ida_star_solve, bidirectional_solve
+from .batch import iter_solutions
+from .cache import SolutionCache, DEFAULT_CACHE_SIZE
+from .planner import plan_robot_solution
+from .registry import default_registry
 
-import platform
+flask_path = 'algorithms/solver'
 
-systeme = platform.system()
+path = f"{flask_path}/BFS/"
 
-flask_path = 'algorithms/solver'
+# Table unique : toutes les orientations y sont ramenées par renommage des couleurs.
+# La table indexée par rang (.rank, accès O(1)) est préférée au .bin trié, lui-même
+# préféré à sa version compressée par blocs (.cbin, pour les cartes SD).
+canonical_bin = os.path.join(path, f"{SOLVED_COLOURS}.bin")
+canonical_rank = os.path.join(path, f"{SOLVED_COLOURS}.rank")
+canonical_cbin = os.path.join(path, f"{SOLVED_COLOURS}.cbin")
 
-engine = f"{flask_path}/fast_solver.exe" if systeme == "Windows" else f"{flask_path}/fast_solver"
+# Moteurs disponibles : "table" (table BFS), "ida" (IDA*) ou "bidir" (bidirectionnel),
+# ces deux derniers sans table sur disque
+SOLVER_METHODS = ("table", "ida", "bidir")
 
-path = f"{flask_path}/BFS/"
+# Cache LRU des solutions (clé canonique), partagé par toutes les routes qui appellent solve().
+# Journal des solutions récentes, relu au démarrage (solution_cache.warm()), rangé avec les
+# données générées dans BFS/ (ignoré par le registre, qui ne lit que les formats de table).
+solution_journal = os.path.join(path, "solutions.journal")
+solution_cache = SolutionCache(DEFAULT_CACHE_SIZE, solution_journal)
+
+def canonical_table():
+    """
+    Chemin de la table canonique à interroger (.rank, sinon .bin, sinon .cbin).
+    Donné par le registre construit au démarrage (registry.py) : aucun accès disque par requête.
+    None si le registre est construit sans table canonique valide (absente ou corrompue).
+    """
+    if default_registry.scanned_at is not None:
+        return default_registry.path(SOLVED_COLOURS)
+    return default_registry.path(SOLVED_COLOURS) or canonical_bin
 
 def apply_tip_fixes(cube):
     """Logique d'alignement des tips (copiée de votre code précédent)"""
@@ -32,40 +59,13 @@ def apply_tip_fixes(cube):
     return moves
 
 def query_c_solver(bin_path, state_str):
-    """Appelle le programme C pour obtenir le prochain coup"""
-    
-    # 1. Obtenir le chemin absolu pour éviter les erreurs avec sudo
-    abs_engine = os.path.abspath(engine)
-    abs_bin_path = os.path.abspath(bin_path)
-
-    if not os.path.exists(abs_bin_path):
-        return "FILE_NOT_FOUND"
-
-    try:
-        # 2. Préparer la commande
-        command = [abs_engine, abs_bin_path, state_str]
-        
-        # 3. Ajouter 'sudo' seulement si on est sous Linux
-        if systeme != "Windows":
-            command.insert(0, "sudo")
-
-        # Appel système
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            check=False # On gère les erreurs manuellement via le stdout/stderr
-        )
-        
-        if result.returncode != 0:
-            print(f"Erreur C Solver (Code {result.returncode}): {result.stderr}")
-            return "ERROR"
-
-        return result.stdout.strip()
-        
-    except Exception as e:
-        print(f"Exception Python: {e}")
-        return "ERROR"
+    """
+    Obtient le prochain coup pour un état.
+    Même contrat que l'ancien appel à `fast_solver` (START, U, U`, ..., NOT_FOUND,
+    FILE_NOT_FOUND, ERROR), mais la table est gardée ouverte dans le processus :
+    plus de subprocess ni de sudo à chaque coup.
+    """
+    return default_engine.lookup(bin_path, state_str)
 
 
 def inverser_sens_moves(liste_moves): # X devient X' et X' devient X
@@ -82,8 +82,25 @@ def inverser_sens_moves(liste_moves): # X devient X' et X' devient X
             resultat.append(m + "'")
     return resultat
 
-def solve_with_c(state):
+def solve_with_c(state, stats=None, method="table", cost_model=None):
+    """
+    Résout un état (36 chars). Si `stats` (dict) est fourni, il reçoit l'orientation
+    identifiée, le nombre de tables interrogées (`tables_probed`) et l'issue du cache
+    de solutions (`cache` : "hit" ou "miss").
+    `method` : "table" (table BFS), "ida" (IDA* avec petites tables d'élagage) ou
+    "bidir" (recherche bidirectionnelle). Sans table valide (absente ou illisible), "table" se replie
+    automatiquement sur "bidir" (stats["fallback"]).
+    Avec un `cost_model` (planner.RobotCostModel), la solution retenue est la plus rapide
+    à exécuter par le robot parmi les solutions optimales et optimales + 1 de la table,
+    et stats["estimated_time"] reçoit sa durée modélisée ; cette séquence est mémorisée
+    dans solution_cache pour cet état et ce modèle.
+    """
     start_global = time.time()
+    if stats is None:
+        stats = {}
+    if method not in SOLVER_METHODS:
+        raise ValueError(f"Moteur inconnu : {method}")
+    stats["method"] = method
 
     # 1. Préparation (Tips)
     cube = Pyraminx(state=state)
@@ -92,73 +109,82 @@ def solve_with_c(state):
 
     print(f"État initial: {fixed_state}")
 
-    # 2. Détermination du fichier CIBLE
-    # On regarde les centres pour deviner le fichier (ex: rbgy)
-    file_code = f"{state[0]}{state[9]}{state[18]}{state[27]}"
-    preferred_bin = os.path.join(path, f"{file_code}.bin")
+    # 2. Identification directe du fichier CIBLE par les invariants (centres + arêtes).
+    # Un état impossible est rejeté ici, sans aucune recherche dans les tables.
+    file_code, reason = identify_orientation(fixed_state)
+    stats["orientation"] = file_code
+    stats["tables_probed"] = 0
+
+    if file_code is None:
+        stats["reason"] = reason
+        print(f"X - État impossible : {reason}.")
+        return [" "], fixed_state
 
     solution_moves = inverser_sens_moves(tip_moves[:])
 
-    # Liste des fichiers à tester (Le préféré en premier, puis les autres)
-    files_to_check = [preferred_bin]
-    # Ajout des autres fichiers en cas de fallback
-    all_bins = [os.path.join(path, f) for f in os.listdir(path) if f.endswith('.bin')]
-    for f in all_bins:
-        if f != preferred_bin:
-            files_to_check.append(f)
-
-    # 3. Boucle de résolution
-    # On essaie de résoudre avec le premier fichier. Si ça bloque, on change de fichier.
-
-    found_file = None
-
-    for bin_file in files_to_check:
-        # On fait une copie temporaire pour simuler la résolution sur ce fichier
-        temp_cube = Pyraminx(state=fixed_state)
-        temp_moves = []
-        valid_path = True
-        steps = 0
-
-        # print(f"Test avec le fichier : {os.path.basename(bin_file)}")
-
-        while steps < 50: # Sécurité max 50 coups
-            current_str = temp_cube.stringify()
-
-            # APPEL AU PROGRAMME C
-            move = query_c_solver(bin_file, current_str)
-
-            if move == "START":
-                # SUCCÈS !
-                solution_moves.extend(temp_moves)
-                total_time = time.time() - start_global
-                print(f"\n✓ - RÉSOLU avec {os.path.basename(bin_file)}")
-                print(f"Temps total : {total_time:.4f} sec")
-                print(f"Coups ({len(solution_moves)}) : {' '.join(inverser_sens_moves(solution_moves))}")
-                return inverser_sens_moves(solution_moves), fixed_state
-
-            elif move in ["NOT_FOUND", "UNKNOWN_MOVE", "FILE_NOT_FOUND", "ERROR"]:
-                # Ce fichier ne contient pas la solution pour cet état
-                valid_path = False
-                break
-
-            else:
-                # C'est un mouvement valide (ex: U, R`, etc.)
-                temp_moves.append(move)
-
-                # Appliquer le mouvement en Python pour obtenir l'état suivant
-                d = 1 if '`' in move else 0
-                if move[0] == 'U': temp_cube = temp_cube.up(d)
-                elif move[0] == 'R': temp_cube = temp_cube.right(d)
-                elif move[0] == 'L': temp_cube = temp_cube.left(d)
-                elif move[0] == 'B': temp_cube = temp_cube.back(d)
-
-                steps += 1
-
-        if valid_path:
-            # Si on sort de la boucle while sans être START ni NOT_FOUND, c'est louche (max steps atteint)
-            pass
-
-    print("X - Aucune solution trouvée dans les 12 fichiers.")
+    # 3. Résolution dans la table canonique : on renomme les couleurs du scan.
+    # Les faces (centres axiaux) ne bougent pas, donc les coups restent ceux du scan.
+    # Le moteur remonte toute la chaîne de coups en un seul appel.
+    canonical_state = to_canonical(fixed_state, file_code)
+
+    if cost_model is not None:
+        tip_tokens = inverser_sens_moves(solution_moves)
+        # La programmation dynamique coûte bien plus qu'une résolution : on la mémorise
+        planned = solution_cache.get_plan(canonical_state, tip_tokens, cost_model)
+        stats["cache"] = "miss" if planned is None else "hit"
+        if planned is None and default_registry.path(SOLVED_COLOURS) is not None:
+            planned = plan_robot_solution(canonical_state, tip_tokens, cost_model,
+                                          default_engine.table(canonical_table()))
+            if planned is not None:
+                solution_cache.put_plan(canonical_state, tip_tokens, cost_model, planned)
+                stats["tables_probed"] = 1
+        if planned is not None:
+            sequence, stats["estimated_time"] = planned
+            print(f"\n✓ - Séquence robot ({stats['estimated_time']:.2f} s estimées) : {' '.join(sequence)}")
+            return sequence, fixed_state
+
+    cached = solution_cache.get(canonical_state)
+    stats["cache"] = "miss" if cached is None else "hit"
+    if cached is not None:
+        bin_file = "cache"
+        result = PathResult("FOUND", cached, len(cached))
+    elif method == "ida":
+        bin_file = "IDA*"
+        result = ida_star_solve(canonical_state)
+    elif method == "bidir":
+        bin_file = "recherche bidirectionnelle"
+        result = bidirectional_solve(canonical_state)
+    else:
+        bin_file = canonical_table()
+        if bin_file is None:
+            result = PathResult("FILE_NOT_FOUND", [], 0)
+        else:
+            result = default_engine.solve_path(bin_file, canonical_state)
+        stats["tables_probed"] = 1
+
+        if result.status in ("FILE_NOT_FOUND", "ERROR"):
+            # Appareil fraîchement installé ou table illisible : on résout quand même, sans table
+            print(f"Table absente ou invalide ({bin_file or 'registre'}), repli sur la recherche bidirectionnelle.")
+            stats["fallback"] = "bidir"
+            stats["tables_probed"] = 0
+            bin_file = "recherche bidirectionnelle"
+            result = bidirectional_solve(canonical_state)
+
+    if result.status == "FOUND":
+        # SUCCÈS !
+        if cached is None:
+            solution_cache.put(canonical_state, result.moves)
+        solution_moves.extend(result.moves)
+        total_time = time.time() - start_global
+        print(f"\n✓ - RÉSOLU avec {os.path.basename(bin_file)} (profondeur {result.depth})")
+        print(f"Temps total : {total_time:.4f} sec")
+        print(f"Coups ({len(solution_moves)}) : {' '.join(inverser_sens_moves(solution_moves))}")
+        if cost_model is not None:
+            stats["estimated_time"] = cost_model.estimate(inverser_sens_moves(solution_moves))
+        return inverser_sens_moves(solution_moves), fixed_state
+
+    stats["reason"] = result.status
+    print(f"X - Aucune solution trouvée dans {os.path.basename(bin_file)} ({result.status}).")
     return [" "], fixed_state
 
 
@@ -198,51 +224,26 @@ def test_sequence(scrambled, sequence):
 
     print(f"\nMouvement : {' '.join(moves_to_check)}")
 
-    cube = Pyraminx(state=scrambled_state)
+    # Conversion unique vers l'état compact (auto-rotation du constructeur comprise)
+    cube = PackedState.from_pyraminx(Pyraminx(state=scrambled_state))
 
     print(f"\nApplication des mouvements (Logique : Inversion du sens + Rotation cohérente)...")
 
     for i, move in enumerate(moves_to_check):
         clean_move = move.replace("`", "'")
 
-        # --- LOGIQUE D'INVERSION ---
-        # Si le code dit "Normal", on applique "Prime" (direction 1)
-        # Si le code dit "Prime", on applique "Normal" (direction 0)
-        direction = 0 if "'" in clean_move else 1
-        move_name = clean_move[0]
-
-        # Raccourci vers les données
-        c = cube.cube
-
-        # Sélection de la fonction de rotation interne (La clé du succès !)
-        # direction 1 (Prime) -> utilise rotateRight (pour simuler le mouvement inverse)
-        # direction 0 (Normal) -> utilise rotateLeft
-        rotate_func = cube.rotateRight if direction else cube.rotateLeft
-
-        # --- APPLICATION ---
-
-        # A. Mouvements des FACE (Majuscules)
-        if move_name == 'U': cube = cube.up(direction)
-        elif move_name == 'R': cube = cube.right(direction)
-        elif move_name == 'L': cube = cube.left(direction)
-        elif move_name == 'B': cube = cube.back(direction)
-
-        # B. Mouvements des TIPS (Minuscules)
-        elif move_name == 'u':
-            c[0][0], c[1][0], c[2][0] = rotate_func(c[0][0], c[1][0], c[2][0])
-        elif move_name == 'r':
-            c[0][8], c[3][8], c[1][4] = rotate_func(c[0][8], c[3][8], c[1][4])
-        elif move_name == 'l':
-            c[0][4], c[2][8], c[3][4] = rotate_func(c[0][4], c[2][8], c[3][4])
-        elif move_name == 'b':
-            c[3][0], c[2][4], c[1][8] = rotate_func(c[3][0], c[2][4], c[1][8])
+        # Faces (majuscules) et tips (minuscules) : une permutation précalculée par coup.
+        # "X" joue le sens 1 (rotateRight pour les tips), "X'" le sens 0 (rotateLeft).
+        try:
+            cube = cube.move(clean_move)
+        except KeyError:
+            pass  # Coup inconnu (ex: " " d'un échec) : ignoré
 
         # --- AFFICHAGE ---
-        real_move = move_name + ("'" if direction == 1 else "")
-        print(f" {i+1:02d}. Code: {move:<3} => État: {cube.stringify()}")
+        print(f" {i+1:02d}. Code: {move:<3} => État: {cube}")
 
     # Résultat final
-    final_state = cube.stringify()
+    final_state = str(cube)
     print(f"\n--- BILAN ---")
     print(f"État Final   : {final_state}")
 
@@ -256,11 +257,11 @@ def test_sequence(scrambled, sequence):
         print("X - RÉSULTAT VIRTUEL : ÉCHEC.")
 
 
-def solve(scrambled):
+def solve(scrambled, stats=None, method="table", cost_model=None):
     """
     Adapte la configuration du scramble (spécifiquement la face du bas)
     pour qu'elle corresponde au format attendu par le solveur C,
-    puis lance la résolution.
+    puis lance la résolution. `stats`, `method` et `cost_model` : voir solve_with_c.
     """
     # 1. On garde les 3 premières faces intactes
     # Indices 0 à 26 inclus
@@ -285,9 +286,23 @@ def solve(scrambled):
     # 4. On recolle le tout
     adapted_scramble = top_faces + new_bottom
     
-    sequence_list, fixed_state = solve_with_c(adapted_scramble)
+    sequence_list, fixed_state = solve_with_c(adapted_scramble, stats, method, cost_model)
 
     sequence_str = " ".join(sequence_list)
 
     # 5. Appel à votre fonction C existante
-    return sequence_str, fixed_state
\ No newline at end of file
+    return sequence_str, fixed_state
+
+
+def solve_many(states, scan_order=True):
+    """
+    Résout des milliers d'états d'un coup (voir batch.py) dans la table canonique.
+    Générateur de dicts (status, sequence, move_count, fixed_state), dans l'ordre des états ;
+    séquences de la table, comme solve() sans cache : même longueur et même état final que
+    solve(), mais pas forcément les mêmes coups quand solve() répond depuis son cache.
+    Lève FileNotFoundError si la table est absente ou invalide.
+    """
+    table_path = canonical_table()
+    if table_path is None:
+        raise FileNotFoundError("Aucune table canonique valide dans le registre")
+    return iter_solutions(states, table_path, scan_order)
\ No newline at end of file
@@ -26,6 +26,28 @@ const char* MOVE_NAMES[] = {
     "L", "L`", "B", "B`"
 };
 
+/* Tables v2 (voir engine.py) : en-tête de 64 octets (magic, ..., nombre d'entrées à
+   l'octet 20, position des entrées à l'octet 48), index épars, puis les entrées.
+   Les anciens fichiers (entrées brutes) sont lus tels quels. */
+#define TABLE_MAGIC "PYRBFS2\n"
+#define TABLE_HEADER_SIZE 64
+
+size_t table_data_offset(const uint8_t *raw, size_t size, size_t *num_entries) {
+    if (size < TABLE_HEADER_SIZE || memcmp(raw, TABLE_MAGIC, 8) != 0) {
+        *num_entries = size / ENTRY_SIZE;
+        return 0;
+    }
+    uint64_t count = 0, offset = 0;
+    for (int i = 3; i >= 0; i--) count = (count << 8) | raw[20 + i];
+    for (int i = 7; i >= 0; i--) offset = (offset << 8) | raw[48 + i];
+    if (offset + count * ENTRY_SIZE > size) {
+        *num_entries = 0;
+        return 0;
+    }
+    *num_entries = (size_t) count;
+    return (size_t) offset;
+}
+
 void pack_state(const char* input, uint8_t* output) {
     char color_map[] = "rgby";
 
@@ -97,8 +119,8 @@ int main(int argc, char *argv[]) {
         return 1;
     }
 
-    entries = (Entry*) map;
-    num_entries = sb.st_size / ENTRY_SIZE;
+    size_t data_offset = table_data_offset((const uint8_t*) map, sb.st_size, &num_entries);
+    entries = (Entry*) ((uint8_t*) map + data_offset);
 
 #else
     /* ============================
@@ -115,23 +137,23 @@ int main(int argc, char *argv[]) {
     long size = ftell(f);
     fseek(f, 0, SEEK_SET);
 
-    if (size % ENTRY_SIZE != 0) {
-        printf("Erreur: fichier corrompu.\n");
+    uint8_t *raw = malloc(size);
+    if (!raw) {
+        printf("Erreur malloc\n");
         fclose(f);
         return 1;
     }
 
-    num_entries = size / ENTRY_SIZE;
+    fread(raw, 1, size, f);
+    fclose(f);
 
-    entries = malloc(size);
-    if (!entries) {
-        printf("Erreur malloc\n");
-        fclose(f);
+    size_t data_offset = table_data_offset(raw, size, &num_entries);
+    if (data_offset == 0 && size % ENTRY_SIZE != 0) {
+        printf("Erreur: fichier corrompu.\n");
+        free(raw);
         return 1;
     }
-
-    fread(entries, ENTRY_SIZE, num_entries, f);
-    fclose(f);
+    entries = (Entry*) (raw + data_offset);
 
 #endif
 
@@ -157,10 +179,10 @@ int main(int argc, char *argv[]) {
     }
 
 #ifndef _WIN32
-    munmap(entries, num_entries * ENTRY_SIZE);
+    munmap(map, sb.st_size);
     close(fd);
 #else
-    free(entries);
+    free(raw);
 #endif
 
     return 0;
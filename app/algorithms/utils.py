@@ -64,3 +64,25 @@ def convert_to_abcd(cube_state):
             pass 
 
     return resultat
+
+
+def convert_to_probabilities(probabilites_patron):
+    """
+    Équivalent de convert_to_abcd pour les probabilités du scan ({face: [9 dicts couleur -> p]}) :
+    liste de 36 lignes [p_r, p_g, p_b, p_y] (ordre des chiffres du correcteur, "rgby"),
+    dans l'ordre FRONT, RIGHT, LEFT, BOTTOM. Sticker ou face manquant : probabilités égales.
+    """
+    color_map = {'ROUGE': 'r', 'JAUNE': 'y', 'VERT': 'g', 'BLEU': 'b', 'ORANGE': 'r'}
+    ordre_faces = ['FRONT', 'RIGHT', 'LEFT', 'BOTTOM']
+
+    resultat = []
+    for face in ordre_faces:
+        stickers = probabilites_patron.get(face) or [{}] * 9
+        for probas in stickers:
+            ligne = dict.fromkeys("rgby", 0.0)
+            for couleur, p in probas.items():
+                if couleur.upper() in color_map:
+                    ligne[color_map[couleur.upper()]] += p
+            total = sum(ligne.values())
+            resultat.append([ligne[c] / total for c in "rgby"] if total > 0 else [0.25] * 4)
+    return resultat
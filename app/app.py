@@ -34,9 +34,12 @@ matplotlib.use('Agg')
 
 # -- Modules Locaux --
 from algorithms.scan import process_single_scan_and_draw
-from algorithms.utils import save_to_file, load_from_file, convert_to_abcd
-from algorithms.solver.solver import solve
-from algorithms.solver.corrector import get_corrected_state
+from algorithms.utils import save_to_file, load_from_file, convert_to_abcd, convert_to_probabilities
+from algorithms.solver.solver import solve, solve_many, solution_cache, path as bfs_path
+from algorithms.solver.registry import default_registry, STAGING_DIR
+from algorithms.solver.generateBFS import TableGenerator, CompactTableGenerator
+from algorithms.solver.corrector import get_corrected_state, most_likely_states, DEFAULT_TOP_K
+from algorithms.solver.planner import RobotCostModel
 from robot.controller_helper import send_sequence_to_the_robot
 
 
@@ -64,6 +67,26 @@ camera_lock = threading.Lock()
 
 log_queue = queue.Queue()
 
+# Cache des solutions : les mélanges récents (journal) sont résolus en O(1) dès le démarrage
+solution_cache.warm()
+
+# Durées du banc (robot/controller.c) pour choisir la séquence la plus rapide à exécuter
+robot_cost_model = RobotCostModel.from_file('robot/cost_model.json')
+
+# Registre des tables : contrôle, ouverture et préchargement une seule fois au démarrage.
+# TABLE_MLOCK garde les tables en RAM (nécessite `ulimit -l` suffisant, sinon simple avertissement).
+TABLE_PREFETCH = True
+TABLE_MLOCK = False
+default_registry.scan(prefetch=TABLE_PREFETCH, lock=TABLE_MLOCK)
+
+# Génération de la table en arrière-plan (une seule à la fois, reprise si interrompue).
+# Elle écrit dans BFS/staging/, publié comme nouvelle version servie une fois terminée.
+table_generation = None
+table_generation_lock = threading.Lock()
+
+# Dernier remplacement à chaud des tables (publication ou retour arrière) : rapport ou erreur
+last_table_swap = None
+
 # ==============================================================================
 # 3. FONCTIONS UTILITAIRES (SYSTÈME ET CAMÉRA)
 # ==============================================================================
@@ -238,6 +261,7 @@ def init_scan():
         "FRONT": ["INCONNU"] * 9, "RIGHT": ["INCONNU"] * 9,
         "LEFT": ["INCONNU"] * 9, "BOTTOM": ["INCONNU"] * 9        
     }
+    session['pyraminx_probas'] = {}
     return jsonify({"status": "initialized", "patron": session['pyraminx_patron']})
 
 @app.route('/api/save-image', methods=['POST'])
@@ -307,11 +331,13 @@ def api_scan():
         # --- ALGORITHME ---
         # On récupère la session ou on crée un vide si inexistant
         current_patron = session.get('pyraminx_patron', {})
+        # Probabilités des couleurs de chaque sticker, pour /api/correct
+        current_probas = session.get('pyraminx_probas', {})
         
         # Appel à l'algo de scan
         # IMPORTANT : Cette fonction doit être la version OpenCV (sans Matplotlib)
         liste_couleurs_face, img_patron_np = process_single_scan_and_draw(
-            img_bgr, face_name.upper(), current_patron
+            img_bgr, face_name.upper(), current_patron, current_probas
         )
         
         # On n'a plus besoin de l'image source (lourde)
@@ -319,6 +345,7 @@ def api_scan():
         
         # Mise à jour session
         session['pyraminx_patron'] = current_patron 
+        session['pyraminx_probas'] = current_probas
         session.modified = True 
         
         # --- ENCODAGE BASE64 OPTIMISÉ ---
@@ -337,6 +364,7 @@ def api_scan():
             "status": "success", 
             "face": face_name.upper(),
             "colors": liste_couleurs_face, 
+            "probabilities": current_probas.get(face_name.upper()),
             "patron_image_base64": patron_base64,
             "full_patron": current_patron
         }
@@ -397,7 +425,15 @@ def api_solve():
             full_abcd_string += segment
         
         # Solve
-        sequence, fixed_state_str = solve(full_abcd_string)
+        solve_stats = {}
+        sequence, fixed_state_str = solve(full_abcd_string, solve_stats, data.get('method', 'table'))
+        if solve_stats.get("orientation") is None:
+            # Rejeté par les invariants (centres/arêtes), aucune table interrogée
+            return jsonify({
+                "status": "impossible",
+                "message": f"État impossible : {solve_stats.get('reason')}",
+                "tables_probed": solve_stats.get("tables_probed", 0)
+            }), 422
         derniere_sequence = sequence
         dernier_etat_abcd = full_abcd_string 
 
@@ -415,6 +451,8 @@ def api_solve():
         response = jsonify({
             "status": "solved", "sequence": sequence,
             "move_count": len(sequence.strip().split()), "fixed_state": fixed_state_str,
+            "tables_probed": solve_stats.get("tables_probed", 0),
+            "cache": solve_stats.get("cache"),
             "setup": {
                 "face_to_front": best_match_face, "face_color": nom_couleur_visuelle,
                 "instruction": f"Placez la face {best_match_face} ({nom_couleur_visuelle}) face au robot.",
@@ -429,6 +467,107 @@ def api_solve():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/solve_cache', methods=['GET'])
+def api_solve_cache():
+    """Compteurs du cache des solutions (taille, hits, misses, evictions)."""
+    return jsonify(solution_cache.stats())
+
+@app.route('/api/solve_batch', methods=['POST'])
+def api_solve_batch():
+    """
+    Résolution par lots (rejeu de scans, audits robot) : {"states": ["rrgy...", ...]}
+    avec des chaînes ABCD de 36 chars (format de /api/solve, ou format interne si
+    "scan_order": false). Réponse NDJSON, une ligne par état, dans l'ordre.
+    """
+    data = request.get_json(silent=True) or {}
+    states = data.get('states')
+    if not isinstance(states, list) or not all(isinstance(s, str) for s in states):
+        return jsonify({"error": "'states' doit être une liste de chaînes"}), 400
+
+    try:
+        results = solve_many(states, data.get('scan_order', True))
+    except FileNotFoundError as e:
+        return jsonify({"error": f"Table introuvable : {e}"}), 503
+
+    def generate():
+        for index, result in enumerate(results):
+            yield json.dumps({"index": index, **result}) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+def run_table_generation(generator):
+    global last_table_swap
+    try:
+        generator.run()
+    except Exception as e:
+        print(f"Erreur génération table : {e}")
+    if generator.snapshot()["status"] != "done":
+        return
+    # Nouvelle version servie sans redémarrage : les requêtes en cours finissent sur l'ancienne
+    try:
+        last_table_swap = default_registry.publish(generator.output_dir, prefetch=TABLE_PREFETCH, lock=TABLE_MLOCK)
+    except (OSError, ValueError) as e:
+        print(f"Erreur publication table : {e}")
+        last_table_swap = {"error": str(e)}
+
+@app.route('/api/tables/generate', methods=['POST'])
+def api_generate_table():
+    """
+    Lance (ou reprend au dernier niveau terminé) la génération de la table en arrière-plan.
+    {"compact": true} : BFS sur les rangs, quelques Mo de mémoire (Raspberry Pi).
+    {"workers": N} : chaque niveau réparti sur N processus (implique le mode compact).
+    """
+    global table_generation
+    data = request.get_json(silent=True) or {}
+    with table_generation_lock:
+        if table_generation is not None and table_generation.snapshot()["status"] in ("pending", "running"):
+            return jsonify(table_generation.snapshot()), 409
+        workers = data.get('workers', 1)
+        if not isinstance(workers, int) or workers < 1:
+            return jsonify({"error": "'workers' doit être un entier positif"}), 400
+        staging_path = os.path.join(bfs_path, STAGING_DIR)
+        if workers > 1:
+            table_generation = CompactTableGenerator(output_dir=staging_path, verbose=False, workers=workers)
+        elif data.get('compact'):
+            table_generation = CompactTableGenerator(output_dir=staging_path, verbose=False)
+        else:
+            table_generation = TableGenerator(output_dir=staging_path, verbose=False)
+        threading.Thread(target=run_table_generation, args=(table_generation,), daemon=True).start()
+        return jsonify(table_generation.snapshot()), 202
+
+@app.route('/api/tables/generate', methods=['GET'])
+def api_generate_table_status():
+    """Avancement de la génération : niveau, états, états/s, ETA et détail par niveau."""
+    if table_generation is None:
+        return jsonify({"status": "idle"})
+    return jsonify(table_generation.snapshot())
+
+@app.route('/api/tables', methods=['GET'])
+def api_tables():
+    """Version servie, versions disponibles, dernier remplacement et détail des tables."""
+    return jsonify({"current": default_registry.version, "versions": default_registry.versions(),
+                    "last_swap": last_table_swap, "registry": default_registry.status()})
+
+@app.route('/api/tables/swap', methods=['POST'])
+def api_swap_tables():
+    """
+    Remplace à chaud les tables servies par {"version": "..."} (retour arrière compris),
+    par défaut la version la plus récente. Les requêtes en cours finissent sur l'ancienne.
+    """
+    global last_table_swap
+    data = request.get_json(silent=True) or {}
+    versions = default_registry.versions()
+    version = data.get('version') or (versions[-1] if versions else None)
+    if not isinstance(version, str):
+        return jsonify({"error": "Aucune version de tables disponible"}), 404
+    try:
+        last_table_swap = default_registry.swap(version, prefetch=TABLE_PREFETCH, lock=TABLE_MLOCK)
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except (OSError, ValueError) as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify(last_table_swap), 200
+
 # ==============================================================================
 # 7. API - ROBOT & HARDWARE
 # ==============================================================================
@@ -482,6 +621,27 @@ def robot_connect():
         return jsonify({ "status": "success", "info": sys_info })
     except Exception as e: return jsonify({"error": str(e)}), 500
 
+@app.route('/api/correct', methods=['POST'])
+def api_correct():
+    """
+    Les k états valides les plus vraisemblables d'après les probabilités des couleurs du scan
+    ({"probabilities": {face: [9 dicts]}} ou, par défaut, celles de la session), sans rescanner.
+    {"k": N} : nombre d'états (défaut DEFAULT_TOP_K). `margin` : écart de log-vraisemblance
+    entre les deux premiers (grand = lecture fiable).
+    """
+    data = request.get_json(silent=True) or {}
+    probas = data.get('probabilities') or session.get('pyraminx_probas')
+    if not probas:
+        return jsonify({"error": "Aucune probabilité de scan disponible"}), 400
+    k = data.get('k', DEFAULT_TOP_K)
+    if not isinstance(k, int) or not 1 <= k <= 100:
+        return jsonify({"error": "'k' doit être un entier entre 1 et 100"}), 400
+
+    stats = {}
+    states = most_likely_states(convert_to_probabilities(probas), k, stats)
+    return jsonify({"status": "success", "states": states, "margin": stats["margin"],
+                    "orientations_pruned": stats["orientations_pruned"]})
+
 @app.route('/api/robot/solve', methods=['POST'])
 def robot_solve_trigger():
     # (Identique au code précédent...)
@@ -491,24 +651,28 @@ def robot_solve_trigger():
         patron = data.get('config')
         algo_type = data.get('algorithm', 'SPEED')
 
+        # Séquence la plus rapide à exécuter selon le modèle de coûts du banc
         try:
             if 'dernier_etat_abcd' in globals() and dernier_etat_abcd:
-                s, _ = solve(dernier_etat_abcd)
+                s, _ = solve(dernier_etat_abcd, cost_model=robot_cost_model)
             else: raise NameError
         except:
-            patron_abcd = get_corrected_state(convert_to_abcd(patron))
-            s, _ = solve(patron_abcd)
+            correction = {}
+            patron_abcd = get_corrected_state(convert_to_abcd(patron), correction)
+            if patron_abcd is None:
+                # Scan inexploitable (chaîne incomplète) : inutile d'envoyer quoi que ce soit au robot
+                return jsonify({"status": "impossible",
+                                "message": f"Scan impossible : {correction.get('reason')}"}), 422
+            s, _ = solve(patron_abcd, cost_model=robot_cost_model)
 
-        sequence_ = (derniere_sequence or s) if (derniere_sequence or s) else ""
+        sequence_ = s.strip() or derniere_sequence or ""
 
         if sequence_:
             print(f"ROBOT: Executing {algo_type} solve: {sequence_}")
             send_sequence_to_the_robot(sequence_)
-            move_count = len(sequence_.split())
-        else:
-            move_count = 0
-            
-        return jsonify({ "status": "executing", "sequence": sequence_, "estimated_time": move_count * 1.5 })
+
+        estimated_time = round(robot_cost_model.estimate(sequence_.split()), 2)
+        return jsonify({ "status": "executing", "sequence": sequence_, "estimated_time": estimated_time })
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -636,7 +800,22 @@ def list_patterns():
     return jsonify({'success': True, 'count': len(patterns_list), 'patterns': patterns_list})
 
 @app.route('/health-check', methods=['GET'])
-def health_check(): return jsonify({'status': 'healthy'}), 200
+def health_check():
+    """
+    Vivant : toujours 200, même sans table (solve() se replie alors sur la recherche
+    bidirectionnelle). L'état des tables est dans le corps (`ready`, `solver`).
+    """
+    tables = default_registry.status()
+    return jsonify({'status': 'healthy', 'ready': tables["ready"],
+                    'solver': 'table' if tables["ready"] else 'bidir', 'tables': tables}), 200
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Prêt à résoudre par table : 200 si le registre contient une table valide, 503 sinon."""
+    tables = default_registry.status()
+    if not tables["ready"]:
+        return jsonify({'status': 'not_ready', 'tables': tables}), 503
+    return jsonify({'status': 'ready', 'tables': tables}), 200
 
 @app.route('/stream-logs')
 def stream_logs():